@@ -0,0 +1,265 @@
+"""
+End to end benchmark of the CLI commands against a local mock API.
+
+Starts benchmarks/mock_server.py, runs each command as a subprocess the
+way a user would, for one location and for a batch of them, and saves the
+latency and throughput of every scenario as JSON. Given a --baseline from
+an earlier run, exits with code 1 if a scenario got slower than
+--max-regression allows.
+
+    uv run benchmarks/commands.py
+    uv run benchmarks/commands.py --runs 10 --latency-ms 80 --error-rate 0.05
+    uv run benchmarks/commands.py --baseline benchmarks/results/before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mock_server import MockOpenWeather
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = Path(__file__).resolve().parent / "results"
+
+# (name, command arguments, batched). Batched scenarios fetch --locations
+# locations from a --coords-file, the others only the first one.
+SCENARIOS = [
+    ("current", ["current"], False),
+    ("current batch", ["current"], True),
+    ("12hours", ["12hours"], False),
+    ("12hours batch", ["12hours"], True),
+    ("24hours", ["24hours"], False),
+    ("24hours batch", ["24hours"], True),
+    ("8days", ["8days"], False),
+    ("8days batch", ["8days"], True),
+    ("searchcity", ["searchcity", "Austin,TX,US"], False),
+    ("current image", ["current", "--to-image"], False),
+    ("current image batch", ["current", "--to-image"], True),
+]
+
+
+def make_locations(count: int) -> list[str]:
+    # A spread of points over Texas, each one a distinct cache key
+    return [
+        f"{29.0 + (i // 10) * 0.25:.4f},{-99.0 + (i % 10) * 0.25:.4f}"
+        for i in range(count)
+    ]
+
+
+def make_backgrounds(folder: Path):
+    """
+    Writes plain gradient backgrounds so image timings don't depend on the
+    photos a user keeps in images/.
+    """
+    from PIL import Image
+
+    sys.path.insert(0, str(ROOT))
+    from lib.images import BACKGROUND_FILES, BACKGROUND_SIZE
+
+    gradient = Image.linear_gradient("L").resize(BACKGROUND_SIZE).convert("RGB")
+    for i, path in enumerate(BACKGROUND_FILES.values()):
+        (folder / path).parent.mkdir(parents=True, exist_ok=True)
+        tint = Image.new("RGB", BACKGROUND_SIZE, (40 * i, 90, 160))
+        Image.blend(gradient, tint, 0.5).save(folder / path, quality=90)
+
+
+def percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(share * (len(ordered) - 1)))]
+
+
+def run_scenario(
+    mock: MockOpenWeather,
+    args: list[str],
+    locations: list[str],
+    workdir: Path,
+    env: dict,
+    runs: int,
+) -> dict:
+    """
+    Runs one command runs times after a warmup run. Every run skips the
+    response cache so it goes through the fetch path.
+    """
+    command = [sys.executable, str(ROOT / "main.py"), *args, "--no-cache"]
+    if args[0] != "searchcity":
+        command.extend(["--coords-file", str(workdir / "coords.txt")])
+    if "--to-image" in args:
+        command.extend(["--image-dir", str(workdir / "out")])
+    (workdir / "coords.txt").write_text("\n".join(locations) + "\n")
+
+    times = []
+    failures = 0
+    requests = 0
+    injected_errors = 0
+    for run in range(runs + 1):
+        mock.reset_counts()
+        started = time.perf_counter()
+        proc = subprocess.run(command, cwd=workdir, env=env, capture_output=True)
+        elapsed = time.perf_counter() - started
+        if run == 0:
+            continue
+        times.append(elapsed)
+        failures += proc.returncode != 0
+        requests += sum(mock.counts.values())
+        injected_errors += mock.errors
+
+    median = statistics.median(times)
+    return {
+        "args": args,
+        "locations": len(locations),
+        "runs": runs,
+        "failed_runs": failures,
+        "median_s": round(median, 4),
+        "mean_s": round(statistics.mean(times), 4),
+        "p95_s": round(percentile(times, 0.95), 4),
+        "min_s": round(min(times), 4),
+        "max_s": round(max(times), 4),
+        "locations_per_s": round(len(locations) / median, 2),
+        "requests_per_run": requests / runs,
+        "injected_errors_per_run": injected_errors / runs,
+    }
+
+
+def git_commit() -> str | None:
+    proc = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return proc.stdout.strip() or None
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    Returns a line for every scenario whose median got slower than the
+    baseline by more than max_regression (0.2 is 20%).
+    """
+    regressions = []
+    for name, result in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        change = result["median_s"] / before["median_s"] - 1
+        if change > max_regression:
+            regressions.append(
+                f"{name}: {before['median_s'] * 1000:.0f} ms -> "
+                f"{result['median_s'] * 1000:.0f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per scenario")
+    parser.add_argument(
+        "--locations", type=int, default=20, help="locations in a batch"
+    )
+    parser.add_argument("--latency-ms", type=float, default=30, help="mock API delay")
+    parser.add_argument(
+        "--jitter-ms", type=float, default=10, help="max random delay added"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0, help="share of failed requests"
+    )
+    parser.add_argument(
+        "--filter", default="", help="only run scenarios containing this"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="results file, defaults to benchmarks/results/<time>.json",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, help="results of an earlier run to compare to"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="slowdown of a median that fails the run, 0.2 is 20%%",
+    )
+    options = parser.parse_args()
+
+    locations = make_locations(options.locations)
+    scenarios = [s for s in SCENARIOS if options.filter in s[0]]
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "runs": options.runs,
+            "locations": options.locations,
+            "latency_ms": options.latency_ms,
+            "jitter_ms": options.jitter_ms,
+            "error_rate": options.error_rate,
+        },
+        "scenarios": {},
+    }
+
+    with (
+        tempfile.TemporaryDirectory() as tmp,
+        MockOpenWeather(
+            latency=options.latency_ms / 1000,
+            jitter=options.jitter_ms / 1000,
+            error_rate=options.error_rate,
+        ) as mock,
+    ):
+        workdir = Path(tmp)
+        make_backgrounds(workdir)
+        env = {
+            **os.environ,
+            "WEATHER_API_URL": mock.url,
+            "OPEN_WEATHER_MAP_API_KEY": "benchmark",
+            "WEATHER_CACHE_DIR": str(workdir / "cache"),
+            "WEATHER_BACKOFF": "0.01",
+            # Time the app, not the waits of the per minute budget
+            "WEATHER_MINUTE_BUDGET": "0",
+            "WEATHER_DAILY_BUDGET": "0",
+        }
+        for name, args, batched in scenarios:
+            result = run_scenario(
+                mock,
+                args,
+                locations if batched else locations[:1],
+                workdir,
+                env,
+                options.runs,
+            )
+            results["scenarios"][name] = result
+            failed = ""
+            if result["failed_runs"]:
+                failed = f"  {result['failed_runs']} failed"
+            print(
+                f"{name:<22} {result['median_s'] * 1000:8.1f} ms median "
+                f"{result['p95_s'] * 1000:8.1f} ms p95 "
+                f"{result['locations_per_s']:8.2f} loc/s{failed}"
+            )
+
+    output = options.output
+    if output is None:
+        RESULTS.mkdir(exist_ok=True)
+        output = RESULTS / f"{results['started_at'].replace(':', '-')}.json"
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results saved to {output}")
+
+    if options.baseline is not None:
+        regressions = compare(
+            results, json.loads(options.baseline.read_text()), options.max_regression
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
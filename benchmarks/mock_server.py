@@ -0,0 +1,181 @@
+"""
+Local stand-in for the OpenWeather endpoints the CLI calls.
+
+Serves the recorded payloads in benchmarks/fixtures for /data/3.0/onecall,
+/geo/1.0/direct and /geo/1.0/reverse, with a configurable delay before
+each response and a share of requests answered with an error instead.
+Point WEATHER_API_URL at it to run any command offline:
+
+    uv run benchmarks/mock_server.py --port 8765 --latency-ms 50
+    WEATHER_API_URL=http://127.0.0.1:8765 uv run main.py current 30.27,-97.74
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+# Sections of the One Call payload the exclude param can drop
+ONECALL_SECTIONS = ("current", "minutely", "hourly", "daily", "alerts")
+# Statuses sent by error injection, all of them retried by lib.client
+ERROR_STATUSES = (429, 500, 502, 503)
+
+
+class MockOpenWeather:
+    """
+    Threaded HTTP server answering like the OpenWeather API.
+
+    Every request waits latency seconds, plus up to jitter more, before it
+    is answered. error_rate is the share of requests answered with one of
+    ERROR_STATUSES, picked with a seeded random so runs are repeatable.
+    The One Call payload takes the lat/lon of each request, so a batch of
+    locations gets distinct responses.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        fixtures: Path = FIXTURES,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.onecall = json.loads((fixtures / "onecall.json").read_text())
+        self.bodies = {
+            "/geo/1.0/direct": (fixtures / "direct.json").read_bytes(),
+            "/geo/1.0/reverse": (fixtures / "reverse.json").read_bytes(),
+        }
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.errors = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, body = mock.respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def respond(self, path: str) -> tuple[int, bytes]:
+        url = urlparse(path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        with self._lock:
+            self.counts[url.path] = self.counts.get(url.path, 0) + 1
+            delay = self.latency + self._random.random() * self.jitter
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+                status = self._random.choice(ERROR_STATUSES)
+        time.sleep(delay)
+
+        if failed:
+            return status, b'{"cod":%d,"message":"injected error"}' % status
+        if url.path == "/data/3.0/onecall":
+            return 200, self.onecall_body(params)
+        if url.path in self.bodies:
+            return 200, self.bodies[url.path]
+        return 404, b'{"cod":404,"message":"Internal error"}'
+
+    def onecall_body(self, params: dict) -> bytes:
+        excluded = set(params.get("exclude", "").split(","))
+        payload = {
+            name: value
+            for name, value in self.onecall.items()
+            if name not in ONECALL_SECTIONS or name not in excluded
+        }
+        if "lat" in params and "lon" in params:
+            payload["lat"] = round(float(params["lat"]), 4)
+            payload["lon"] = round(float(params["lon"]), 4)
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {}
+            self.errors = 0
+
+    def start(self) -> "MockOpenWeather":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockOpenWeather":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="delay of every response"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0, help="max random delay added"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="share of requests answered with an error",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args()
+
+    mock = MockOpenWeather(
+        options.port,
+        options.latency_ms / 1000,
+        options.jitter_ms / 1000,
+        options.error_rate,
+        options.seed,
+    )
+    print(f"Serving fixtures on {mock.url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Cold start benchmark for the CLI.
+
+Runs main.py under `python -X importtime` for a few commands that never
+need Pillow, and fails (exit code 1) if any of them imports a module it
+shouldn't or if the total import time goes over the budget.
+
+    uv run benchmarks/startup.py
+    uv run benchmarks/startup.py --budget-ms 250 --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Point any network call at a closed port so the commands fail fast offline
+OFFLINE_ENV = {
+    "WEATHER_API_URL": "http://127.0.0.1:9",
+    "OPEN_WEATHER_MAP_API_KEY": "benchmark",
+    "WEATHER_MAX_RETRIES": "0",
+    "WEATHER_CACHE_DIR": str(ROOT / ".benchmark-cache"),
+}
+
+# (arguments, modules that must not be imported by them). The .env file is
+# loaded before every command since their settings can come from it.
+SCENARIOS = [
+    (["--help"], ["PIL", "requests", "dotenv", "lib.images", "lib.render"]),
+    (["current", "--help"], ["PIL", "requests", "lib.images"]),
+    (["current", "1,x"], ["PIL", "requests", "lib.render"]),
+    (["searchcity", "Austin,TX,US", "--no-cache"], ["PIL", "lib.images"]),
+    (["current", "30.27,-97.74", "--no-cache"], ["PIL", "lib.images"]),
+]
+
+
+def parse_importtime(stderr: str) -> tuple[float, set[str]]:
+    """
+    Returns the total import time in ms and every module imported.
+
+    Only top level imports (no indent in the module column) are added up
+    since their cumulative time already includes everything below them.
+    `site` is left out, it runs before main.py and depends on the install.
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # name keeps its indent after the single space that follows "|"
+        name = name[1:]
+        modules.add(name.strip())
+        if not name.startswith(" ") and name.strip() != "site":
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def run_scenario(args: list[str], runs: int) -> tuple[float, set[str]]:
+    env = {**os.environ, **OFFLINE_ENV}
+    times = []
+    modules = set()
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "main.py", *args],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        import_ms, modules = parse_importtime(proc.stderr)
+        times.append(import_ms)
+    return statistics.median(times), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.environ.get("STARTUP_BUDGET_MS", 300)),
+        help="max median import time in ms for any scenario",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="runs per scenario")
+    options = parser.parse_args()
+
+    failed = False
+    for args, forbidden in SCENARIOS:
+        import_ms, modules = run_scenario(args, options.runs)
+        leaked = [name for name in forbidden if name in modules]
+        status = "ok"
+        if leaked:
+            status = f"FAIL imported {', '.join(leaked)}"
+            failed = True
+        elif import_ms > options.budget_ms:
+            status = f"FAIL over budget of {options.budget_ms:.0f} ms"
+            failed = True
+        print(f"{import_ms:8.1f} ms  {' '.join(args):<40} {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
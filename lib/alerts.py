@@ -11,6 +11,25 @@ class WeatherAlert:
         self.end = end
         self.description = description
 
+    @classmethod
+    def from_api(cls, data: dict):
+        return cls(
+            data["sender_name"],
+            data["event"],
+            data["start"],
+            data["end"],
+            data["description"],
+        )
+
+    @classmethod
+    def list_from_api(cls, weather_data: dict) -> list["WeatherAlert"]:
+        """
+        Returns every alert in a One Call payload, or an empty list.
+        """
+        if "alerts" not in weather_data:
+            return []
+        return [cls.from_api(alert_data) for alert_data in weather_data["alerts"]]
+
     def get_sender(self):
         return self.sender_name
 
@@ -0,0 +1,214 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Seconds a cached response stays fresh for each endpoint. None never expires,
+# since the geocoding results for a place don't change.
+ENDPOINT_TTLS = {
+    "/data/3.0/onecall": 10 * 60,
+    "/geo/1.0/reverse": None,
+    "/geo/1.0/direct": None,
+}
+DEFAULT_TTL = 10 * 60
+DEFAULT_MAX_ENTRIES = 512
+# Seconds to wait for another process to release the cache file
+LOCK_TIMEOUT = 30.0
+
+
+def cache_dir() -> Path:
+    """
+    Folder used for anything the app keeps between runs.
+
+    WEATHER_CACHE_DIR wins, then $XDG_CACHE_HOME, then ~/.cache.
+    """
+    custom_dir = os.environ.get("WEATHER_CACHE_DIR", "")
+    if custom_dir != "":
+        return Path(custom_dir).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME", "") or os.path.join("~", ".cache")
+    return Path(base).expanduser() / "cli-weather-app"
+
+
+def make_key(url: str, params: dict) -> str:
+    """
+    Builds a stable key from the endpoint and its query params.
+
+    The api key is left out, lat/lon are normalized to 4 decimal places and
+    the exclude list is sorted so the same request always maps to one key.
+    """
+    parsed_url = urlparse(url)
+    parts = [parsed_url.netloc, parsed_url.path]
+    for name in sorted(params):
+        if name == "appid":
+            continue
+        value = params[name]
+        if name in ("lat", "lon"):
+            value = "{:.4f}".format(float(value))
+        elif name == "exclude":
+            value = ",".join(sorted(part for part in str(value).split(",") if part))
+        else:
+            value = str(value).strip().lower()
+        parts.append(f"{name}={value}")
+    return "|".join(parts)
+
+
+def endpoint_ttl(url: str) -> int | None:
+    return ENDPOINT_TTLS.get(urlparse(url).path, DEFAULT_TTL)
+
+
+class CachedResponse:
+    """
+    Stand-in for a requests.Response that was served from the cache.
+
+    Only a successful response is ever cached, so status_code is 200
+    unless the response was relayed by the daemon.
+    """
+
+    def __init__(self, body: str, status_code: int = 200):
+        self.status_code = status_code
+        self.text = body
+        # Decoded body, set by lib.fetch when asked to decode
+        self.data = None
+
+    @property
+    def content(self) -> bytes:
+        return self.text.encode()
+
+    def json(self):
+        from lib.decode import loads
+
+        return loads(self.text)
+
+
+class ResponseCache:
+    """
+    On-disk LRU cache of raw API response bodies backed by sqlite.
+    """
+
+    def __init__(self, path: Path | None = None, max_entries: int | None = None):
+        if path is None:
+            path = cache_dir() / "responses.sqlite3"
+        if max_entries is None:
+            max_entries = int(
+                os.environ.get("WEATHER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+            )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Wait on a lock held by another process (the daemon, a batch...)
+        # instead of failing the fetch with 'database is locked'
+        self._conn = sqlite3.connect(
+            path, timeout=LOCK_TIMEOUT, check_same_thread=False
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, url: str, params: dict, max_age: int | None = None) -> str | None:
+        """
+        Returns the cached body for the request or None if missing or stale.
+
+        max_age, in seconds, replaces the endpoint's default TTL when given.
+        """
+        key = make_key(url, params)
+        ttl = endpoint_ttl(url) if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            body, stored_at = row
+            if ttl is not None and now - stored_at > ttl:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return body
+
+    def set(self, url: str, params: dict, body: str):
+        key = make_key(url, params)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, body, now, now),
+            )
+            # Drop the least recently used entries once over the size cap
+            self._conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses
+                    ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+
+class MemoryCache:
+    """
+    In-memory LRU cache with the same get/set interface as ResponseCache.
+
+    Used by the long running daemon so warm responses never touch disk.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, url: str, params: dict, max_age: int | None = None) -> str | None:
+        key = make_key(url, params)
+        ttl = endpoint_ttl(url) if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, stored_at = entry
+            if ttl is not None and time.time() - stored_at > ttl:
+                return None
+            self._entries.move_to_end(key)
+        return body
+
+    def set(self, url: str, params: dict, body: str):
+        key = make_key(url, params)
+        with self._lock:
+            self._entries[key] = (body, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = None
+
+
+def get_cache() -> ResponseCache | None:
+    """
+    Returns the process wide response cache, opening it on first use.
+
+    If the cache can't be opened (read-only home, locked file...) this
+    returns None and requests simply go straight to the API.
+    """
+    global _cache
+    if _cache is None:
+        try:
+            _cache = ResponseCache()
+        except (OSError, sqlite3.Error):
+            return None
+    return _cache
@@ -0,0 +1,225 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from lib.timing import span, record
+from lib.quota import get_ledger
+
+# Statuses worth trying again, the API is rate limiting us or having a moment
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Never wait longer than this between two attempts, even if asked to
+MAX_BACKOFF = 60.0
+
+
+class ClientSettings:
+    """
+    Timeouts and retry settings for the shared HTTP client.
+
+    Defaults come from the WEATHER_CONNECT_TIMEOUT, WEATHER_READ_TIMEOUT,
+    WEATHER_MAX_RETRIES and WEATHER_BACKOFF env variables.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        max_retries: int | None = None,
+        backoff: float | None = None,
+    ):
+        if connect_timeout is None:
+            connect_timeout = float(os.environ.get("WEATHER_CONNECT_TIMEOUT", 5))
+        if read_timeout is None:
+            read_timeout = float(os.environ.get("WEATHER_READ_TIMEOUT", 15))
+        if max_retries is None:
+            max_retries = int(os.environ.get("WEATHER_MAX_RETRIES", 3))
+        if backoff is None:
+            backoff = float(os.environ.get("WEATHER_BACKOFF", 0.5))
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+
+class RateLimiter:
+    """
+    Token bucket that spaces out requests to each host.
+
+    rate is the number of requests per second allowed per host and burst is
+    how many can go out back to back before the limit kicks in.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def acquire(self, host: str):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated_at = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        # DNS lookup and TCP handshake of a new connection
+        with span("connect"):
+            super().connect()
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        # Same plus the TLS handshake
+        with span("connect"):
+            super().connect()
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose new connections show up as the connect phase of
+    --timings.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+_rate_limiter = None
+
+
+def set_rate_limit(rate: float | None):
+    """
+    Limits every host to rate requests per second. None removes the limit.
+    """
+    global _rate_limiter
+    _rate_limiter = None if rate is None else RateLimiter(rate)
+
+
+_settings = None
+_session = None
+_session_lock = threading.Lock()
+
+
+def configure(settings: ClientSettings):
+    global _settings
+    _settings = settings
+
+
+def get_settings() -> ClientSettings:
+    global _settings
+    if _settings is None:
+        _settings = ClientSettings()
+    return _settings
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process wide session, creating it on first use.
+
+    The session keeps connections alive so back to back calls to the same
+    host skip the TCP and TLS handshakes.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = TimedHTTPAdapter(pool_connections=4, pool_maxsize=32)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+
+def retry_after_seconds(res: requests.Response) -> float | None:
+    """
+    Reads the Retry-After header, which is either seconds or an HTTP date.
+    """
+    value = res.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, backoff: float) -> float:
+    # Exponential backoff with full jitter so parallel workers spread out
+    return random.uniform(0, min(MAX_BACKOFF, backoff * (2**attempt)))
+
+
+def get(url: str, params: dict | None = None) -> requests.Response:
+    """
+    Sends a GET request through the shared session.
+
+    429 and 5xx responses, connection errors and timeouts are retried with
+    exponential backoff, honouring Retry-After when the server sends it.
+    The last response is returned, or the last error raised, once retries
+    run out. Every attempt is taken out of the API budgets in lib.quota
+    first, which can wait for the per minute budget or raise QuotaExceeded.
+    """
+    settings = get_settings()
+    session = get_session()
+    timeout = (settings.connect_timeout, settings.read_timeout)
+    parsed_url = urlparse(url)
+    host = parsed_url.netloc
+    endpoint = parsed_url.path.rsplit("/", 1)[-1]
+    ledger = get_ledger()
+    attempt = 0
+    while True:
+        if _rate_limiter is not None:
+            _rate_limiter.acquire(host)
+        if ledger is not None:
+            ledger.acquire(url)
+        try:
+            with span(f"http {endpoint}"):
+                res = session.get(url, params=params, timeout=timeout)
+            # Time until the response headers came back, connect included
+            record(f"wait {endpoint}", res.elapsed.total_seconds())
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= settings.max_retries:
+                raise
+            time.sleep(backoff_delay(attempt, settings.backoff))
+            attempt += 1
+            continue
+
+        if res.status_code not in RETRY_STATUSES or attempt >= settings.max_retries:
+            return res
+
+        delay = retry_after_seconds(res)
+        if delay is None:
+            delay = backoff_delay(attempt, settings.backoff)
+        res.close()
+        time.sleep(min(delay, MAX_BACKOFF))
+        attempt += 1
@@ -1,3 +1,7 @@
+from array import array
+from typing import Iterable
+
+
 def kelvin_to_f(k_temp: float) -> str:
     result = (k_temp * 1.8) - 459.67
     return "{:.2f} F".format(result)
@@ -21,3 +25,28 @@ def wind_speed_to_mph(speed: float) -> str:
 def mm_to_in(mm_val: float) -> str:
     result = mm_val * 0.0393700787
     return "{:.2f} in".format(result)
+
+
+# Column versions of the converters above. They convert a whole column of
+# values in one pass and return plain numbers, formatting is left to the
+# caller so it only happens for the values that are displayed.
+
+
+def kelvin_to_f_column(values: Iterable[float]) -> array:
+    return array("d", [(k_temp * 1.8) - 459.67 for k_temp in values])
+
+
+def kelvin_to_c_column(values: Iterable[float]) -> array:
+    return array("d", [k_temp - 273.15 for k_temp in values])
+
+
+def wind_speed_to_kmph_column(values: Iterable[float]) -> array:
+    return array("d", [speed * 3.6 for speed in values])
+
+
+def wind_speed_to_mph_column(values: Iterable[float]) -> array:
+    return array("d", [speed * 2.2369362921 for speed in values])
+
+
+def mm_to_in_column(values: Iterable[float]) -> array:
+    return array("d", [mm_val * 0.0393700787 for mm_val in values])
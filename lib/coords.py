@@ -0,0 +1,97 @@
+import os
+import sys
+from decimal import Decimal, InvalidOperation
+
+# Grid points are snapped to by default, in degrees. 0.01 is about 1.1 km,
+# finer than the forecast models behind the API.
+DEFAULT_GRID = "0.01"
+
+
+class CoordsError(ValueError):
+    """
+    Raised when a coords value isn't formatted as '<lat>,<lon>'.
+    """
+
+
+def parse_coords(coords: str) -> tuple[str, str]:
+    """
+    Splits a '<lat>,<lon>' string into its lat and lon parts.
+
+    The parts are returned exactly as typed so the API gets the same values.
+    """
+    parsed_coords = [part.strip() for part in coords.split(",")]
+    if len(parsed_coords) != 2:
+        raise CoordsError(f"'{coords}' should be formatted as '<lat>,<lon>'")
+    try:
+        lat, lon = float(parsed_coords[0]), float(parsed_coords[1])
+    except ValueError:
+        raise CoordsError(f"'{coords}' should only contain numbers")
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        raise CoordsError(f"'{coords}' is outside of the valid lat/lon range")
+    return parsed_coords[0], parsed_coords[1]
+
+
+def coords_grid() -> Decimal:
+    """
+    Grid size in degrees from the WEATHER_COORDS_GRID env variable, or
+    DEFAULT_GRID. 0 turns snapping off.
+    """
+    value = os.environ.get("WEATHER_COORDS_GRID", "") or DEFAULT_GRID
+    try:
+        grid = Decimal(value)
+    except InvalidOperation:
+        grid = None
+    if grid is None or not grid.is_finite() or not 0 <= grid <= 1:
+        raise CoordsError(
+            f"WEATHER_COORDS_GRID '{value}' should be a number of degrees between 0 and 1"
+        )
+    return grid
+
+
+def snap(value: str, grid: Decimal) -> Decimal:
+    # Nearest multiple of grid
+    return (Decimal(value) / grid).to_integral_value() * grid
+
+
+def normalize_coords(coords: str, grid: Decimal | None = None) -> tuple[str, str]:
+    """
+    Parses '<lat>,<lon>' and snaps it to the closest point of a grid.
+
+    Every point in the same grid cell gives the same lat and lon strings,
+    written with as many decimals as the grid has, so nearby locations
+    share their cache entries and API calls. grid defaults to coords_grid().
+    With a grid of 0 the parts are returned as typed.
+    """
+    lat, lon = parse_coords(coords)
+    if grid is None:
+        grid = coords_grid()
+    if grid == 0:
+        return lat, lon
+    snapped_lat = min(Decimal(90), max(Decimal(-90), snap(lat, grid)))
+    snapped_lon = snap(lon, grid)
+    # 180 and -180 are the same meridian
+    if snapped_lon >= 180:
+        snapped_lon -= 360
+    elif snapped_lon < -180:
+        snapped_lon += 360
+    places = Decimal(1).scaleb(grid.normalize().as_tuple().exponent)
+    # + 0 turns -0.00 into 0.00
+    return (
+        str(snapped_lat.quantize(places) + 0),
+        str(snapped_lon.quantize(places) + 0),
+    )
+
+
+def read_coords_file(path: str) -> list[str]:
+    """
+    Reads one '<lat>,<lon>' per line from path, or from stdin when path is '-'.
+
+    Blank lines and lines starting with '#' are skipped.
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path) as file:
+            lines = file.read().splitlines()
+    stripped = (line.strip() for line in lines)
+    return [line for line in stripped if line and not line.startswith("#")]
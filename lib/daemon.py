@@ -0,0 +1,194 @@
+import heapq
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+from rich import print
+from lib.cache import cache_dir, CachedResponse, MemoryCache, ENDPOINT_TTLS
+
+# Longest a client waits on the daemon, it may be retrying the API itself
+CLIENT_TIMEOUT = 60.0
+SECONDS_PER_DAY = 24 * 60 * 60
+
+_client_enabled = True
+
+
+def socket_path() -> Path:
+    custom_path = os.environ.get("WEATHER_DAEMON_SOCKET", "")
+    if custom_path != "":
+        return Path(custom_path).expanduser()
+    return cache_dir() / "daemon.sock"
+
+
+def request(url: str, params: dict, max_age: int | None = None) -> CachedResponse | None:
+    """
+    Asks a running daemon for the response to a GET request.
+
+    Returns None when no daemon is listening or it couldn't answer, so the
+    caller can go to the API itself.
+    """
+    if not _client_enabled or not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path()
+    endpoint = urlparse(url).path
+    if endpoint not in ENDPOINT_TTLS or not path.exists():
+        return None
+
+    message = {
+        "path": endpoint,
+        "params": {name: value for name, value in params.items() if name != "appid"},
+        "max_age": max_age,
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(message).encode() + b"\n")
+            reply = sock.makefile("rb").readline()
+    except OSError:
+        return None
+    if not reply:
+        return None
+    try:
+        data = json.loads(reply)
+        if "error" in data:
+            return None
+        return CachedResponse(data["body"], data["status"])
+    except (ValueError, KeyError, TypeError):
+        # A reply cut short or from another version of the daemon
+        return None
+
+
+class WeatherDaemon:
+    """
+    Long running process that keeps API responses warm for the CLI.
+
+    It holds the HTTP pool and an in-memory cache, refreshes the One Call
+    data of a fixed list of locations on a schedule that stays within the
+    daily call budget, and answers requests from other commands over a
+    local Unix socket.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        locations: list[tuple[str, str]],
+        refresh: int,
+        daily_budget: int,
+        path: Path,
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.locations = locations
+        self.refresh = refresh
+        self.daily_budget = daily_budget
+        self.path = path
+        self.cache = MemoryCache(max_entries=max(512, len(locations) * 4))
+        self._stop = threading.Event()
+
+    def refresh_interval(self) -> float:
+        # Every refresh spends one One Call request per location
+        return max(self.refresh, len(self.locations) * SECONDS_PER_DAY / self.daily_budget)
+
+    def handle(self, message: dict) -> dict:
+        from lib.fetch import fetch
+
+        if message.get("path") not in ENDPOINT_TTLS:
+            return {"error": "unknown endpoint"}
+        url = f"{self.api_url}{message["path"]}"
+        params = {**message.get("params", {}), "appid": self.api_key}
+        res = fetch(url, params, cache=self.cache, max_age=message.get("max_age"))
+        return {"status": res.status_code, "body": res.text}
+
+    def refresh_location(self, lat: str, lon: str):
+        from lib.fetch import fetch
+
+        weather_params = {"appid": self.api_key, "lat": lat, "lon": lon}
+        geo_params = {"appid": self.api_key, "limit": 3, "lat": lat, "lon": lon}
+        # max_age=0 forces a fresh One Call payload, the location is only
+        # looked up the first time since it never expires
+        fetch(
+            f"{self.api_url}/data/3.0/onecall", weather_params, self.cache, max_age=0
+        )
+        fetch(f"{self.api_url}/geo/1.0/reverse", geo_params, self.cache)
+
+    def refresh_loop(self):
+        if len(self.locations) == 0:
+            return
+        interval = self.refresh_interval()
+        now = time.monotonic()
+        # Spread the first refreshes over one interval instead of a burst
+        schedule = [
+            (now + i * interval / len(self.locations), i)
+            for i in range(len(self.locations))
+        ]
+        heapq.heapify(schedule)
+        while not self._stop.is_set():
+            due, i = heapq.heappop(schedule)
+            if self._stop.wait(max(0.0, due - time.monotonic())):
+                return
+            lat, lon = self.locations[i]
+            try:
+                self.refresh_location(lat, lon)
+            except Exception as err:
+                print(f"[red]Refresh of {lat},{lon} failed:[/red] {err}")
+            heapq.heappush(schedule, (due + interval, i))
+
+    def _claim_socket(self):
+        # A leftover socket file from a crashed daemon is removed, but one
+        # that still accepts connections belongs to a running daemon.
+        if self.path.exists():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                try:
+                    sock.connect(str(self.path))
+                except OSError:
+                    self.path.unlink()
+                else:
+                    raise OSError(f"a daemon is already listening on {self.path}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def serve_forever(self):
+        import socketserver
+
+        global _client_enabled
+        # The daemon answers requests itself, it must never call itself
+        _client_enabled = False
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        reply = daemon.handle(json.loads(line))
+                    except Exception as err:
+                        reply = {"error": str(err)}
+                    self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+        self._claim_socket()
+        # The socket is created private to the user, a chmod once bound
+        # would leave it open to anyone for a moment
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(str(self.path), Handler)
+        finally:
+            os.umask(umask)
+        server.daemon_threads = True
+        # shutdown() blocks until serve_forever() returns, so it can't be
+        # called from the handler running on the serving thread
+        signal.signal(
+            signal.SIGTERM,
+            lambda *_: threading.Thread(target=server.shutdown).start(),
+        )
+        refresher = threading.Thread(target=self.refresh_loop, daemon=True)
+        refresher.start()
+        try:
+            server.serve_forever()
+        finally:
+            self._stop.set()
+            server.server_close()
+            self.path.unlink(missing_ok=True)
@@ -0,0 +1,151 @@
+import json
+import os
+from functools import lru_cache
+from typing import NotRequired, TypedDict
+from lib.timing import span
+
+# Fastest first. WEATHER_JSON_BACKEND picks one by name instead.
+BACKENDS = ("msgspec", "orjson", "json")
+
+# One Call schema, limited to the fields the records read. msgspec skips
+# everything else in the payload (minutely, pressure, uvi...) without
+# building objects for it. Ints stay ints so values print like they did
+# with the stdlib json module.
+Number = int | float
+
+
+class Condition(TypedDict):
+    id: int
+    main: str
+    description: str
+
+
+Precipitation = TypedDict("Precipitation", {"1h": Number})
+
+
+class PointItem(TypedDict):
+    # `current` and each `hourly` item
+    dt: int
+    temp: Number
+    feels_like: Number
+    humidity: int
+    wind_speed: Number
+    weather: list[Condition]
+    wind_gust: NotRequired[Number]
+    rain: NotRequired[Precipitation]
+    snow: NotRequired[Precipitation]
+    pop: NotRequired[Number]
+
+
+class DailyTemp(TypedDict):
+    min: Number
+    max: Number
+
+
+class DailyFeelsLike(TypedDict):
+    day: Number
+    night: Number
+    eve: Number
+    morn: Number
+
+
+class DailyItem(TypedDict):
+    dt: int
+    summary: str
+    temp: DailyTemp
+    feels_like: DailyFeelsLike
+    humidity: int
+    wind_speed: Number
+    pop: Number
+    weather: list[Condition]
+    wind_gust: NotRequired[Number]
+    rain: NotRequired[Number]
+    snow: NotRequired[Number]
+
+
+class Alert(TypedDict):
+    sender_name: str
+    event: str
+    start: int
+    end: int
+    description: str
+
+
+SECTION_TYPES = {
+    "current": PointItem,
+    "hourly": list[PointItem],
+    "daily": list[DailyItem],
+}
+
+
+@lru_cache(maxsize=1)
+def backend() -> str:
+    """
+    Name of the JSON library used to decode responses: the one set in the
+    WEATHER_JSON_BACKEND env variable, or the fastest one installed.
+    """
+    wanted = os.environ.get("WEATHER_JSON_BACKEND", "")
+    for name in (wanted,) if wanted != "" else BACKENDS:
+        if name == "json":
+            return name
+        try:
+            __import__(name)
+        except ImportError:
+            continue
+        return name
+    return "json"
+
+
+def loads(body: str | bytes):
+    """
+    Decodes any JSON response with the fastest backend available.
+    """
+    with span("decode"):
+        match backend():
+            case "msgspec":
+                import msgspec
+
+                return msgspec.json.decode(body)
+            case "orjson":
+                import orjson
+
+                return orjson.loads(body)
+        return json.loads(body)
+
+
+@lru_cache(maxsize=None)
+def _onecall_decoder(sections: tuple[str, ...]):
+    import msgspec
+
+    fields = {
+        "lat": Number,
+        "lon": Number,
+        "alerts": NotRequired[list[Alert]],
+    }
+    for section in sections:
+        fields[section] = NotRequired[SECTION_TYPES[section]]
+    return msgspec.json.Decoder(TypedDict("OneCallPayload", fields))
+
+
+def decode_onecall(body: str | bytes, exclude: str | None = None) -> dict:
+    """
+    Decodes a One Call payload into the same dicts json.loads gives, minus
+    the fields no view reads.
+
+    With msgspec the payload is parsed against the schema above and the
+    sections in exclude are skipped, which matters when a full payload from
+    the cache answers a request for one section. A payload that doesn't
+    match the schema is decoded in full instead, so a missing field fails
+    where it's used like it always did.
+    """
+    if backend() != "msgspec":
+        return loads(body)
+    import msgspec
+
+    excluded = set(exclude.split(",")) if exclude else set()
+    sections = tuple(s for s in SECTION_TYPES if s not in excluded)
+    with span("decode"):
+        try:
+            return _onecall_decoder(sections).decode(body)
+        except msgspec.ValidationError:
+            return msgspec.json.decode(body)
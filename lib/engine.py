@@ -0,0 +1,339 @@
+import re
+from typing import Iterator, Protocol, TYPE_CHECKING, runtime_checkable
+from lib.weatherrecord import WeatherRecord, DailyWeatherRecord, Units
+from lib.series import ForecastSeries
+from lib.alerts import WeatherAlert
+from lib.timing import span
+
+if TYPE_CHECKING:
+    from lib.forecaststore import ForecastStore
+
+# Sections of the One Call payload, in the order the API lists them
+SECTIONS = ("current", "minutely", "hourly", "daily")
+MAX_HOURS = 48
+MAX_DAYS = 8
+
+
+def get_location_names(geoloc_data: list) -> tuple[str, str, str]:
+    return (
+        geoloc_data[0]["name"],
+        geoloc_data[0]["state"],
+        geoloc_data[0]["country"],
+    )
+
+
+def location_fields(city: str, state: str, country: str, weather_data: dict) -> dict:
+    return {
+        "city": city,
+        "state": state,
+        "country": country,
+        "lat": weather_data["lat"],
+        "lon": weather_data["lon"],
+    }
+
+
+@runtime_checkable
+class View(Protocol):
+    """
+    One part of the One Call payload a command shows.
+
+    A view builds its data from the payload, and can either turn it into
+    rows for a --format writer or render it as rich tables.
+    """
+
+    # Section of the payload the view reads
+    section: str
+    # Kind of rows it produces, see lib.stream.FIELDS
+    kind: str
+
+    def build(self, weather_data: dict, units: Units): ...
+
+    def rows(self, data, location: dict) -> Iterator[dict]: ...
+
+    def render(self, data, city: str, state: str, country: str): ...
+
+
+@runtime_checkable
+class ForecastView(View, Protocol):
+    """
+    View of a forecast, made of items that each have their own dt. Only
+    these can show what changed since the last run.
+    """
+
+    def window(self, weather_data: dict) -> list[dict]:
+        """
+        Items of the section the view shows.
+        """
+        ...
+
+
+class CurrentView(View):
+    section = "current"
+    kind = "current"
+
+    def build(self, weather_data: dict, units: Units) -> WeatherRecord:
+        return WeatherRecord.from_api(weather_data["current"], units=units)
+
+    def rows(self, data: WeatherRecord, location: dict) -> Iterator[dict]:
+        from lib.stream import current_rows
+
+        return current_rows(data, location)
+
+    def render(self, data: WeatherRecord, city: str, state: str, country: str):
+        from lib.render import print_current
+
+        print_current(data, city, state, country)
+
+
+class HourlyView(ForecastView):
+    section = "hourly"
+    kind = "hourly"
+
+    def __init__(self, hours: int = 12):
+        self.hours = hours
+
+    def build(self, weather_data: dict, units: Units) -> ForecastSeries:
+        return ForecastSeries.from_api(
+            self.window(weather_data), units.temp, units.wind
+        )
+
+    def window(self, weather_data: dict) -> list[dict]:
+        return weather_data["hourly"][: self.hours]
+
+    def rows(self, data: ForecastSeries, location: dict) -> Iterator[dict]:
+        from lib.stream import hourly_rows
+
+        return hourly_rows(data, location)
+
+    def render(self, data: ForecastSeries, city: str, state: str, country: str):
+        from lib.render import print_hourly
+
+        print_hourly(data, city, state, country)
+
+
+class DailyView(ForecastView):
+    section = "daily"
+    kind = "daily"
+
+    def __init__(self, days: int = 8):
+        self.days = days
+
+    def build(self, weather_data: dict, units: Units) -> list[DailyWeatherRecord]:
+        return [
+            DailyWeatherRecord.from_api(data, units=units)
+            for data in self.window(weather_data)
+        ]
+
+    def window(self, weather_data: dict) -> list[dict]:
+        return weather_data["daily"][: self.days]
+
+    def rows(self, data: list[DailyWeatherRecord], location: dict) -> Iterator[dict]:
+        from lib.stream import daily_rows
+
+        return daily_rows(data, location)
+
+    def render(
+        self, data: list[DailyWeatherRecord], city: str, state: str, country: str
+    ):
+        from lib.render import print_daily
+
+        print_daily(data, city, state, country)
+
+
+def parse_view(name: str) -> View:
+    """
+    Parses a view name: 'current', '<N>hours' for 1 to 48 hours or
+    '<N>days' for 1 to 8 days. Raises ValueError for anything else.
+    """
+    if name == "current":
+        return CurrentView()
+    match = re.fullmatch(r"(\d+)(hours|days)", name)
+    if match is not None:
+        count = int(match.group(1))
+        if match.group(2) == "hours" and 1 <= count <= MAX_HOURS:
+            return HourlyView(count)
+        if match.group(2) == "days" and 1 <= count <= MAX_DAYS:
+            return DailyView(count)
+    raise ValueError(
+        f"'{name}' is not a view, use current, <1-{MAX_HOURS}>hours or <1-{MAX_DAYS}>days"
+    )
+
+
+def all_forecasts(views: list[View]) -> bool:
+    return all(isinstance(view, ForecastView) for view in views)
+
+
+def exclude_for(views: list[View]) -> str | None:
+    """
+    The exclude param of the One Call request for views.
+
+    A command showing several sections fetches the full payload instead,
+    which the response cache can then serve to every other command.
+    """
+    sections = {view.section for view in views}
+    if len(sections) > 1:
+        return None
+    return ",".join(section for section in SECTIONS if section not in sections)
+
+
+class Hook(Protocol):
+    """
+    Extra output for a view once its data is built, like an image export.
+
+    A hook that takes_stdout writes binary data there, so the engine keeps
+    the console output out of the way.
+    """
+
+    takes_stdout: bool
+
+    def __call__(self, view: View, data, location: dict): ...
+
+    def finish(self) -> bool: ...
+
+
+class ForecastEngine:
+    """
+    Turns the One Call payload of each location into output.
+
+    Commands pick the views to show and the engine runs the same stages for
+    every location: build each view's data, then write it as rows with the
+    --format writer or render it as rich tables followed by the alerts.
+    Hooks run after a view is rendered, and spacing adds an empty line
+    after each view.
+
+    With a store, only what changed since the last run of a location is
+    shown: new or revised forecast items, and new or expired alerts. Rows
+    and alerts written with a writer then carry what changed in a change
+    field. Alerts are only stored when the writer writes them, so a run
+    that leaves them out doesn't hide them from the next one. A store only
+    works with ForecastView views, ValueError is raised for others.
+    """
+
+    def __init__(
+        self,
+        views: list[View],
+        units: Units,
+        writer=None,
+        hooks: list[Hook] | None = None,
+        spacing: bool = False,
+        store: "ForecastStore | None" = None,
+    ):
+        if store is not None and not all_forecasts(views):
+            raise ValueError("only forecast views can show what changed")
+        self.views = views
+        self.units = units
+        self.writer = writer
+        self.hooks = hooks or []
+        self.spacing = spacing
+        self.store = store
+        # An image streamed to stdout can't be mixed with tables
+        self.quiet = any(hook.takes_stdout for hook in self.hooks)
+
+    @property
+    def exclude(self) -> str | None:
+        return exclude_for(self.views)
+
+    def changes(
+        self, weather_data: dict, location: dict, with_alerts: bool = True
+    ) -> tuple[dict, dict, list, list]:
+        """
+        Updates the store with the payload of a location. Returns the payload
+        with only the new or revised items in each view's section, the
+        change of each of those items ('new' or 'revised') by section, the
+        new alerts and the expired ones. The stored alerts are left alone
+        when with_alerts is False.
+        """
+        key = "{:.4f},{:.4f}".format(float(location["lat"]), float(location["lon"]))
+        changed_data = dict(weather_data)
+        item_changes = {}
+        new, expired = [], []
+        with span("store"):
+            for view in self.views:
+                changed = self.store.update_items(
+                    key, view.section, view.window(weather_data)
+                )
+                changed_data[view.section] = [item for item, _ in changed]
+                item_changes[view.section] = [change for _, change in changed]
+            if with_alerts:
+                new, expired = self.store.update_alerts(
+                    key, weather_data.get("alerts", [])
+                )
+        return (
+            changed_data,
+            item_changes,
+            [WeatherAlert.from_api(alert) for alert in new],
+            [WeatherAlert.from_api(alert) for alert in expired],
+        )
+
+    def process(self, weather_data: dict, geoloc_data: list):
+        city, state, country = get_location_names(geoloc_data)
+        location = location_fields(city, state, country, weather_data)
+        expired = []
+        if self.store is None:
+            alerts = WeatherAlert.list_from_api(weather_data)
+        else:
+            with_alerts = self.writer is None or self.writer.writes_alerts
+            weather_data, item_changes, alerts, expired = self.changes(
+                weather_data, location, with_alerts
+            )
+
+        if self.writer is not None:
+            from lib.stream import alert_row
+
+            # Rows of different views don't share columns, writers get one
+            view = self.views[0]
+            rows = []
+            if self.store is None or len(weather_data[view.section]) > 0:
+                with span(f"build {view.kind}"):
+                    data = view.build(weather_data, self.units)
+                rows = view.rows(data, location)
+                if self.store is not None:
+                    rows = (
+                        {**row, "change": change}
+                        for row, change in zip(rows, item_changes[view.section])
+                    )
+            alert_rows = [alert_row(alert, location) for alert in alerts]
+            if self.store is not None:
+                alert_rows = [{**row, "change": "new"} for row in alert_rows] + [
+                    {**alert_row(alert, location), "change": "expired"}
+                    for alert in expired
+                ]
+            with span("write"):
+                self.writer.write_rows(rows, alert_rows)
+            return
+
+        for view in self.views:
+            if self.store is not None and len(weather_data[view.section]) == 0:
+                if not self.quiet:
+                    from lib.render import print_no_changes
+
+                    print_no_changes(view.kind, city, state, country)
+                continue
+            with span(f"build {view.kind}"):
+                data = view.build(weather_data, self.units)
+            if not self.quiet:
+                with span(f"render {view.kind}"):
+                    view.render(data, city, state, country)
+            for hook in self.hooks:
+                hook(view, data, location)
+            if self.spacing and not self.quiet:
+                print()
+
+        if not self.quiet:
+            from lib.render import print_alerts, print_expired_alerts
+
+            with span("render alerts"):
+                print_alerts(alerts)
+                print_expired_alerts(expired)
+
+    def finish(self) -> bool:
+        """
+        Closes the writer and waits for the hooks. Returns False if any of
+        them failed.
+        """
+        if self.writer is not None:
+            self.writer.close()
+        ok = True
+        for hook in self.hooks:
+            ok = hook.finish() and ok
+        return ok
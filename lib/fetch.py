@@ -0,0 +1,177 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import requests
+from lib.cache import CachedResponse, ResponseCache, make_key
+from lib import client, daemon
+from lib.quota import get_ledger
+from lib.timing import span
+
+# Shared pool so independent API calls (One Call + reverse geocode) go out
+# at the same time instead of one after the other.
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="fetch")
+
+
+class FetchError(Exception):
+    """
+    Raised when a request fails or comes back with a non 200 status.
+
+    message is the rich formatted line to show the user and detail, when
+    set, is the underlying error printed after it.
+    """
+
+    def __init__(self, message: str, detail: Exception | None = None):
+        super().__init__(message)
+        self.message = message
+        self.detail = detail
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time.
+
+    A caller asking for a key that is already in flight waits for that call
+    and gets its result, or its exception, instead of making its own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key: str, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            with span("shared request"):
+                flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = call()
+        except Exception as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
+# Identical API calls in flight at the same time, from batch workers or
+# daemon clients, go out once
+_flights = SingleFlight()
+
+
+def _decoded(
+    res: requests.Response | CachedResponse, decode: Callable[[bytes], Any] | None
+) -> requests.Response | CachedResponse:
+    if decode is not None:
+        res.data = decode(res.content) if res.status_code == 200 else None
+    return res
+
+
+def _cached_body(
+    cache: ResponseCache, url: str, params: dict, max_age: int | None
+) -> str | None:
+    body = cache.get(url, params, max_age=max_age)
+    if body is None and "exclude" in params:
+        # A full payload (fetched by the report command) covers any
+        # request that only excludes some of its sections.
+        full_params = {k: v for k, v in params.items() if k != "exclude"}
+        body = cache.get(url, full_params, max_age=max_age)
+    return body
+
+
+def _get(
+    url: str,
+    params: dict,
+    cache: ResponseCache | None,
+    decode: Callable[[bytes], Any] | None,
+) -> requests.Response | CachedResponse:
+    res = client.get(url, params=params)
+    if cache is not None and res.status_code == 200:
+        cache.set(url, params, res.text)
+    return _decoded(res, decode)
+
+
+def fetch(
+    url: str,
+    params: dict,
+    cache: ResponseCache | None = None,
+    max_age: int | None = None,
+    decode: Callable[[bytes], Any] | None = None,
+) -> requests.Response | CachedResponse:
+    """
+    Sends a GET request, serving it from cache when a fresh copy exists.
+
+    The local cache is checked first, then a running daemon, then, when
+    the API budget is low, the cache again for a copy up to the stale max
+    age of lib.quota, and only then is the API called. Passing no cache
+    skips all of them. Concurrent calls for the same request (same key in
+    the cache) share one API call.
+
+    Only responses with a 200 status are written back to the cache. With
+    decode, the body of a 200 response is decoded once and kept as
+    res.data, shared by every caller of the API call, so decode must give
+    the same result for the same request.
+    """
+    if cache is not None:
+        with span("cache"):
+            body = _cached_body(cache, url, params, max_age)
+        if body is not None:
+            return _decoded(CachedResponse(body), decode)
+
+        # A running `serve` daemon keeps its own warm copy of most responses
+        with span("daemon"):
+            res = daemon.request(url, params, max_age=max_age)
+        if res is not None:
+            return _decoded(res, decode)
+
+        # Running low on API budget, an older copy beats spending a call.
+        # An explicit --max-age still asks for data at least that fresh.
+        ledger = get_ledger()
+        if max_age is None and ledger is not None and ledger.budget_is_low(url):
+            with span("cache"):
+                body = _cached_body(cache, url, params, ledger.settings.stale_max_age)
+            if body is not None:
+                return _decoded(CachedResponse(body), decode)
+
+    return _flights.do(
+        make_key(url, params), lambda: _get(url, params, cache, decode)
+    )
+
+
+def fetch_concurrently(
+    *calls: tuple[str, dict, Callable[[bytes], Any] | None],
+    cache: ResponseCache | None = None,
+    max_age: int | None = None,
+) -> list[requests.Response | CachedResponse]:
+    """
+    Sends every (url, params, decode) GET request in calls at the same time.
+
+    Responses are returned in the same order as calls. If a request raises,
+    the exception is re-raised here so callers keep their error handling.
+    """
+    futures = [
+        _executor.submit(
+            fetch, url, params, cache=cache, max_age=max_age, decode=decode
+        )
+        for url, params, decode in calls
+    ]
+    return [future.result() for future in futures]
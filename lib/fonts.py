@@ -0,0 +1,58 @@
+import os
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+
+
+def font_path() -> str | None:
+    """
+    TTF/OTF file used for images, from the WEATHER_FONT_PATH env variable.
+    None means Pillow's bundled default font.
+    """
+    custom_path = os.environ.get("WEATHER_FONT_PATH", "")
+    if custom_path != "":
+        return os.path.expanduser(custom_path)
+    return None
+
+
+@lru_cache(maxsize=None)
+def _load_font(path: str | None, size: int) -> ImageFont.FreeTypeFont:
+    if path is None:
+        return ImageFont.load_default(size)
+    return ImageFont.truetype(path, size)
+
+
+def get_font(size: int) -> ImageFont.FreeTypeFont:
+    """
+    Returns the image font at size, loaded once per process.
+
+    Passing font_size to ImageDraw.text loads the font again on every call.
+    """
+    return _load_font(font_path(), size)
+
+
+@lru_cache(maxsize=256)
+def _label_mask(
+    path: str | None, text: str, size: int, anchor: str
+) -> tuple[Image.Image, int, int]:
+    font = _load_font(path, size)
+    left, top, right, bottom = font.getbbox(text, anchor=anchor)
+    mask = Image.new("L", (right - left, bottom - top))
+    ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font, anchor=anchor)
+    return mask, left, top
+
+
+def draw_label(
+    draw: ImageDraw.ImageDraw,
+    xy: tuple[float, float],
+    text: str,
+    size: int,
+    anchor: str = "ms",
+):
+    """
+    Draws text that is the same on every image, like "Humidity".
+
+    The text is rasterized once into an alpha mask that is only composited
+    afterwards. xy and anchor work like ImageDraw.text.
+    """
+    mask, left, top = _label_mask(font_path(), text, size, anchor)
+    draw.bitmap((round(xy[0]) + left, round(xy[1]) + top), mask)
@@ -0,0 +1,145 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from lib.cache import cache_dir
+
+
+def _dumps(item: dict) -> str:
+    # Same item, same string, so comparing bodies compares values
+    return json.dumps(item, sort_keys=True, separators=(",", ":"))
+
+
+def alert_key(alert: dict) -> str:
+    # An alert keeps its sender, event and start when it's revised
+    return f"{alert['sender_name']}|{alert['event']}|{alert['start']}"
+
+
+class ForecastStore:
+    """
+    Last forecast seen for each location, to tell what changed since.
+
+    Hourly and daily items are kept one row per location, section and dt,
+    and alerts one row each, in a sqlite file next to the response cache.
+    The store is shared by every command run with --changes, so runs that
+    show the same section of a location see each other's updates.
+    """
+
+    def __init__(self, path: Path | None = None):
+        if path is None:
+            path = cache_dir() / "forecasts.sqlite3"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                location TEXT NOT NULL,
+                section TEXT NOT NULL,
+                dt INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                PRIMARY KEY (location, section, dt)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alerts (
+                location TEXT NOT NULL,
+                key TEXT NOT NULL,
+                body TEXT NOT NULL,
+                PRIMARY KEY (location, key)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def update_items(
+        self, location: str, section: str, items: list[dict]
+    ) -> list[tuple[dict, str]]:
+        """
+        Saves the items of a section and returns the ones that changed since
+        the last update, in their order, each with 'new' if it wasn't stored
+        yet or 'revised' if it was stored with other values.
+
+        Only changed items are written. Stored items older than the first
+        one are dropped since they're in the past, and items after the last
+        one are kept for runs showing a longer forecast.
+        """
+        with self._lock:
+            stored = dict(
+                self._conn.execute(
+                    "SELECT dt, body FROM items WHERE location = ? AND section = ?",
+                    (location, section),
+                )
+            )
+            changed = []
+            rows = []
+            for item in items:
+                body = _dumps(item)
+                stored_body = stored.get(item["dt"])
+                if stored_body != body:
+                    change = "new" if stored_body is None else "revised"
+                    changed.append((item, change))
+                    rows.append((location, section, item["dt"], body))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)", rows
+            )
+            if len(items) > 0:
+                self._conn.execute(
+                    "DELETE FROM items WHERE location = ? AND section = ? AND dt < ?",
+                    (location, section, items[0]["dt"]),
+                )
+            self._conn.commit()
+        return changed
+
+    def update_alerts(
+        self, location: str, alerts: list[dict]
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Saves the alerts of a location and returns (new, expired).
+
+        new holds the alerts not seen before or revised since, expired the
+        ones seen before that the API doesn't send anymore.
+        """
+        bodies = {alert_key(alert): (alert, _dumps(alert)) for alert in alerts}
+        with self._lock:
+            stored = dict(
+                self._conn.execute(
+                    "SELECT key, body FROM alerts WHERE location = ?", (location,)
+                )
+            )
+            new = {
+                key: body
+                for key, (alert, body) in bodies.items()
+                if stored.get(key) != body
+            }
+            expired = [key for key in stored if key not in bodies]
+            self._conn.executemany(
+                "DELETE FROM alerts WHERE location = ? AND key = ?",
+                [(location, key) for key in expired],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO alerts VALUES (?, ?, ?)",
+                [(location, key, body) for key, body in new.items()],
+            )
+            self._conn.commit()
+        new_alerts = [bodies[key][0] for key in new]
+        return new_alerts, [json.loads(stored[key]) for key in expired]
+
+
+_store = None
+
+
+def get_store() -> ForecastStore | None:
+    """
+    Returns the process wide forecast store, opening it on first use, or
+    None if it can't be opened.
+    """
+    global _store
+    if _store is None:
+        try:
+            _store = ForecastStore()
+        except (OSError, sqlite3.Error):
+            return None
+    return _store
@@ -0,0 +1,295 @@
+import math
+import os
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from lib.cache import cache_dir
+
+# Size in degrees of a cell in the spatial grid used for reverse lookups
+GRID_SIZE = 1.0
+# Stop looking for a nearby place after this many rings of cells
+MAX_RINGS = 30
+EARTH_RADIUS_KM = 6371.0
+# Stored as the user_version of the sqlite file, older files are ignored
+INDEX_VERSION = 2
+# Columns of a place, in the order of the tuples given to Gazetteer.build
+PLACE_COLUMNS = "name, state, state_code, country, lat, lon, population"
+
+
+def gazetteer_path() -> Path:
+    custom_path = os.environ.get("WEATHER_GAZETTEER", "")
+    if custom_path != "":
+        return Path(custom_path).expanduser()
+    return cache_dir() / "gazetteer.sqlite3"
+
+
+def normalize_name(name: str) -> str:
+    # "São Paulo " -> "sao paulo"
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip().lower()
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def grid_cell(lat: float, lon: float) -> tuple[int, int]:
+    return (math.floor(lat / GRID_SIZE), math.floor((lon % 360) / GRID_SIZE))
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def read_geonames(
+    dump_path: str,
+    admin1_path: str | None = None,
+    min_population: int = 0,
+) -> list[tuple]:
+    """
+    Reads the populated places of a GeoNames dump like cities1000.txt as
+    (name, state, state_code, country, lat, lon, population) tuples.
+
+    admin1_path is the optional admin1CodesASCII.txt file used to turn
+    state codes into names ("US.TX" -> "Texas") like the API returns.
+    """
+    state_names = {}
+    if admin1_path is not None:
+        with open(admin1_path, encoding="utf-8") as file:
+            for line in file:
+                columns = line.rstrip("\n").split("\t")
+                if len(columns) >= 2:
+                    state_names[columns[0]] = columns[1]
+
+    places = []
+    with open(dump_path, encoding="utf-8") as file:
+        for line in file:
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) < 15 or columns[6] != "P":
+                continue
+            population = int(columns[14] or 0)
+            if population < min_population:
+                continue
+            country, state_code = columns[8], columns[10]
+            places.append(
+                (
+                    columns[1],
+                    state_names.get(f"{country}.{state_code}", state_code),
+                    state_code,
+                    country,
+                    float(columns[4]),
+                    float(columns[5]),
+                    population,
+                )
+            )
+    return places
+
+
+class Gazetteer:
+    """
+    Offline index of populated places for name search and reverse lookup,
+    stored in a sqlite file.
+
+    Names are searched by prefix over an indexed key column with a table
+    of trigrams as a fuzzy fallback, and reverse lookups walk a grid of
+    GRID_SIZE degree cells outwards from the point. Opening the file reads
+    nothing, each lookup only loads the rows it needs.
+
+    Raises sqlite3.Error if path isn't a gazetteer, and ValueError if it
+    was built by another version of the app.
+    """
+
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+        try:
+            (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+            if version != INDEX_VERSION:
+                raise ValueError(f"{path} is a gazetteer of version {version}")
+        except (sqlite3.Error, ValueError):
+            self._conn.close()
+            raise
+
+    @classmethod
+    def build(cls, places: list[tuple], path: Path) -> "Gazetteer":
+        """
+        Writes places, as returned by read_geonames, to a new index at path
+        and opens it. The file is only replaced once complete, so running
+        commands never see half an index.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        building_path = path.with_name(f"{path.name}.building")
+        building_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(building_path)
+        try:
+            conn.executescript(
+                """
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE places (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    state_code TEXT NOT NULL,
+                    country TEXT NOT NULL,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    population INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    cell_lat INTEGER NOT NULL,
+                    cell_lon INTEGER NOT NULL
+                );
+                CREATE TABLE trigrams (
+                    trigram TEXT NOT NULL,
+                    place INTEGER NOT NULL,
+                    PRIMARY KEY (trigram, place)
+                ) WITHOUT ROWID;
+                """
+            )
+            for idx, place in enumerate(places):
+                key = normalize_name(place[0])
+                conn.execute(
+                    "INSERT INTO places VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (idx, *place, key, *grid_cell(place[4], place[5])),
+                )
+                conn.executemany(
+                    "INSERT INTO trigrams VALUES (?, ?)",
+                    ((trigram, idx) for trigram in trigrams(key)),
+                )
+            conn.executescript(
+                f"""
+                CREATE INDEX places_key ON places (key);
+                CREATE INDEX places_cell ON places (cell_lat, cell_lon);
+                PRAGMA user_version = {INDEX_VERSION};
+                """
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(building_path, path)
+        return cls(path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+
+    def _places(self, where: str, params: tuple) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT id, {PLACE_COLUMNS} FROM places WHERE {where}", params
+            ).fetchall()
+
+    def _as_api_item(self, place: tuple) -> dict:
+        # Same shape as the items returned by the geocoding API
+        _, name, state, _, country, lat, lon, _ = place
+        return {"name": name, "state": state, "country": country, "lat": lat, "lon": lon}
+
+    def search(self, query: str, limit: int = 5) -> list[dict]:
+        """
+        Finds places matching '<city name>,<state code>,<country code>'.
+
+        State and country are optional. Exact name matches come first, then
+        the most populated places.
+        """
+        parts = [normalize_name(part) for part in query.split(",")]
+        name = parts[0]
+        state = parts[1] if len(parts) > 2 else None
+        country = parts[-1] if len(parts) > 1 else None
+        if name == "":
+            return []
+
+        # Every key starting with name sorts between these two
+        matches = self._places("key >= ? AND key < ?", (name, name + "\U0010ffff"))
+        if len(matches) == 0:
+            matches = self._fuzzy_matches(name)
+
+        def wanted(place: tuple) -> bool:
+            _, _, state_name, state_code, place_country, _, _, _ = place
+            if country is not None and place_country.lower() != country:
+                # "Austin,TX" is a state, not a country
+                if state is not None or state_code.lower() != country:
+                    return False
+            if state is not None and state not in (
+                state_code.lower(),
+                normalize_name(state_name),
+            ):
+                return False
+            return True
+
+        matches = [place for place in matches if wanted(place)]
+        matches.sort(
+            key=lambda place: (normalize_name(place[1]) != name, -place[7], place[0])
+        )
+        return [self._as_api_item(place) for place in matches[:limit]]
+
+    def _fuzzy_matches(self, name: str) -> list[tuple]:
+        # Places sharing at least half of the query's trigrams
+        query_trigrams = sorted(trigrams(name))
+        marks = ", ".join("?" * len(query_trigrams))
+        return self._places(
+            f"""
+            id IN (
+                SELECT place FROM trigrams WHERE trigram IN ({marks})
+                GROUP BY place HAVING COUNT(*) >= ?
+            )
+            """,
+            (*query_trigrams, len(query_trigrams) / 2),
+        )
+
+    def reverse(self, lat: float, lon: float, limit: int = 1) -> list[dict]:
+        """
+        Finds the places nearest to lat/lon, closest first.
+
+        Returns an empty list if nothing is within MAX_RINGS cells.
+        """
+        center_lat, center_lon = grid_cell(lat, lon)
+        lon_cells = round(360 / GRID_SIZE)
+        candidates = []
+        found_at = None
+        for ring in range(MAX_RINGS + 1):
+            for d_lat in range(-ring, ring + 1):
+                for d_lon in range(-ring, ring + 1):
+                    if max(abs(d_lat), abs(d_lon)) != ring:
+                        continue
+                    cell = (center_lat + d_lat, (center_lon + d_lon) % lon_cells)
+                    for place in self._places("cell_lat = ? AND cell_lon = ?", cell):
+                        distance = distance_km(lat, lon, place[5], place[6])
+                        candidates.append((distance, place))
+            if found_at is None and len(candidates) >= limit:
+                found_at = ring
+            # One more ring catches places just over a cell edge
+            if found_at is not None and ring > found_at:
+                break
+        candidates.sort()
+        return [self._as_api_item(place) for _, place in candidates[:limit]]
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer | None:
+    """
+    Opens the offline index once per process. Returns None if it hasn't
+    been built, in which case lookups go to the geocoding API.
+    """
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            path = gazetteer_path()
+            if not path.exists():
+                return None
+            try:
+                _gazetteer = Gazetteer(path)
+            except (sqlite3.Error, ValueError):
+                return None
+    return _gazetteer
@@ -1,185 +1,707 @@
 from lib.weatherrecord import WeatherRecord, WeatherType
+from lib.cache import cache_dir
+from lib.fonts import draw_label, get_font
+from lib.timing import span, record as record_timing
 from pathlib import Path
 import os
-from PIL import Image, ImageOps, ImageDraw
+import io
+import math
+import sys
+import threading
+import time
+from PIL import Image, ImageOps, ImageDraw, features
 from rich import print
 
+BACKGROUND_SIZE = (800, 800)
+BACKGROUND_FILES = {
+    WeatherType.ATMOSPHERE: Path("images", "atmosphere.jpg"),
+    WeatherType.CLEAR: Path("images", "clear.jpg"),
+    WeatherType.CLOUDS: Path("images", "clouds.jpg"),
+    WeatherType.DRIZZLE: Path("images", "drizzle.jpg"),
+    WeatherType.RAIN: Path("images", "rain.jpg"),
+    WeatherType.SNOW: Path("images", "snow.jpg"),
+    WeatherType.THUNDERSTORM: Path("images", "thunderstorm.jpg"),
+}
 
-def current_to_image(record: WeatherRecord, city: str, state: str, country: str):
-    expected_files = {
-        "atmosphere": Path(os.path.join("images", "atmosphere.jpg")),
-        "clear": Path(os.path.join("images", "clear.jpg")),
-        "clouds": Path(os.path.join("images", "clouds.jpg")),
-        "drizzle": Path(os.path.join("images", "drizzle.jpg")),
-        "rain": Path(os.path.join("images", "rain.jpg")),
-        "snow": Path(os.path.join("images", "snow.jpg")),
-        "thunderstorm": Path(os.path.join("images", "thunderstorm.jpg")),
-    }
-    for file in expected_files:
-        if not os.path.exists(expected_files[file]):
-            print(
-                f"[bold red]Error: {file} does not exist. Please ensure it exists to continue[/bold red]"
+
+# Pillow format name and file extension of each output format
+IMAGE_FORMATS = {
+    "jpeg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+    "png": ("PNG", ".png"),
+    "avif": ("AVIF", ".avif"),
+    "gif": ("GIF", ".gif"),
+}
+# Formats Pillow can save with several frames
+ANIMATED_FORMATS = ("webp", "png", "avif", "gif")
+SUBSAMPLINGS = ("4:4:4", "4:2:2", "4:2:0")
+
+
+def available_formats() -> list[str]:
+    # WebP and AVIF depend on how Pillow was built
+    formats = []
+    for name in IMAGE_FORMATS:
+        try:
+            if name in ("jpeg", "png", "gif") or features.check(name):
+                formats.append(name)
+        except ValueError:
+            pass
+    return formats
+
+
+class ImageOptions:
+    """
+    Where exported images go and how they're encoded.
+
+    directory "-" streams the encoded image to stdout instead of saving it.
+    quality applies to JPEG, WebP and AVIF, subsampling to JPEG and AVIF,
+    progressive to JPEG and optimize to JPEG and PNG. Options left unset
+    keep Pillow's defaults.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        image_format: str = "jpeg",
+        quality: int | None = None,
+        subsampling: str | None = None,
+        optimize: bool = False,
+        progressive: bool = False,
+    ):
+        image_format = image_format.lower()
+        if image_format == "jpg":
+            image_format = "jpeg"
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(
+                f"--image-format must be one of {", ".join(IMAGE_FORMATS)}"
             )
-            return
-    bg_path = None
-
-    match (record.get_weather_category()):
-        case WeatherType.THUNDERSTORM:
-            bg_path = expected_files["thunderstorm"]
-        case WeatherType.DRIZZLE:
-            bg_path = expected_files["drizzle"]
-        case WeatherType.RAIN:
-            bg_path = expected_files["rain"]
-        case WeatherType.SNOW:
-            bg_path = expected_files["snow"]
-        case WeatherType.ATMOSPHERE:
-            bg_path = expected_files["atmosphere"]
-        case WeatherType.CLEAR:
-            bg_path = expected_files["clear"]
-        case WeatherType.CLOUDS:
-            bg_path = expected_files["clouds"]
-        case _:
-            bg_path = expected_files["clear"]
+        if image_format not in available_formats():
+            raise ValueError(f"this Pillow build can't write {image_format}")
+        if quality is not None and not 1 <= quality <= 100:
+            raise ValueError("--quality must be between 1 and 100")
+        if subsampling is not None and subsampling not in SUBSAMPLINGS:
+            raise ValueError(f"--subsampling must be one of {", ".join(SUBSAMPLINGS)}")
+        if directory is None:
+            directory = os.path.join("~", "Downloads")
+        self.directory = directory
+        self.image_format = image_format
+        self.quality = quality
+        self.subsampling = subsampling
+        self.optimize = optimize
+        self.progressive = progressive
+
+    @property
+    def to_stdout(self) -> bool:
+        return self.directory == "-"
+
+    @property
+    def extension(self) -> str:
+        return IMAGE_FORMATS[self.image_format][1]
+
+    def save_kwargs(self) -> dict:
+        """
+        Arguments for Image.save(), only the ones the format understands.
+        """
+        kwargs = {"format": IMAGE_FORMATS[self.image_format][0]}
+        if self.quality is not None and self.image_format in ("jpeg", "webp", "avif"):
+            kwargs["quality"] = self.quality
+        if self.subsampling is not None and self.image_format in ("jpeg", "avif"):
+            kwargs["subsampling"] = self.subsampling
+        if self.optimize and self.image_format in ("jpeg", "png"):
+            kwargs["optimize"] = True
+        if self.progressive and self.image_format == "jpeg":
+            kwargs["progressive"] = True
+        return kwargs
+
 
+class MissingBackgroundError(Exception):
+    """
+    Raised when one of the background images doesn't exist.
+    """
+
+    def __init__(self, category: WeatherType):
+        super().__init__(category.value)
+        self.category = category
+
+
+_backgrounds = {}
+_background_mtimes = None
+_backgrounds_lock = threading.Lock()
+
+
+def background_cache_dir() -> Path:
+    return cache_dir() / "backgrounds"
+
+
+def _get_background_mtimes() -> dict[WeatherType, int]:
+    """
+    Stats every background once per process.
+
+    Raises MissingBackgroundError for the first missing file.
+    """
+    global _background_mtimes
+    if _background_mtimes is None:
+        mtimes = {}
+        for category, path in BACKGROUND_FILES.items():
+            try:
+                mtimes[category] = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                raise MissingBackgroundError(category)
+        _background_mtimes = mtimes
+    return _background_mtimes
+
+
+def _load_background(category: WeatherType, mtime: int) -> Image.Image:
+    # Fitted pixels are stored raw, reading them back is much cheaper than
+    # decoding the JPEG and resizing it again
+    width, height = BACKGROUND_SIZE
+    folder = background_cache_dir()
+    cached_path = folder / f"{category.value}-{mtime}-{width}x{height}.bitmap"
     try:
-        with Image.open(bg_path) as im:
-            new_size = (800, 800)
-            new_im = ImageOps.fit(im, new_size)
-            draw = ImageDraw.Draw(new_im)
-            draw.text(
-                (new_size[0] * 0.5, new_size[1] * 0.15875),
-                record.get_datetime("current"),
-                anchor="ms",
-                font_size=32,
-            )
-            draw.text(
-                (new_size[0] * 0.5, new_size[1] * 0.235),
-                f"{city}, {state}, {country}",
-                anchor="ms",
-                font_size=43,
-            )
-            draw.text(
-                (new_size[0] * 0.5, new_size[1] * 0.2925),
-                record.get_weather_condition(),
-                anchor="ms",
-                font_size=24,
-            )
-            draw.text(
-                (new_size[0] * 0.5, new_size[1] * 0.5),
-                record.get_temp(),
-                anchor="ms",
-                font_size=135,
-            )
+        mode, _, pixels = cached_path.read_bytes().partition(b"\n")
+        return Image.frombytes(mode.decode(), BACKGROUND_SIZE, pixels)
+    except (OSError, ValueError):
+        pass
 
-            # Humidity
-            draw.text(
-                (new_size[0] * 0.22375, new_size[1] * 0.7),
-                "Humidity",
-                anchor="ms",
-                font_size=24,
-            )
-            draw.text(
-                (new_size[0] * 0.22375, new_size[1] * 0.755),
-                record.get_humidity(),
-                anchor="ms",
-                font_size=43,
-            )
-            # Feels Like
-            draw.text(
-                (new_size[0] * 0.4425, new_size[1] * 0.7),
-                "Feels Like",
-                anchor="ms",
-                font_size=24,
-            )
-            draw.text(
-                (new_size[0] * 0.4425, new_size[1] * 0.755),
-                record.get_feels_like(),
-                anchor="ms",
-                font_size=43,
-            )
-            # Wind Speed
-            draw.text(
-                (new_size[0] * 0.71875, new_size[1] * 0.7),
-                "Wind Speed",
-                anchor="ms",
-                font_size=24,
+    with Image.open(BACKGROUND_FILES[category]) as im:
+        background = ImageOps.fit(im, BACKGROUND_SIZE)
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        for stale_path in folder.glob(f"{category.value}-*.bitmap"):
+            stale_path.unlink(missing_ok=True)
+        tmp_path = cached_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(background.mode.encode() + b"\n" + background.tobytes())
+        os.replace(tmp_path, cached_path)
+    except OSError:
+        # Only the in-memory copy then, the next run fits it again
+        pass
+    return background
+
+
+def get_background(category: WeatherType) -> Image.Image:
+    """
+    Returns the background of a weather category fitted to BACKGROUND_SIZE.
+
+    The fitted image is kept in memory and on disk next to the response
+    cache, keyed by the source file's mtime, so a JPEG is only decoded and
+    resized again after it changes. Draw on a copy, never on the result.
+    """
+    with _backgrounds_lock:
+        background = _backgrounds.get(category)
+        if background is None:
+            mtime = _get_background_mtimes()[category]
+            background = _backgrounds[category] = _load_background(category, mtime)
+    return background
+
+
+def check_backgrounds():
+    """
+    Raises MissingBackgroundError if any background image doesn't exist.
+    """
+    with _backgrounds_lock:
+        _get_background_mtimes()
+
+
+def render_current_image(
+    record: WeatherRecord, city: str, state: str, country: str
+) -> Image.Image:
+    """
+    Draws the current weather card on a copy of its background.
+    """
+    new_im = get_background(record.get_weather_category()).copy()
+    new_size = BACKGROUND_SIZE
+    draw = ImageDraw.Draw(new_im)
+    draw.text(
+        (new_size[0] * 0.5, new_size[1] * 0.15875),
+        record.get_datetime("current"),
+        anchor="ms",
+        font=get_font(32),
+    )
+    draw.text(
+        (new_size[0] * 0.5, new_size[1] * 0.235),
+        f"{city}, {state}, {country}",
+        anchor="ms",
+        font=get_font(43),
+    )
+    draw.text(
+        (new_size[0] * 0.5, new_size[1] * 0.2925),
+        record.get_weather_condition(),
+        anchor="ms",
+        font=get_font(24),
+    )
+    draw.text(
+        (new_size[0] * 0.5, new_size[1] * 0.5),
+        record.get_temp(),
+        anchor="ms",
+        font=get_font(135),
+    )
+
+    # Humidity
+    draw_label(
+        draw,
+        (new_size[0] * 0.22375, new_size[1] * 0.7),
+        "Humidity",
+        24,
+    )
+    draw.text(
+        (new_size[0] * 0.22375, new_size[1] * 0.755),
+        record.get_humidity(),
+        anchor="ms",
+        font=get_font(43),
+    )
+    # Feels Like
+    draw_label(
+        draw,
+        (new_size[0] * 0.4425, new_size[1] * 0.7),
+        "Feels Like",
+        24,
+    )
+    draw.text(
+        (new_size[0] * 0.4425, new_size[1] * 0.755),
+        record.get_feels_like(),
+        anchor="ms",
+        font=get_font(43),
+    )
+    # Wind Speed
+    draw_label(
+        draw,
+        (new_size[0] * 0.71875, new_size[1] * 0.7),
+        "Wind Speed",
+        24,
+    )
+    draw.text(
+        (new_size[0] * 0.71875, new_size[1] * 0.755),
+        record.get_wind_speed(),
+        anchor="ms",
+        font=get_font(43),
+    )
+
+    # Rain and snow display
+
+    if record.has_rain() and record.has_snow():
+        draw_label(
+            draw,
+            (new_size[0] * 0.39125, new_size[1] * 0.84125),
+            "Rain",
+            24,
+        )
+        draw.text(
+            (new_size[0] * 0.39125, new_size[1] * 0.8975),
+            record.get_rain(),
+            anchor="ms",
+            font=get_font(43),
+        )
+        draw_label(
+            draw,
+            (new_size[0] * 0.6125, new_size[1] * 0.84125),
+            "Snow",
+            24,
+        )
+        draw.text(
+            (new_size[0] * 0.6125, new_size[1] * 0.8975),
+            record.get_snow(),
+            anchor="ms",
+            font=get_font(43),
+        )
+    elif record.has_rain():
+        draw_label(
+            draw,
+            (new_size[0] * 0.5, new_size[1] * 0.84125),
+            "Rain",
+            24,
+        )
+        draw.text(
+            (new_size[0] * 0.5, new_size[1] * 0.8975),
+            record.get_rain(),
+            anchor="ms",
+            font=get_font(43),
+        )
+    elif record.has_snow():
+        draw_label(
+            draw,
+            (new_size[0] * 0.5, new_size[1] * 0.84125),
+            "Snow",
+            24,
+        )
+        draw.text(
+            (new_size[0] * 0.5, new_size[1] * 0.8975),
+            record.get_snow(),
+            anchor="ms",
+            font=get_font(43),
+        )
+
+    # Credit text
+    draw_label(
+        draw,
+        (new_size[0] * 0.5, new_size[1] * 0.95),
+        "Weather data provided from openweathermap.org",
+        12,
+    )
+    return new_im
+
+
+def image_path(
+    record: WeatherRecord,
+    city: str,
+    options: ImageOptions,
+    lat: float | None = None,
+    lon: float | None = None,
+    label: str | None = None,
+) -> Path:
+    """
+    Path of the exported image in the output directory.
+
+    Batch exports pass lat/lon so two places with the same name don't
+    overwrite each other, label tells apart other kinds of images.
+    """
+    name = city.replace(os.sep, "_")
+    if lat is not None and lon is not None:
+        name = f"{name}-{lat:.4f}_{lon:.4f}"
+    if label is not None:
+        name = f"{name}-{label}"
+    return Path(
+        os.path.expanduser(
+            os.path.join(
+                options.directory,
+                f"{name}-{record.get_datetime("filename")}{options.extension}",
             )
-            draw.text(
-                (new_size[0] * 0.71875, new_size[1] * 0.755),
-                record.get_wind_speed(),
-                anchor="ms",
-                font_size=43,
+        )
+    )
+
+
+def encode_image(
+    im: Image.Image,
+    options: ImageOptions,
+    frames: list[Image.Image] | None = None,
+    frame_ms: int = 500,
+) -> bytes:
+    """
+    Encodes an image in memory, for callers that upload it rather than
+    keep a file. Every export goes through here.
+
+    Extra frames are appended after im as an animation that loops forever.
+    """
+    kwargs = options.save_kwargs()
+    if frames:
+        kwargs.update(save_all=True, append_images=frames, duration=frame_ms, loop=0)
+    buffer = io.BytesIO()
+    im.save(buffer, **kwargs)
+    return buffer.getvalue()
+
+
+def save_image(
+    im: Image.Image,
+    path: Path,
+    options: ImageOptions,
+    frames: list[Image.Image] | None = None,
+    frame_ms: int = 500,
+):
+    """
+    Saves im, with frames as an animation, to path, or streams it to
+    stdout if options.to_stdout.
+    """
+    with span("image encode"):
+        data = encode_image(im, options, frames, frame_ms)
+    if options.to_stdout:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    print(f"File saved to [bold green]{path}[/bold green]")
+
+
+def render_contact_sheet(
+    cards: list[tuple[WeatherRecord, str, str, str]], columns: int | None = None
+) -> Image.Image:
+    """
+    Lays out the current weather card of each location on one canvas.
+
+    cards holds (record, city, state, country) tuples placed left to right
+    then top to bottom, in a square-ish grid unless columns is given. Each
+    card is drawn on a copy of its cached background and pasted in place.
+    """
+    if columns is None:
+        columns = math.ceil(math.sqrt(len(cards)))
+    rows = math.ceil(len(cards) / columns)
+    width, height = BACKGROUND_SIZE
+    sheet = Image.new("RGB", (columns * width, rows * height))
+    for i, card in enumerate(cards):
+        with span("image render"), render_current_image(*card) as tile:
+            sheet.paste(tile, ((i % columns) * width, (i // columns) * height))
+    return sheet
+
+
+def hourly_to_animation(
+    records: list[WeatherRecord],
+    city: str,
+    state: str,
+    country: str,
+    options: ImageOptions,
+    frame_ms: int = 500,
+    lat: float | None = None,
+    lon: float | None = None,
+) -> bool:
+    """
+    Exports one frame per hour of the forecast as an animated image.
+    Returns False, after printing the error, if it couldn't be saved.
+    """
+    try:
+        with span("image render"):
+            frames = [
+                render_current_image(record, city, state, country)
+                for record in records
+            ]
+        path = image_path(records[0], city, options, lat, lon, f"{len(records)}hours")
+        save_image(frames[0], path, options, frames[1:], frame_ms)
+    except MissingBackgroundError as err:
+        print(
+            f"[bold red]Error: {err} does not exist. Please ensure it exists to continue[/bold red]"
+        )
+        return False
+    except Exception as err:
+        print(f"[bold red]Error: [/bold red]", err)
+        return False
+    return True
+
+
+def current_to_image(
+    record: WeatherRecord,
+    city: str,
+    state: str,
+    country: str,
+    options: ImageOptions | None = None,
+) -> bool:
+    """
+    Exports the current weather as an image. Returns False, after printing
+    the error, if it couldn't be saved.
+    """
+    if options is None:
+        options = ImageOptions()
+    try:
+        with span("image render"):
+            new_im = render_current_image(record, city, state, country)
+        with new_im:
+            save_image(new_im, image_path(record, city, options), options)
+    except MissingBackgroundError as err:
+        print(
+            f"[bold red]Error: {err} does not exist. Please ensure it exists to continue[/bold red]"
+        )
+        return False
+    except Exception as err:
+        print(f"[bold red]Error: [/bold red]", err)
+        return False
+    return True
+
+
+def export_current_image(
+    record: WeatherRecord,
+    city: str,
+    state: str,
+    country: str,
+    path: Path,
+    options: ImageOptions,
+) -> tuple[Path, float, float]:
+    """
+    Renders and saves one image. Returns the path with the seconds spent
+    drawing and encoding it.
+    """
+    started = time.perf_counter()
+    with render_current_image(record, city, state, country) as new_im:
+        rendered = time.perf_counter()
+        data = encode_image(new_im, options)
+    encoded = time.perf_counter()
+    path.write_bytes(data)
+    return path, rendered - started, encoded - rendered
+
+
+class BatchImageExporter:
+    """
+    Exports current weather images for many locations in a process pool.
+
+    Drawing and JPEG encoding are CPU bound and hold the GIL, so images are
+    spread over one process per CPU while the main process keeps fetching.
+    Call finish() once everything is submitted to wait for the images and
+    print the timings.
+    """
+
+    def __init__(self, options: ImageOptions, max_workers: int | None = None):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        check_backgrounds()
+        Path(os.path.expanduser(options.directory)).mkdir(parents=True, exist_ok=True)
+        self.options = options
+        # Fetch threads are already running, and forking a process with
+        # threads can deadlock the child, so workers start from a clean one
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        else:
+            context = multiprocessing.get_context("spawn")
+        self.pool = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(), mp_context=context
+        )
+        self.futures = []
+        self.started = time.perf_counter()
+
+    def submit(
+        self,
+        record: WeatherRecord,
+        city: str,
+        state: str,
+        country: str,
+        lat: float,
+        lon: float,
+    ):
+        path = image_path(record, city, self.options, lat, lon)
+        self.futures.append(
+            self.pool.submit(
+                export_current_image, record, city, state, country, path, self.options
             )
+        )
 
-            # Rain and snow display
+    def finish(self) -> bool:
+        """
+        Waits for every image. Returns False if any of them failed.
+        """
+        from concurrent.futures import as_completed
 
-            if record.has_rain() and record.has_snow():
-                draw.text(
-                    (new_size[0] * 0.39125, new_size[1] * 0.84125),
-                    "Rain",
-                    anchor="ms",
-                    font_size=24,
-                )
-                draw.text(
-                    (new_size[0] * 0.39125, new_size[1] * 0.8975),
-                    record.get_rain(),
-                    anchor="ms",
-                    font_size=43,
-                )
-                draw.text(
-                    (new_size[0] * 0.6125, new_size[1] * 0.84125),
-                    "Snow",
-                    anchor="ms",
-                    font_size=24,
-                )
-                draw.text(
-                    (new_size[0] * 0.6125, new_size[1] * 0.8975),
-                    record.get_snow(),
-                    anchor="ms",
-                    font_size=43,
-                )
-            elif record.has_rain():
-                draw.text(
-                    (new_size[0] * 0.5, new_size[1] * 0.84125),
-                    "Rain",
-                    anchor="ms",
-                    font_size=24,
-                )
-                draw.text(
-                    (new_size[0] * 0.5, new_size[1] * 0.8975),
-                    record.get_rain(),
-                    anchor="ms",
-                    font_size=43,
-                )
-            elif record.has_snow():
-                draw.text(
-                    (new_size[0] * 0.5, new_size[1] * 0.84125),
-                    "Snow",
-                    anchor="ms",
-                    font_size=24,
-                )
-                draw.text(
-                    (new_size[0] * 0.5, new_size[1] * 0.8975),
-                    record.get_snow(),
-                    anchor="ms",
-                    font_size=43,
-                )
+        render_times = []
+        encode_times = []
+        failed = False
+        for future in as_completed(self.futures):
+            try:
+                path, render_time, encode_time = future.result()
+            except Exception as err:
+                print(f"[bold red]Error: [/bold red]", err)
+                failed = True
+                continue
+            render_times.append(render_time)
+            encode_times.append(encode_time)
+            # Spans in the worker processes aren't collected, so add them here
+            record_timing("image render", render_time)
+            record_timing("image encode", encode_time)
+            print(
+                f"File saved to [bold green]{path}[/bold green] "
+                f"(render {render_time * 1000:.1f} ms, encode {encode_time * 1000:.1f} ms)"
+            )
+        self.pool.shutdown()
 
-            # Credit text
-            draw.text(
-                (new_size[0] * 0.5, new_size[1] * 0.95),
-                "Weather data provided from openweathermap.org",
-                anchor="ms",
-                font_size=12,
+        if len(render_times) > 0:
+            elapsed = time.perf_counter() - self.started
+            print(
+                f"\nExported [bold green]{len(render_times)}[/bold green] images in [bold green]{elapsed:.2f}s[/bold green]"
             )
-            download_path = os.path.expanduser(
-                os.path.join(
-                    "~", "Downloads", f"{city}-{record.get_datetime("filename")}.jpg"
+            for name, times in (("Render", render_times), ("Encode", encode_times)):
+                print(
+                    f"{name}: mean {sum(times) / len(times) * 1000:.1f} ms, "
+                    f"max {max(times) * 1000:.1f} ms, total {sum(times):.2f}s"
                 )
-            )
-            new_im.save(download_path)
-            new_im.close()
-            print(f"File saved to [bold green]{download_path}[/bold green]")
+        return not failed
+
 
+def save_contact_sheet(
+    cards: list[tuple[WeatherRecord, str, str, str]], options: ImageOptions
+) -> bool:
+    """
+    Saves the current weather cards of every location as one image.
+    """
+    if len(cards) == 0:
+        return True
+    try:
+        with render_contact_sheet(cards) as sheet:
+            path = image_path(cards[0][0], "grid", options, label=f"{len(cards)}")
+            save_image(sheet, path, options)
     except Exception as err:
         print(f"[bold red]Error: [/bold red]", err)
+        return False
+    return True
+
+
+class CurrentImageHook:
+    """
+    Engine hook exporting the current weather card of each location.
+
+    A single location is saved (or streamed) right away, several go to a
+    BatchImageExporter, and with grid every card is kept until finish()
+    saves them as one contact sheet. coords are the requested locations,
+    in the order the grid lays them out.
+    """
+
+    def __init__(
+        self,
+        options: ImageOptions,
+        coords: list[tuple[float, float]],
+        grid: bool = False,
+    ):
+        self.options = options
+        self.takes_stdout = options.to_stdout
+        self.coords = coords
+        self.grid_cards = [None] * len(coords) if grid else None
+        self.exporter = None
+        self.failed = False
+        if not grid and len(coords) > 1:
+            self.exporter = BatchImageExporter(options)
+
+    def __call__(self, view, record: WeatherRecord, location: dict):
+        if view.section != "current":
+            return
+        card = (record, location["city"], location["state"], location["country"])
+        if self.grid_cards is not None:
+            # The API may round lat/lon, so match the closest coords
+            lat, lon = location["lat"], location["lon"]
+            idx = min(
+                (i for i in range(len(self.grid_cards)) if self.grid_cards[i] is None),
+                key=lambda i: abs(self.coords[i][0] - lat) + abs(self.coords[i][1] - lon),
+            )
+            self.grid_cards[idx] = card
+        elif self.exporter is not None:
+            self.exporter.submit(*card, location["lat"], location["lon"])
+        elif not current_to_image(*card, self.options):
+            self.failed = True
+
+    def finish(self) -> bool:
+        ok = not self.failed
+        if self.exporter is not None:
+            ok = self.exporter.finish()
+        if self.grid_cards is not None:
+            cards = [card for card in self.grid_cards if card is not None]
+            ok = save_contact_sheet(cards, self.options) and ok
+        return ok
+
+
+class AnimationHook:
+    """
+    Engine hook exporting the hourly forecast of each location as an
+    animation. With several locations the files are told apart by their
+    coords.
+    """
+
+    def __init__(self, options: ImageOptions, frame_ms: int, several: bool = False):
+        self.options = options
+        self.takes_stdout = options.to_stdout
+        self.frame_ms = frame_ms
+        self.several = several
+        self.failed = False
+
+    def __call__(self, view, series, location: dict):
+        if view.section != "hourly":
+            return
+        lat, lon = None, None
+        if self.several:
+            lat, lon = location["lat"], location["lon"]
+        saved = hourly_to_animation(
+            series.records(),
+            location["city"],
+            location["state"],
+            location["country"],
+            self.options,
+            self.frame_ms,
+            lat,
+            lon,
+        )
+        if not saved:
+            self.failed = True
+
+    def finish(self) -> bool:
+        return not self.failed
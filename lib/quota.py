@@ -0,0 +1,245 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+from lib.cache import cache_dir
+from lib.timing import record
+
+# Endpoints the daily budget counts. Geocoding calls are free on every plan
+# and only count toward the per minute budget.
+DAILY_ENDPOINTS = ("/data/3.0/onecall",)
+# Calls older than this are dropped from the ledger
+LEDGER_DAYS = 2
+
+
+class QuotaExceeded(Exception):
+    """
+    Raised instead of sending a request once the daily budget is spent.
+    """
+
+
+class QuotaSettings:
+    """
+    API budgets shared by every command and the daemon.
+
+    Defaults come from the WEATHER_DAILY_BUDGET, WEATHER_MINUTE_BUDGET,
+    WEATHER_LOW_BUDGET and WEATHER_STALE_MAX_AGE env variables. A budget
+    of 0 turns that limit off.
+    """
+
+    def __init__(
+        self,
+        daily_budget: int | None = None,
+        minute_budget: int | None = None,
+        low_share: float | None = None,
+        stale_max_age: int | None = None,
+    ):
+        if daily_budget is None:
+            daily_budget = int(os.environ.get("WEATHER_DAILY_BUDGET", 1000))
+        if minute_budget is None:
+            minute_budget = int(os.environ.get("WEATHER_MINUTE_BUDGET", 60))
+        if low_share is None:
+            low_share = float(os.environ.get("WEATHER_LOW_BUDGET", 0.1))
+        if stale_max_age is None:
+            stale_max_age = int(os.environ.get("WEATHER_STALE_MAX_AGE", 3 * 60 * 60))
+        self.daily_budget = daily_budget
+        self.minute_budget = minute_budget
+        self.low_share = low_share
+        self.stale_max_age = stale_max_age
+
+
+def day_start(now: float) -> float:
+    # The API counts calls per UTC day
+    today = datetime.fromtimestamp(now, timezone.utc).date()
+    return datetime(today.year, today.month, today.day, tzinfo=timezone.utc).timestamp()
+
+
+def format_reset(now: float) -> str:
+    left = int(day_start(now) + timedelta(days=1).total_seconds() - now)
+    return f"00:00 UTC, in {left // 3600}h {left % 3600 // 60:02d}m"
+
+
+class QuotaLedger:
+    """
+    Persistent record of every API call, and the budget scheduler using it.
+
+    The ledger is a sqlite file next to the response cache, so every command
+    and the daemon spend from the same budgets. The per minute budget is a
+    token bucket stored in the same file: it holds up to minute_budget
+    tokens and refills minute_budget tokens per minute, so a batch waits for
+    a token instead of running into the API's 429s. The daily budget is a
+    hard limit counted from the ledger.
+    """
+
+    def __init__(self, path: Path | None = None, settings: QuotaSettings | None = None):
+        if path is None:
+            path = cache_dir() / "quota.sqlite3"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.settings = settings or QuotaSettings()
+        self._lock = threading.Lock()
+        # Autocommit, transactions are opened by hand so the bucket can be
+        # updated by several processes without losing tokens
+        self._conn = sqlite3.connect(
+            path, timeout=10, isolation_level=None, check_same_thread=False
+        )
+        # WAL keeps the write on every call from syncing the whole file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS calls (
+                at REAL NOT NULL,
+                endpoint TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS calls_at ON calls (at)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bucket (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _tokens(self, now: float) -> float:
+        # Tokens in the per minute bucket, refilled up to now
+        budget = self.settings.minute_budget
+        row = self._conn.execute(
+            "SELECT tokens, updated_at FROM bucket WHERE id = 0"
+        ).fetchone()
+        if row is None:
+            return float(budget)
+        tokens, updated_at = row
+        return min(budget, tokens + max(0.0, now - updated_at) * budget / 60)
+
+    def _daily_used(self, now: float) -> int:
+        placeholders = ",".join("?" * len(DAILY_ENDPOINTS))
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM calls WHERE at >= ? AND endpoint IN ({placeholders})",
+            (day_start(now), *DAILY_ENDPOINTS),
+        ).fetchone()[0]
+
+    def acquire(self, url: str):
+        """
+        Takes one call out of the budgets for a request to url and records it.
+
+        Blocks until the per minute bucket has a token. Raises QuotaExceeded
+        if the request counts toward the daily budget and it's spent.
+        """
+        endpoint = urlparse(url).path
+        settings = self.settings
+        while True:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    now = time.time()
+                    if (
+                        settings.daily_budget
+                        and endpoint in DAILY_ENDPOINTS
+                        and self._daily_used(now) >= settings.daily_budget
+                    ):
+                        raise QuotaExceeded(
+                            f"the daily budget of {settings.daily_budget} One Call requests is spent, it resets at {format_reset(now)}"
+                        )
+                    wait = 0.0
+                    if settings.minute_budget:
+                        tokens = self._tokens(now)
+                        if tokens < 1:
+                            wait = (1 - tokens) * 60 / settings.minute_budget
+                        else:
+                            tokens -= 1
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO bucket VALUES (0, ?, ?)",
+                            (tokens, now),
+                        )
+                    if wait == 0.0:
+                        self._conn.execute(
+                            "INSERT INTO calls VALUES (?, ?)", (now, endpoint)
+                        )
+                        self._conn.execute(
+                            "DELETE FROM calls WHERE at < ?",
+                            (now - LEDGER_DAYS * 24 * 60 * 60,),
+                        )
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            if wait == 0.0:
+                return
+            record("quota wait", wait)
+            time.sleep(wait)
+
+    def budget_is_low(self, url: str) -> bool:
+        """
+        Whether a request to url should rather be served from a stale copy.
+
+        True once the tokens left this minute, or the calls left today for
+        the endpoints the daily budget counts, drop under low_share of the
+        budget.
+        """
+        settings = self.settings
+        now = time.time()
+        with self._lock:
+            if (
+                settings.minute_budget
+                and self._tokens(now) < settings.minute_budget * settings.low_share
+            ):
+                return True
+            if settings.daily_budget and urlparse(url).path in DAILY_ENDPOINTS:
+                left = settings.daily_budget - self._daily_used(now)
+                return left <= settings.daily_budget * settings.low_share
+        return False
+
+    def usage(self) -> dict:
+        """
+        Calls spent today per endpoint and what's left of each budget.
+        """
+        now = time.time()
+        with self._lock:
+            by_endpoint = dict(
+                self._conn.execute(
+                    "SELECT endpoint, COUNT(*) FROM calls WHERE at >= ? GROUP BY endpoint ORDER BY endpoint",
+                    (day_start(now),),
+                ).fetchall()
+            )
+            last_minute = self._conn.execute(
+                "SELECT COUNT(*) FROM calls WHERE at >= ?", (now - 60,)
+            ).fetchone()[0]
+            daily_used = self._daily_used(now)
+            tokens = self._tokens(now) if self.settings.minute_budget else None
+        return {
+            "daily_budget": self.settings.daily_budget,
+            "daily_used": daily_used,
+            "minute_budget": self.settings.minute_budget,
+            "minute_used": last_minute,
+            "minute_tokens": tokens,
+            "by_endpoint": by_endpoint,
+            "resets": format_reset(now),
+        }
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> QuotaLedger | None:
+    """
+    Returns the process wide ledger, opening it on first use.
+
+    If it can't be opened this returns None and requests go out without a
+    budget, like they did before the ledger existed.
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            try:
+                _ledger = QuotaLedger()
+            except (OSError, sqlite3.Error):
+                return None
+    return _ledger
@@ -0,0 +1,94 @@
+from rich import print
+from rich.table import Table
+from rich.console import Console
+from lib.weatherrecord import WeatherRecord, DailyWeatherRecord
+from lib.alerts import WeatherAlert
+from lib.series import ForecastSeries
+
+console = Console()
+
+
+def print_current(record: WeatherRecord, city: str, state: str, country: str):
+    print(f"Current weather in [green]{city}, {state}, {country}[/green]")
+    print(f"\n{record.get_datetime("current")}")
+    print(record.get_weather_condition())
+    table = Table("Measurement", "Value")
+    table.add_row("Temp", record.get_temp())
+    table.add_row("Feels like", record.get_feels_like())
+    table.add_row("Humidity", record.get_humidity())
+    table.add_row("Wind Speed", record.get_wind_speed())
+    if record.has_wind_gust():
+        table.add_row("Wind Gust", record.get_wind_gust())
+    if record.has_rain():
+        table.add_row("Rain", record.get_rain())
+    if record.has_snow():
+        table.add_row("Snow", record.get_snow())
+    console.print(table)
+
+
+def print_hourly(series: ForecastSeries, city: str, state: str, country: str):
+    print(f"{len(series)} hour weather for [green]{city}, {state}, {country}[/green]")
+
+    table = Table(
+        "Datetime",
+        "Temp",
+        "Feels Like",
+        "Humidity",
+        "Wind Speed",
+        "Wind Gust",
+        "Condition",
+        "rain",
+        "snow",
+        "pop",
+    )
+    for row in series.formatted_rows():
+        table.add_row(*row)
+    console.print(table)
+
+
+def print_daily(
+    records: list[DailyWeatherRecord], city: str, state: str, country: str
+):
+    print(f"{len(records)} day weather for [green]{city}, {state}, {country}[/green]")
+
+    for record in records:
+        table = Table("Measurement", "Value")
+        table.add_row("Summary", record.get_summary())
+        table.add_row("Min Temp", record.get_min_temp())
+        table.add_row("Max Temp", record.get_max_temp())
+        table.add_row("Avg Temp", record.get_temp())
+        table.add_row("Avg Feels Like", record.get_feels_like())
+        table.add_row("Humidity", record.get_humidity())
+        table.add_row("Wind Speed", record.get_wind_speed())
+        if record.has_wind_gust():
+            table.add_row("Wind Gusts", record.get_wind_gust())
+        if record.has_rain():
+            table.add_row("Rain", record.get_rain())
+        if record.has_snow():
+            table.add_row("Snow", record.get_snow())
+
+        print(f"\nReport for [bold green]{record.get_datetime("daily")}[/bold green]")
+        console.print(table)
+
+
+def print_alerts(alerts: list[WeatherAlert]):
+    for alert in alerts:
+        print(f"\n\n[bold red]Alert from {alert.get_sender()}[/bold red]")
+        print(f"[yellow]{alert.get_event()}[/yellow]")
+        print(
+            f"From [green]{alert.get_start()}[/green] until [green]{alert.get_end()}[/green]"
+        )
+        print(alert.get_description())
+
+
+def print_no_changes(kind: str, city: str, state: str, country: str):
+    print(
+        f"No changes to the {kind} forecast for [green]{city}, {state}, {country}[/green]"
+    )
+
+
+def print_expired_alerts(alerts: list[WeatherAlert]):
+    for alert in alerts:
+        print(
+            f"\n[bold green]Alert from {alert.get_sender()} is over:[/bold green] [yellow]{alert.get_event()}[/yellow]"
+        )
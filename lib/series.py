@@ -0,0 +1,196 @@
+from array import array
+import math
+from typing import Iterator
+from lib.converters import (
+    kelvin_to_c_column,
+    kelvin_to_f_column,
+    wind_speed_to_kmph_column,
+    wind_speed_to_mph_column,
+    mm_to_in_column,
+)
+from lib.formatters import timestamp_to_fmt_text
+from lib.weatherrecord import WeatherRecord, Units
+
+# Stands in for a value the API left out (no gust, no rain...)
+MISSING = math.nan
+
+
+def _optional(value: float | None) -> float:
+    return MISSING if value is None else value
+
+
+def _present(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+class ForecastSeries:
+    """
+    Hourly forecast for one location stored as columns instead of records.
+
+    Each field is a single array('d') or array('q'), so a series of 48
+    hours is a handful of objects rather than 48 records. Unit conversion
+    runs over a whole column at once the first time a column is needed, and
+    values are only formatted to strings at render time.
+
+    Daily forecasts stay DailyWeatherRecord lists: there are 8 days at
+    most, too few for columns to save anything.
+    """
+
+    NUMERIC_COLUMNS = (
+        "temp",
+        "feels_like",
+        "wind_speed",
+        "wind_gust",
+        "rain",
+        "snow",
+        "pop",
+    )
+
+    def __init__(self, units: Units):
+        self.units = units
+        self.timestamp = array("q")
+        self.humidity = array("q")
+        self.weather_id = array("q")
+        self.weather_main = []
+        self.weather_description = []
+        # Rain and snow as the API sent them, ints stay ints, so metric
+        # text reads like WeatherRecord.get_rain
+        self.rain_values = []
+        self.snow_values = []
+        for name in self.NUMERIC_COLUMNS:
+            setattr(self, name, array("d"))
+        self._converted = {}
+
+    @classmethod
+    def from_api(
+        cls, items: list[dict], temp_units: str = "f", wind_units: str = "m"
+    ) -> "ForecastSeries":
+        """
+        Builds a series from `hourly` items of the One Call API.
+        """
+        series = cls(Units.get(temp_units, wind_units))
+        for data in items:
+            series.timestamp.append(data["dt"])
+            series.temp.append(data["temp"])
+            series.feels_like.append(data["feels_like"])
+            series.humidity.append(data["humidity"])
+            series.wind_speed.append(data["wind_speed"])
+            series.wind_gust.append(_optional(data.get("wind_gust")))
+            rain = data["rain"]["1h"] if "rain" in data else None
+            snow = data["snow"]["1h"] if "snow" in data else None
+            series.rain.append(_optional(rain))
+            series.snow.append(_optional(snow))
+            series.rain_values.append(rain)
+            series.snow_values.append(snow)
+            series.pop.append(_optional(data.get("pop")))
+            weather = data["weather"][0]
+            series.weather_id.append(weather["id"])
+            series.weather_main.append(weather["main"])
+            series.weather_description.append(weather["description"])
+        return series
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def converted(self, name: str) -> array:
+        """
+        Returns the column in the display units, converting it on first use.
+
+        Temperatures go to F/C, wind to mph/kmph and, for imperial wind
+        units, rain and snow to inches. Missing values stay NaN.
+        """
+        column = self._converted.get(name)
+        if column is not None:
+            return column
+        values = getattr(self, name)
+        match name:
+            case "temp" | "feels_like":
+                if self.units.temp == "c":
+                    column = kelvin_to_c_column(values)
+                else:
+                    column = kelvin_to_f_column(values)
+            case "wind_speed" | "wind_gust":
+                if self.units.wind == "k":
+                    column = wind_speed_to_kmph_column(values)
+                else:
+                    column = wind_speed_to_mph_column(values)
+            case "rain" | "snow":
+                if self.units.wind == "k":
+                    column = values
+                else:
+                    column = mm_to_in_column(values)
+            case _:
+                column = values
+        self._converted[name] = column
+        return column
+
+    def record(self, i: int) -> WeatherRecord:
+        """
+        Builds a WeatherRecord for hour i, for code that works per record.
+        """
+        return WeatherRecord(
+            self.timestamp[i],
+            self.temp[i],
+            self.feels_like[i],
+            self.humidity[i],
+            self.wind_speed[i],
+            {
+                "id": self.weather_id[i],
+                "main": self.weather_main[i],
+                "description": self.weather_description[i],
+            },
+            wind_gust=_present(self.wind_gust[i]),
+            rain=self.rain_values[i],
+            snow=self.snow_values[i],
+            pop=_present(self.pop[i]),
+            units=self.units,
+        )
+
+    def records(self) -> list[WeatherRecord]:
+        return [self.record(i) for i in range(len(self))]
+
+    def formatted_rows(self) -> Iterator[tuple[str, ...]]:
+        """
+        Yields one row of display strings per hour, with the same text as
+        the WeatherRecord getters: datetime, temp, feels like, humidity,
+        wind speed, wind gust, condition, rain, snow and pop.
+        """
+        temp_unit = "C" if self.units.temp == "c" else "F"
+        wind_unit = "km/h" if self.units.wind == "k" else "mi/h"
+        temps = self.converted("temp")
+        feels_likes = self.converted("feels_like")
+        wind_speeds = self.converted("wind_speed")
+        wind_gusts = self.converted("wind_gust")
+        rains = self.converted("rain")
+        snows = self.converted("snow")
+        for i in range(len(self)):
+            yield (
+                timestamp_to_fmt_text(self.timestamp[i], "hourly"),
+                "{:.2f} {}".format(temps[i], temp_unit),
+                "{:.2f} {}".format(feels_likes[i], temp_unit),
+                f"{self.humidity[i]}%",
+                "{:.2f} {}".format(wind_speeds[i], wind_unit),
+                self._format_optional(wind_gusts[i], wind_unit),
+                f"{self.weather_main[i]}: {self.weather_description[i]}",
+                self._format_precipitation(self.rain_values[i], rains[i]),
+                self._format_precipitation(self.snow_values[i], snows[i]),
+                self._format_pop(self.pop[i]),
+            )
+
+    def _format_optional(self, value: float, unit: str) -> str:
+        if math.isnan(value):
+            return "N/A"
+        return "{:.2f} {}".format(value, unit)
+
+    def _format_precipitation(self, raw: float | None, value: float) -> str:
+        # Zero and missing both show as N/A, like WeatherRecord.get_rain
+        if not raw:
+            return "N/A"
+        if self.units.wind == "k":
+            return f"{raw} mm"
+        return "{:.2f} in".format(value)
+
+    def _format_pop(self, pop: float) -> str:
+        if math.isnan(pop) or not pop:
+            return "N/A"
+        return "{:.2f}%".format(pop * 100)
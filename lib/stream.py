@@ -0,0 +1,541 @@
+import csv
+import json
+import math
+import sys
+from typing import BinaryIO, Iterable, Iterator, TextIO
+from lib.converters import (
+    kelvin_to_c_column,
+    kelvin_to_f_column,
+    wind_speed_to_kmph_column,
+    wind_speed_to_mph_column,
+    mm_to_in_column,
+)
+from lib.formatters import timestamp_to_fmt_text
+from lib.series import ForecastSeries
+from lib.weatherrecord import WeatherRecord, DailyWeatherRecord, Units
+from lib.alerts import WeatherAlert
+
+# Formats that write each row as soon as it's produced
+STREAM_FORMATS = ("ndjson", "csv", "lines")
+# Every format a command can output besides its rich tables
+OUTPUT_FORMATS = ("json",) + STREAM_FORMATS + ("parquet",)
+
+LOCATION_FIELDS = ("city", "state", "country", "lat", "lon")
+UNIT_FIELDS = ("temp_unit", "wind_unit", "precip_unit")
+# Values as the API sends them: Kelvin, meters per second and millimeters
+RAW_FIELDS = (
+    "temp_k",
+    "feels_like_k",
+    "wind_speed_ms",
+    "wind_gust_ms",
+    "rain_mm",
+    "snow_mm",
+)
+SEARCH_FIELDS = ("name", "state", "country", "lat", "lon")
+CURRENT_FIELDS = (
+    LOCATION_FIELDS
+    + (
+        "dt",
+        "datetime",
+        "temp",
+        "feels_like",
+        "humidity",
+        "wind_speed",
+        "wind_gust",
+        "condition",
+        "rain",
+        "snow",
+    )
+    + UNIT_FIELDS
+    + RAW_FIELDS
+)
+HOURLY_FIELDS = (
+    LOCATION_FIELDS
+    + (
+        "dt",
+        "datetime",
+        "temp",
+        "feels_like",
+        "humidity",
+        "wind_speed",
+        "wind_gust",
+        "condition",
+        "rain",
+        "snow",
+        "pop",
+    )
+    + UNIT_FIELDS
+    + RAW_FIELDS
+)
+DAILY_FIELDS = (
+    LOCATION_FIELDS
+    + (
+        "dt",
+        "date",
+        "summary",
+        "min_temp",
+        "max_temp",
+        "temp",
+        "feels_like",
+        "humidity",
+        "wind_speed",
+        "wind_gust",
+        "condition",
+        "rain",
+        "snow",
+        "pop",
+    )
+    + UNIT_FIELDS
+    + ("min_temp_k", "max_temp_k")
+    + RAW_FIELDS
+)
+ALERT_FIELDS = LOCATION_FIELDS + ("sender", "event", "start", "end", "description")
+# Added to rows and alerts with --changes: new, revised or expired
+CHANGE_FIELDS = ("change",)
+# Columns that aren't floats, for formats with a schema
+STRING_FIELDS = {
+    "name",
+    "city",
+    "state",
+    "country",
+    "datetime",
+    "date",
+    "summary",
+    "condition",
+    "temp_unit",
+    "wind_unit",
+    "precip_unit",
+    "sender",
+    "event",
+    "description",
+    "change",
+}
+INT_FIELDS = {"dt", "humidity", "start", "end"}
+
+
+def unit_fields(units: Units) -> dict:
+    metric_wind = units.wind == "k"
+    return {
+        "temp_unit": "C" if units.temp == "c" else "F",
+        "wind_unit": "km/h" if metric_wind else "mi/h",
+        "precip_unit": "mm" if metric_wind else "in",
+    }
+
+
+def _number(value: float | None) -> float | None:
+    # Missing values are NaN in columns, null in the output
+    if value is None or math.isnan(value):
+        return None
+    return round(value, 2)
+
+
+def _raw(value: float | None) -> float | None:
+    if value is None or math.isnan(value):
+        return None
+    return value
+
+
+def search_rows(results: list[dict]) -> Iterator[dict]:
+    """
+    Yields the places found by the geocoding API or the gazetteer.
+    """
+    for result in results:
+        yield {field: result.get(field) for field in SEARCH_FIELDS}
+
+
+def current_rows(record: WeatherRecord, location: dict) -> Iterator[dict]:
+    """
+    Yields the current weather as a single row.
+    """
+    units = record.units
+    to_temp = kelvin_to_c_column if units.temp == "c" else kelvin_to_f_column
+    if units.wind == "k":
+        to_wind, to_precip = wind_speed_to_kmph_column, None
+    else:
+        to_wind, to_precip = wind_speed_to_mph_column, mm_to_in_column
+
+    def convert(value: float | None, converter) -> float | None:
+        if value is None or converter is None:
+            return value
+        return converter((value,))[0]
+
+    yield {
+        **location,
+        "dt": record.timestamp,
+        "datetime": record.get_datetime("current"),
+        "temp": _number(convert(record.temp, to_temp)),
+        "feels_like": _number(convert(record.feels_like, to_temp)),
+        "humidity": record.humidity,
+        "wind_speed": _number(convert(record.wind_speed, to_wind)),
+        "wind_gust": _number(convert(record.wind_gust, to_wind)),
+        "condition": record.get_weather_condition(),
+        "rain": _number(convert(record.rain, to_precip)),
+        "snow": _number(convert(record.snow, to_precip)),
+        **unit_fields(units),
+        "temp_k": record.temp,
+        "feels_like_k": record.feels_like,
+        "wind_speed_ms": record.wind_speed,
+        "wind_gust_ms": record.wind_gust,
+        "rain_mm": record.rain,
+        "snow_mm": record.snow,
+    }
+
+
+def alert_row(alert: WeatherAlert, location: dict) -> dict:
+    return {
+        **location,
+        "sender": alert.sender_name,
+        "event": alert.event,
+        "start": alert.start,
+        "end": alert.end,
+        "description": alert.description,
+    }
+
+
+def hourly_rows(series: ForecastSeries, location: dict) -> Iterator[dict]:
+    """
+    Yields one row per hour of the series, numbers in the display units.
+    """
+    units = unit_fields(series.units)
+    temps = series.converted("temp")
+    feels_likes = series.converted("feels_like")
+    wind_speeds = series.converted("wind_speed")
+    wind_gusts = series.converted("wind_gust")
+    rains = series.converted("rain")
+    snows = series.converted("snow")
+    for i in range(len(series)):
+        yield {
+            **location,
+            "dt": series.timestamp[i],
+            "datetime": timestamp_to_fmt_text(series.timestamp[i], "hourly"),
+            "temp": _number(temps[i]),
+            "feels_like": _number(feels_likes[i]),
+            "humidity": series.humidity[i],
+            "wind_speed": _number(wind_speeds[i]),
+            "wind_gust": _number(wind_gusts[i]),
+            "condition": f"{series.weather_main[i]}: {series.weather_description[i]}",
+            "rain": _number(rains[i]),
+            "snow": _number(snows[i]),
+            "pop": _number(series.pop[i]),
+            **units,
+            "temp_k": series.temp[i],
+            "feels_like_k": series.feels_like[i],
+            "wind_speed_ms": series.wind_speed[i],
+            "wind_gust_ms": _raw(series.wind_gust[i]),
+            "rain_mm": _raw(series.rain[i]),
+            "snow_mm": _raw(series.snow[i]),
+        }
+
+
+def daily_rows(records: list[DailyWeatherRecord], location: dict) -> Iterator[dict]:
+    """
+    Yields one row per day, numbers in the display units.
+    """
+    if len(records) == 0:
+        return
+    record_units = records[0].units
+    units = unit_fields(record_units)
+    to_temp = kelvin_to_c_column if record_units.temp == "c" else kelvin_to_f_column
+    if record_units.wind == "k":
+        to_wind = wind_speed_to_kmph_column
+        to_precip = None
+    else:
+        to_wind = wind_speed_to_mph_column
+        to_precip = mm_to_in_column
+
+    def column(name: str, convert=None) -> list[float | None]:
+        values = [getattr(record, name) for record in records]
+        if convert is None:
+            return values
+        present = convert(value for value in values if value is not None)
+        converted = iter(present)
+        return [None if value is None else next(converted) for value in values]
+
+    min_temps = column("min_temp", to_temp)
+    max_temps = column("max_temp", to_temp)
+    temps = column("temp", to_temp)
+    feels_likes = column("feels_like", to_temp)
+    wind_speeds = column("wind_speed", to_wind)
+    wind_gusts = column("wind_gust", to_wind)
+    rains = column("rain", to_precip)
+    snows = column("snow", to_precip)
+    for i, record in enumerate(records):
+        yield {
+            **location,
+            "dt": record.timestamp,
+            "date": record.get_datetime("daily"),
+            "summary": record.summary,
+            "min_temp": _number(min_temps[i]),
+            "max_temp": _number(max_temps[i]),
+            "temp": _number(temps[i]),
+            "feels_like": _number(feels_likes[i]),
+            "humidity": record.humidity,
+            "wind_speed": _number(wind_speeds[i]),
+            "wind_gust": _number(wind_gusts[i]),
+            "condition": record.get_weather_condition(),
+            "rain": _number(rains[i]),
+            "snow": _number(snows[i]),
+            "pop": _number(record.pop),
+            **units,
+            "min_temp_k": record.min_temp,
+            "max_temp_k": record.max_temp,
+            "temp_k": record.temp,
+            "feels_like_k": record.feels_like,
+            "wind_speed_ms": record.wind_speed,
+            "wind_gust_ms": record.wind_gust,
+            "rain_mm": record.rain,
+            "snow_mm": record.snow,
+        }
+
+
+def _line_value(value) -> str:
+    if value is None:
+        return ""
+    text = str(value)
+    if text == "" or any(c in text for c in ' "=\t'):
+        return json.dumps(text)
+    return text
+
+
+def _warn_skipped_alerts(count: int, output_format: str):
+    if count > 0:
+        sys.stderr.write(
+            f"{count} alerts left out of the {output_format} output, "
+            "write them to a file with --alerts-file\n"
+        )
+
+
+class StreamWriter:
+    """
+    Writes rows to a text stream as soon as they're produced.
+
+    ndjson writes one JSON object per line, csv a header followed by one
+    line per row and lines one 'name=value' line per row. Nothing is held
+    back, so memory doesn't grow with the number of rows.
+
+    Alerts are written as they come too: to alerts_file in the same format
+    when it's given, or else in the stream as records with a type of
+    'alert' for ndjson and lines. A csv stream has a single header, so
+    without alerts_file its alerts are left out and counted on close.
+    """
+
+    def __init__(
+        self,
+        output_format: str,
+        fields: tuple[str, ...],
+        file: TextIO | None = None,
+        alerts_file: TextIO | None = None,
+        alert_fields: tuple[str, ...] = ALERT_FIELDS,
+    ):
+        self.output_format = output_format
+        self.fields = fields
+        self.file = file if file is not None else sys.stdout
+        self._csv_writer = None
+        self.alert_fields = alert_fields
+        self.alerts = None
+        if alerts_file is not None:
+            self.alerts = StreamWriter(output_format, alert_fields, alerts_file)
+        self.skipped_alerts = 0
+
+    @property
+    def writes_alerts(self) -> bool:
+        return self.alerts is not None or self.output_format != "csv"
+
+    def write_row(self, row: dict):
+        match self.output_format:
+            case "ndjson":
+                self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            case "csv":
+                if self._csv_writer is None:
+                    # The header goes out with the first row
+                    self._csv_writer = csv.DictWriter(
+                        self.file, fieldnames=self.fields, lineterminator="\n"
+                    )
+                    self._csv_writer.writeheader()
+                self._csv_writer.writerow(row)
+            case _:
+                self.file.write(
+                    " ".join(f"{name}={_line_value(row[name])}" for name in self.fields)
+                    + "\n"
+                )
+
+    def write_alert(self, row: dict):
+        if self.alerts is not None:
+            self.alerts.write_row(row)
+            return
+        match self.output_format:
+            case "ndjson":
+                self.file.write(
+                    json.dumps({"type": "alert", **row}, ensure_ascii=False) + "\n"
+                )
+            case "lines":
+                values = " ".join(
+                    f"{name}={_line_value(row[name])}" for name in self.alert_fields
+                )
+                self.file.write(f"type=alert {values}\n")
+            case _:
+                self.skipped_alerts += 1
+
+    def write_rows(self, rows: Iterable[dict], alerts: Iterable[dict] = ()):
+        """
+        Writes every row and alert, then flushes so the consumer sees them
+        right away.
+        """
+        for row in rows:
+            self.write_row(row)
+        for alert in alerts:
+            self.write_alert(alert)
+        self.file.flush()
+        if self.alerts is not None:
+            self.alerts.file.flush()
+
+    def close(self):
+        if self.alerts is not None:
+            self.alerts.file.close()
+        _warn_skipped_alerts(self.skipped_alerts, self.output_format)
+
+
+class JsonWriter:
+    """
+    Writes one JSON document with every row and alert once the command is
+    done: {"rows": [...], "alerts": [...]}.
+    """
+
+    def __init__(self, fields: tuple[str, ...], file: TextIO | None = None):
+        self.fields = fields
+        self.file = file if file is not None else sys.stdout
+        self.rows = []
+        self.alerts = []
+
+    @property
+    def writes_alerts(self) -> bool:
+        return True
+
+    def write_rows(self, rows: Iterable[dict], alerts: Iterable[dict] = ()):
+        self.rows.extend(rows)
+        self.alerts.extend(alerts)
+
+    def close(self):
+        json.dump(
+            {"rows": self.rows, "alerts": self.alerts},
+            self.file,
+            ensure_ascii=False,
+            indent=2,
+        )
+        self.file.write("\n")
+        self.file.flush()
+
+
+class ParquetWriter:
+    """
+    Writes rows to a Parquet file on stdout, one row group per call to
+    write_rows. Alerts go to a second Parquet file at alerts_path, and are
+    left out and counted on close without one. Needs the optional pyarrow
+    package.
+    """
+
+    def __init__(
+        self,
+        fields: tuple[str, ...],
+        file: BinaryIO | None = None,
+        alerts_path: str | None = None,
+        alert_fields: tuple[str, ...] = ALERT_FIELDS,
+    ):
+        import pyarrow
+
+        self.pyarrow = pyarrow
+        self.fields = fields
+        self.file = file if file is not None else sys.stdout.buffer
+        self.schema = pyarrow.schema(
+            [(field, self._arrow_type(field)) for field in fields]
+        )
+        self._writer = None
+        self.alerts = None
+        if alerts_path is not None:
+            self.alerts = ParquetWriter(alert_fields, open(alerts_path, "wb"))
+        self.skipped_alerts = 0
+
+    @property
+    def writes_alerts(self) -> bool:
+        return self.alerts is not None
+
+    def _arrow_type(self, field: str):
+        if field in STRING_FIELDS:
+            return self.pyarrow.string()
+        if field in INT_FIELDS:
+            return self.pyarrow.int64()
+        return self.pyarrow.float64()
+
+    def _get_writer(self):
+        if self._writer is None:
+            import pyarrow.parquet
+
+            self._writer = pyarrow.parquet.ParquetWriter(self.file, self.schema)
+        return self._writer
+
+    def write_rows(self, rows: Iterable[dict], alerts: Iterable[dict] = ()):
+        table = self.pyarrow.Table.from_pylist(list(rows), schema=self.schema)
+        if table.num_rows > 0:
+            self._get_writer().write_table(table)
+        if self.alerts is not None:
+            self.alerts.write_rows(alerts)
+        else:
+            self.skipped_alerts += sum(1 for _ in alerts)
+
+    def close(self):
+        # The footer is only written on close, an empty file still has one
+        self._get_writer().close()
+        self.file.flush()
+        if self.alerts is not None:
+            self.alerts.close()
+            self.alerts.file.close()
+        _warn_skipped_alerts(self.skipped_alerts, "parquet")
+
+
+OutputWriter = StreamWriter | JsonWriter | ParquetWriter
+
+FIELDS = {
+    "search": SEARCH_FIELDS,
+    "current": CURRENT_FIELDS,
+    "hourly": HOURLY_FIELDS,
+    "daily": DAILY_FIELDS,
+}
+
+
+def make_writer(
+    output_format: str,
+    kind: str,
+    alerts_path: str | None = None,
+    changes: bool = False,
+) -> OutputWriter:
+    """
+    Returns the writer for one of OUTPUT_FORMATS, writing the rows of kind
+    ('search', 'current', 'hourly' or 'daily') to stdout, and the alerts
+    to alerts_path when given. json always keeps its alerts in stdout.
+    changes adds the change field of --changes to rows and alerts.
+
+    Raises ImportError for parquet when pyarrow isn't installed, and
+    OSError when alerts_path can't be opened.
+    """
+    fields = FIELDS[kind]
+    alert_fields = ALERT_FIELDS
+    if changes:
+        fields += CHANGE_FIELDS
+        alert_fields += CHANGE_FIELDS
+    match output_format:
+        case "json":
+            return JsonWriter(fields)
+        case "parquet":
+            return ParquetWriter(
+                fields, alerts_path=alerts_path, alert_fields=alert_fields
+            )
+        case _:
+            alerts_file = None
+            if alerts_path is not None:
+                alerts_file = open(alerts_path, "w", newline="", encoding="utf-8")
+            return StreamWriter(
+                output_format,
+                fields,
+                alerts_file=alerts_file,
+                alert_fields=alert_fields,
+            )
@@ -0,0 +1,99 @@
+import threading
+import time
+from contextlib import nullcontext
+
+# main.py imports this module first, so the time from here until a command
+# starts is the import time of the CLI
+imported_at = time.perf_counter()
+
+
+class Timings:
+    """
+    Time spent in each phase of a command, collected from every thread.
+
+    Phases are kept in the order they first ran. Threads overlap, so the
+    phases of a batch can add up to more than the wall time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> [calls, total seconds, max seconds]
+        self.phases = {}
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            phase = self.phases.get(name)
+            if phase is None:
+                self.phases[name] = [1, seconds, seconds]
+                return
+            phase[0] += 1
+            phase[1] += seconds
+            phase[2] = max(phase[2], seconds)
+
+    def print_report(self):
+        """
+        Prints a table of the phases to stderr, out of the way of --format
+        output and images written to stdout.
+        """
+        from rich.console import Console
+        from rich.table import Table
+
+        table = Table("Phase", "Calls", "Total", "Mean", "Max")
+        for name, (calls, total, longest) in self.phases.items():
+            table.add_row(
+                name,
+                str(calls),
+                f"{total * 1000:.1f} ms",
+                f"{total / calls * 1000:.1f} ms",
+                f"{longest * 1000:.1f} ms",
+            )
+        wall = time.perf_counter() - imported_at
+        table.add_row("wall", "", f"{wall * 1000:.1f} ms", "", "", style="bold")
+        Console(stderr=True).print(table)
+
+
+class _Span:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings: Timings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+_timings = None
+_NO_SPAN = nullcontext()
+
+
+def enable_timings() -> Timings:
+    global _timings
+    _timings = Timings()
+    _timings.add("imports", time.perf_counter() - imported_at)
+    return _timings
+
+
+def span(name: str):
+    """
+    Context manager timing the code it wraps as the phase name.
+
+    Does nothing unless --timings is set, so spans can stay in hot paths.
+    """
+    if _timings is None:
+        return _NO_SPAN
+    return _Span(_timings, name)
+
+
+def record(name: str, seconds: float):
+    """
+    Adds a duration measured somewhere else, like in another process.
+    """
+    if _timings is not None:
+        _timings.add(name, seconds)
+
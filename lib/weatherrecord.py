@@ -20,7 +20,59 @@ class WeatherType(Enum):
     CLOUDS = "clouds"
 
 
+class Units:
+    """
+    Temperature and wind units shared by every record of a collection.
+
+    Use Units.get() so records built with the same settings point at the
+    same instance instead of each storing its own copy.
+    """
+
+    __slots__ = ("temp", "wind")
+    _shared = {}
+
+    def __init__(self, temp: str = "f", wind: str = "m"):
+        self.temp = temp
+        self.wind = wind
+
+    @classmethod
+    def get(cls, temp: str = "f", wind: str = "m") -> "Units":
+        units = cls._shared.get((temp, wind))
+        if units is None:
+            units = cls._shared[(temp, wind)] = cls(temp, wind)
+        return units
+
+    def __reduce__(self):
+        # Unpickled records still share one instance per unit pair
+        return (Units.get, (self.temp, self.wind))
+
+
 class WeatherRecord:
+    """
+    One point of weather data (current or one hour of the forecast).
+
+    Records use __slots__ and only keep the fields they need from the API.
+    Formatted values are built on first use and memoized, so treat a record
+    as read only once it has been created.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "temp",
+        "feels_like",
+        "humidity",
+        "wind_speed",
+        "wind_gust",
+        "weather_id",
+        "weather_main",
+        "weather_description",
+        "rain",
+        "snow",
+        "pop",
+        "units",
+        "_formatted",
+    )
+
     def __init__(
         self,
         timestamp: int,
@@ -33,8 +85,9 @@ class WeatherRecord:
         rain: float | None = None,
         snow: float | None = None,
         pop: float | None = None,
-        temp_units: "f" | "c" = "f",
-        wind_units: "m" | "k" = "m",
+        temp_units: str = "f",
+        wind_units: str = "m",
+        units: Units | None = None,
     ):
         self.timestamp = timestamp
         self.temp = temp
@@ -42,44 +95,120 @@ class WeatherRecord:
         self.humidity = humidity
         self.wind_speed = wind_speed
         self.wind_gust = wind_gust
-        self.weather = weather
+        self.weather_id = weather["id"]
+        self.weather_main = weather["main"]
+        self.weather_description = weather["description"]
         self.rain = rain
         self.snow = snow
         self.pop = pop
-        self.temp_units = temp_units
-        self.wind_units = wind_units
+        self.units = units if units is not None else Units.get(temp_units, wind_units)
+        self._formatted = None
+
+    @classmethod
+    def from_api(
+        cls,
+        data: dict,
+        temp_units: str = "f",
+        wind_units: str = "m",
+        units: Units | None = None,
+    ):
+        """
+        Builds a record from a `current` or `hourly` item of the One Call API.
+        """
+        wind_gust = None
+        rain = None
+        snow = None
+        pop = None
+        if "wind_gust" in data:
+            wind_gust = data["wind_gust"]
+        if "rain" in data:
+            rain = data["rain"]["1h"]
+        if "snow" in data:
+            snow = data["snow"]["1h"]
+        if "pop" in data:
+            pop = data["pop"]
+        return cls(
+            data["dt"],
+            data["temp"],
+            data["feels_like"],
+            data["humidity"],
+            data["wind_speed"],
+            data["weather"][0],
+            wind_gust=wind_gust,
+            rain=rain,
+            snow=snow,
+            pop=pop,
+            temp_units=temp_units,
+            wind_units=wind_units,
+            units=units,
+        )
+
+    @property
+    def temp_units(self) -> str:
+        return self.units.temp
+
+    @property
+    def wind_units(self) -> str:
+        return self.units.wind
+
+    @property
+    def weather(self) -> dict:
+        return {
+            "id": self.weather_id,
+            "main": self.weather_main,
+            "description": self.weather_description,
+        }
+
+    def _memo(self, key: str, build) -> str:
+        formatted = self._formatted
+        if formatted is None:
+            formatted = self._formatted = {}
+        value = formatted.get(key)
+        if value is None:
+            value = formatted[key] = build()
+        return value
+
+    def _format_temp(self, value: float) -> str:
+        if self.units.temp == "c":
+            return kelvin_to_c(value)
+        else:
+            return kelvin_to_f(value)
 
-    def get_datetime(self, t_format: "hourly" | "daily" | "current" | "filename"):
+    def _format_wind(self, value: float) -> str:
+        if self.units.wind == "k":
+            return wind_speed_to_kmph(value)
+        else:
+            return wind_speed_to_mph(value)
+
+    def _format_precipitation(self, value: float | None) -> str:
+        if value:
+            if self.units.wind == "k":
+                return f"{value} mm"
+            return mm_to_in(value)
+        else:
+            return "N/A"
+
+    def get_datetime(self, t_format: str):
         match t_format:
-            case "hourly":
-                return timestamp_to_fmt_text(self.timestamp, "hourly")
-            case "filename":
-                return timestamp_to_fmt_text(self.timestamp, "filename")
-            case "daily":
-                return timestamp_to_fmt_text(self.timestamp, "daily")
+            case "hourly" | "filename" | "daily":
+                pass
             case "generic" | "current" | _:
-                return timestamp_to_fmt_text(self.timestamp, "generic")
+                t_format = "generic"
+        return self._memo(
+            t_format, lambda: timestamp_to_fmt_text(self.timestamp, t_format)
+        )
 
     def get_temp(self):
-        if self.temp_units == "c":
-            return kelvin_to_c(self.temp)
-        else:
-            return kelvin_to_f(self.temp)
+        return self._memo("temp", lambda: self._format_temp(self.temp))
 
     def get_feels_like(self):
-        if self.temp_units == "c":
-            return kelvin_to_c(self.feels_like)
-        else:
-            return kelvin_to_f(self.feels_like)
+        return self._memo("feels_like", lambda: self._format_temp(self.feels_like))
 
     def get_humidity(self):
         return f"{self.humidity}%"
 
     def get_wind_speed(self):
-        if self.wind_units == "k":
-            return wind_speed_to_kmph(self.wind_speed)
-        else:
-            return wind_speed_to_mph(self.wind_speed)
+        return self._memo("wind_speed", lambda: self._format_wind(self.wind_speed))
 
     def has_wind_gust(self):
         if self.wind_gust:
@@ -91,16 +220,13 @@ class WeatherRecord:
         if self.wind_gust is None:
             return "N/A"
 
-        if self.wind_units == "k":
-            return wind_speed_to_kmph(self.wind_gust)
-        else:
-            return wind_speed_to_mph(self.wind_gust)
+        return self._memo("wind_gust", lambda: self._format_wind(self.wind_gust))
 
     def get_weather_condition(self):
-        return f"{self.weather["main"]}: {self.weather["description"]}"
+        return f"{self.weather_main}: {self.weather_description}"
 
     def get_weather_category(self) -> WeatherType:
-        weather_code = self.weather["id"]
+        weather_code = self.weather_id
         if weather_code >= 200 and weather_code < 300:
             return WeatherType.THUNDERSTORM
         elif weather_code >= 300 and weather_code < 400:
@@ -125,12 +251,7 @@ class WeatherRecord:
             return False
 
     def get_rain(self):
-        if self.rain:
-            if self.wind_units == "k":
-                return f"{self.rain} mm"
-            return mm_to_in(self.rain)
-        else:
-            return "N/A"
+        return self._memo("rain", lambda: self._format_precipitation(self.rain))
 
     def has_snow(self):
         if self.snow:
@@ -139,12 +260,7 @@ class WeatherRecord:
             return False
 
     def get_snow(self):
-        if self.snow:
-            if self.wind_units == "k":
-                return f"{self.snow} mm"
-            return mm_to_in(self.snow)
-        else:
-            return "N/A"
+        return self._memo("snow", lambda: self._format_precipitation(self.snow))
 
     def has_pop(self):
         if self.pop:
@@ -162,6 +278,8 @@ class WeatherRecord:
 
 
 class DailyWeatherRecord(WeatherRecord):
+    __slots__ = ("summary", "min_temp", "max_temp")
+
     def __init__(
         self,
         timestamp: int,
@@ -178,6 +296,7 @@ class DailyWeatherRecord(WeatherRecord):
         snow: float | None = None,
         temp_units: str = "f",
         wind_units: str = "m",
+        units: Units | None = None,
     ):
         avg_temp = (max_temp + min_temp) / 2
         avg_feels_like = (
@@ -200,22 +319,55 @@ class DailyWeatherRecord(WeatherRecord):
             pop=pop,
             temp_units=temp_units,
             wind_units=wind_units,
+            units=units,
         )
         self.summary = summary
         self.min_temp = min_temp
         self.max_temp = max_temp
 
+    @classmethod
+    def from_api(
+        cls,
+        data: dict,
+        temp_units: str = "f",
+        wind_units: str = "m",
+        units: Units | None = None,
+    ):
+        """
+        Builds a record from a `daily` item of the One Call API.
+        """
+        wind_gust = None
+        rain = None
+        snow = None
+        if "wind_gust" in data:
+            wind_gust = data["wind_gust"]
+        if "rain" in data:
+            rain = data["rain"]
+        if "snow" in data:
+            snow = data["snow"]
+        return cls(
+            data["dt"],
+            data["summary"],
+            data["temp"]["min"],
+            data["temp"]["max"],
+            data["feels_like"],
+            data["humidity"],
+            data["wind_speed"],
+            data["pop"],
+            data["weather"][0],
+            wind_gust=wind_gust,
+            rain=rain,
+            snow=snow,
+            temp_units=temp_units,
+            wind_units=wind_units,
+            units=units,
+        )
+
     def get_min_temp(self):
-        if self.temp_units == "c":
-            return kelvin_to_c(self.min_temp)
-        else:
-            return kelvin_to_f(self.min_temp)
+        return self._memo("min_temp", lambda: self._format_temp(self.min_temp))
 
     def get_max_temp(self):
-        if self.temp_units == "c":
-            return kelvin_to_c(self.max_temp)
-        else:
-            return kelvin_to_f(self.max_temp)
+        return self._memo("max_temp", lambda: self._format_temp(self.max_temp))
 
     def get_summary(self):
         return self.summary
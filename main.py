@@ -1,33 +1,511 @@
-from typing import Annotated
+# Imported first so --timings can report the time spent importing the rest
+from lib import timing
+from typing import Annotated, Callable, TYPE_CHECKING
 import typer
 from rich import print
-from rich.table import Table
-from rich.console import Console
 import os
-from dotenv import load_dotenv
-import requests
-from lib.weatherrecord import WeatherRecord, DailyWeatherRecord
-from lib.alerts import WeatherAlert
-from lib.images import current_to_image
-
-load_dotenv()
-OW_API_KEY = os.environ.get("OPEN_WEATHER_MAP_API_KEY", "")
-OW_API_URL = os.environ.get("WEATHER_API_URL", "")
+import sys
+from lib.weatherrecord import Units
+from lib.engine import (
+    View,
+    CurrentView,
+    HourlyView,
+    DailyView,
+    ForecastEngine,
+    all_forecasts,
+    parse_view,
+    MAX_HOURS,
+    MAX_DAYS,
+)
+from lib.coords import (
+    parse_coords,
+    normalize_coords,
+    coords_grid,
+    read_coords_file,
+    CoordsError,
+)
+
+# Heavier modules (requests, rich tables, Pillow, dotenv) are imported inside
+# the commands that need them so `--help` and simple commands start fast.
+if TYPE_CHECKING:
+    from lib.cache import ResponseCache
+    from lib.images import ImageOptions
+    from lib.stream import OutputWriter
+    from lib.engine import Hook
+
+OW_API_KEY = ""
+OW_API_URL = ""
+# Grid COORDS are snapped to, checked once by check_env_vars()
+COORDS_GRID = None
+# Where errors and notices go, stderr once a --format writer owns stdout
+MESSAGE_FILE = None
 app = typer.Typer()
-console = Console()
+
+# Arguments and options shared by the forecast commands
+CoordsArgument = Annotated[
+    list[str] | None,
+    typer.Argument(help="One or more <lat>,<lon>", show_default=False),
+]
+TMetricOption = Annotated[
+    str,
+    typer.Option(
+        "--t-metric",
+        "-t",
+        help="'c' for Celcius 'f' for Fahrenheit.",
+        show_default="Fahrenheit",
+    ),
+]
+WMetricOption = Annotated[
+    str,
+    typer.Option(
+        "--w-metric",
+        "-w",
+        help="'m' for mph. 'k' for kmph.",
+        show_default="mph",
+    ),
+]
+FormatOption = Annotated[
+    str,
+    typer.Option(
+        "--format",
+        help="'table', or 'json', 'ndjson', 'csv', 'lines' or 'parquet' for other programs.",
+    ),
+]
+AlertsFileOption = Annotated[
+    str | None,
+    typer.Option(
+        "--alerts-file",
+        help="File the weather alerts are written to with --format ndjson, csv, lines or parquet.",
+        show_default="in the output for ndjson and lines, left out for csv and parquet",
+    ),
+]
+NoCacheOption = Annotated[
+    bool,
+    typer.Option(
+        "--no-cache",
+        help="if flag present, skips the local response cache",
+        show_default="False",
+    ),
+]
+MaxAgeOption = Annotated[
+    int | None,
+    typer.Option(
+        "--max-age",
+        help="Max age in seconds of a cached response that can be reused.",
+        show_default="10 min for weather, forever for locations",
+    ),
+]
+CoordsFileOption = Annotated[
+    str | None,
+    typer.Option(
+        "--coords-file",
+        "-f",
+        help="File with one <lat>,<lon> per line. '-' reads from stdin.",
+        show_default=False,
+    ),
+]
+ConcurrencyOption = Annotated[
+    int,
+    typer.Option(
+        "--concurrency",
+        "-c",
+        help="How many locations are fetched at the same time.",
+        min=1,
+    ),
+]
+RateLimitOption = Annotated[
+    float | None,
+    typer.Option(
+        "--rate-limit",
+        help="Max requests per second sent to the API host.",
+        show_default="no limit",
+    ),
+]
+ChangesOption = Annotated[
+    bool,
+    typer.Option(
+        "--changes",
+        help="Only show forecast items and alerts that changed since the last --changes run.",
+    ),
+]
+AnimationOption = Annotated[
+    bool,
+    typer.Option(
+        "--to-image",
+        "-i",
+        help="if flag present, will export an animation with one frame per hour to downloads folder",
+        show_default="False",
+    ),
+]
+AnimationDirOption = Annotated[
+    str | None,
+    typer.Option(
+        "--image-dir",
+        help="Folder the animation is saved to. '-' writes it to stdout instead.",
+        show_default="~/Downloads",
+    ),
+]
+AnimationFormatOption = Annotated[
+    str,
+    typer.Option(
+        "--image-format",
+        help="'webp', 'png', 'gif' or 'avif' if Pillow supports it.",
+    ),
+]
+FrameMsOption = Annotated[
+    int,
+    typer.Option(
+        "--frame-ms",
+        help="How long each hour is shown, in milliseconds.",
+        min=20,
+    ),
+]
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    timings: Annotated[
+        bool,
+        typer.Option(
+            "--timings",
+            help="if flag present, prints how long each phase of the command took to stderr",
+            show_default="False",
+        ),
+    ] = False,
+    profile: Annotated[
+        str | None,
+        typer.Option(
+            "--profile",
+            help="Runs the command under cProfile and saves the stats to this file.",
+            show_default=False,
+        ),
+    ] = None,
+):
+    """
+    Weather from the OpenWeather One Call API in the terminal.
+
+    --timings and --profile go before the command, ie: main.py --timings current <lat>,<lon>
+    """
+    if timings:
+        ctx.call_on_close(timing.enable_timings().print_report)
+    if profile is not None:
+        import cProfile
+
+        # Since Python 3.12 the profiler sees the fetch threads too
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def save_profile():
+            profiler.disable()
+            profiler.dump_stats(profile)
+            print(
+                f"Profile saved to [bold green]{profile}[/bold green]", file=sys.stderr
+            )
+
+        ctx.call_on_close(save_profile)
+    # Loaded before any command runs, since the cache, ledger, store and
+    # gazetteer read their settings from the environment too
+    with timing.span("dotenv"):
+        from dotenv import load_dotenv
+
+        load_dotenv()
+
+
+def print_message(*objects):
+    """
+    Prints an error or notice, to stdout with the rich tables or to stderr
+    when stdout holds --format output other tools read.
+    """
+    print(*objects, file=MESSAGE_FILE)
 
 
 def check_env_vars():
+    global OW_API_KEY, OW_API_URL, COORDS_GRID
+    OW_API_KEY = os.environ.get("OPEN_WEATHER_MAP_API_KEY", "")
+    OW_API_URL = os.environ.get("WEATHER_API_URL", "")
+
     if OW_API_URL == "":
-        print(
+        print_message(
             "[bold red]WEATHER_API_URL is not set in the enviroment variables[/bold red]"
         )
         raise typer.Exit(1)
     if OW_API_KEY == "":
-        print(
+        print_message(
             "[bold red]OPEN_WEATHER_MAP_API_KEY is not set in the enviroment variables[/bold red]"
         )
         raise typer.Exit(1)
+    try:
+        COORDS_GRID = coords_grid()
+    except CoordsError as err:
+        print_message(f"[bold red]Error:[/bold red] {err}. Exiting...")
+        raise typer.Exit(1)
+
+
+def validate_units(t_metric: str, w_metric: str):
+    if t_metric != "c" and t_metric != "f":
+        print_message(
+            "[bold red]Error:[/bold red] --t-metric should be either 'f' or 'c'. Exiting..."
+        )
+        raise typer.Exit(1)
+
+    if w_metric != "m" and w_metric != "k":
+        print_message(
+            "[bold red]Error:[/bold red] --w-metric should be either 'm' or 'k'. Exiting..."
+        )
+        raise typer.Exit(1)
+
+
+def get_image_options(
+    image_dir: str | None,
+    image_format: str,
+    quality: int | None = None,
+    subsampling: str | None = None,
+    optimize: bool = False,
+    progressive: bool = False,
+    output_count: int = 1,
+    animated: bool = False,
+) -> "ImageOptions":
+    """
+    Checks the image options of a command. output_count is the number of
+    images it will write, only one can be written to stdout.
+    """
+    from lib.images import (
+        ImageOptions,
+        ANIMATED_FORMATS,
+        check_backgrounds,
+        MissingBackgroundError,
+    )
+
+    try:
+        image_options = ImageOptions(
+            image_dir, image_format, quality, subsampling, optimize, progressive
+        )
+    except ValueError as err:
+        print_message(f"[bold red]Error:[/bold red] {err}. Exiting...")
+        raise typer.Exit(1)
+    try:
+        check_backgrounds()
+    except MissingBackgroundError as err:
+        print_message(
+            f"[bold red]Error: {err} does not exist. Please ensure it exists to continue[/bold red]"
+        )
+        raise typer.Exit(1)
+    if animated and image_options.image_format not in ANIMATED_FORMATS:
+        print_message(
+            f"[bold red]Error:[/bold red] --image-format must be one of {", ".join(ANIMATED_FORMATS)} for an animation. Exiting..."
+        )
+        raise typer.Exit(1)
+    if image_options.to_stdout and output_count > 1:
+        print_message(
+            "[bold red]Error:[/bold red] --image-dir - only works with one COORDS. Exiting..."
+        )
+        raise typer.Exit(1)
+    return image_options
+
+
+def get_output_writer(
+    output_format: str,
+    kind: str,
+    alerts_file: str | None = None,
+    changes: bool = False,
+) -> "OutputWriter | None":
+    """
+    Checks --format and --alerts-file. Returns None for the default rich
+    output, or a writer for the rows of kind ('search', 'current', 'hourly'
+    or 'daily'), with the change field of --changes when changes is set.
+    Errors and notices go to stderr from then on with a writer.
+    """
+    global MESSAGE_FILE
+    if output_format != "table":
+        MESSAGE_FILE = sys.stderr
+    if alerts_file is not None and output_format in ("table", "json"):
+        print_message(
+            "[bold red]Error:[/bold red] --alerts-file only works with --format ndjson, csv, lines or parquet. Exiting..."
+        )
+        raise typer.Exit(1)
+    if output_format == "table":
+        return None
+    from lib.stream import make_writer, OUTPUT_FORMATS
+
+    if output_format not in OUTPUT_FORMATS:
+        print_message(
+            f"[bold red]Error:[/bold red] --format should be one of table, {", ".join(OUTPUT_FORMATS)}. Exiting..."
+        )
+        raise typer.Exit(1)
+    try:
+        return make_writer(output_format, kind, alerts_file, changes)
+    except ImportError:
+        print_message(
+            "[bold red]Error:[/bold red] --format parquet needs pyarrow, install it with `uv sync --extra parquet`. Exiting..."
+        )
+        raise typer.Exit(1)
+    except OSError as err:
+        print_message("[bold red]Error:[/bold red] could not open --alerts-file")
+        print_message(err)
+        raise typer.Exit(1)
+
+
+def get_coords_list(coords: list[str] | None, coords_file: str | None) -> list[str]:
+    """
+    Collects the coords given as arguments and in --coords-file and checks
+    each one is a valid '<lat>,<lon>'.
+    """
+    coords_list = list(coords or [])
+    if coords_file is not None:
+        try:
+            coords_list.extend(read_coords_file(coords_file))
+        except OSError as err:
+            print_message(
+                "[bold red]Error:[/bold red] could not read --coords-file"
+            )
+            print_message(err)
+            raise typer.Exit(1)
+    if len(coords_list) == 0:
+        print_message(
+            "[bold red]Error:[/bold red] at least one COORDS is required. Exiting..."
+        )
+        raise typer.Exit(1)
+    for coords in coords_list:
+        try:
+            parse_coords(coords)
+        except CoordsError as err:
+            print_message(f"[bold red]Error:[/bold red] {err}. Exiting...")
+            raise typer.Exit(1)
+    return coords_list
+
+
+def get_weather_and_location(
+    coords: str,
+    exclude: str | None,
+    cache: "ResponseCache | None",
+    max_age: int | None,
+) -> tuple[dict, list]:
+    """
+    Fetches One Call data and the reverse geocoded location for COORDS.
+
+    Both requests are sent at the same time. When exclude is None the full
+    One Call payload is fetched so every view can be rendered from it.
+    The payload is decoded with lib.decode, skipping the excluded sections
+    even when the response came from a full payload in the cache. COORDS
+    is snapped to the grid of lib.coords first, and other threads asking
+    for the same grid point at the same time share the API calls and the
+    decoded data.
+    If the offline gazetteer has been built, the location comes from it and
+    only the One Call request is sent.
+    Raises FetchError if either request fails or the daily API budget is
+    spent.
+    """
+    from lib.fetch import fetch_concurrently, FetchError
+    from lib.gazetteer import get_gazetteer
+    from lib.decode import decode_onecall, loads
+    from lib.quota import QuotaExceeded
+
+    lat, lon = normalize_coords(coords, COORDS_GRID)
+    weather_call_params = {
+        "appid": OW_API_KEY,
+        "lat": lat,
+        "lon": lon,
+    }
+    if exclude is not None:
+        weather_call_params["exclude"] = exclude
+    geo_call_params = {
+        "appid": OW_API_KEY,
+        "limit": 3,
+        "lat": lat,
+        "lon": lon,
+    }
+    full_weather_url = f"{OW_API_URL}/data/3.0/onecall"
+    full_geoloc_url = f"{OW_API_URL}/geo/1.0/reverse"
+
+    geoloc_data = []
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        geoloc_data = gazetteer.reverse(float(lat), float(lon))
+    calls = [
+        (full_weather_url, weather_call_params, lambda body: decode_onecall(body, exclude))
+    ]
+    if len(geoloc_data) == 0:
+        calls.append((full_geoloc_url, geo_call_params, loads))
+
+    # Call weather API & Geolocation API
+    try:
+        weather_res, *geoloc_responses = fetch_concurrently(
+            *calls,
+            cache=cache,
+            max_age=max_age,
+        )
+    except QuotaExceeded as err:
+        raise FetchError("[bold red]Error: [/bold red] Out of API budget", err)
+    except ConnectionError as err:
+        raise FetchError("[bold red]Error: [/bold red] Connection error", err)
+    except TimeoutError as err:
+        raise FetchError("[bold red]Error: [/bold red] Timeout error", err)
+    except Exception as err:
+        raise FetchError("[bold red]Error: [/bold red]", err)
+
+    if weather_res.status_code != 200:
+        raise FetchError(
+            f"[bold red]Error:[/bold red] [red]request errored with code {weather_res.status_code}[/red]"
+        )
+
+    for geoloc_res in geoloc_responses:
+        if geoloc_res.status_code != 200:
+            raise FetchError(
+                f"[bold red]Error:[/bold red] [red]request errored with code {geoloc_res.status_code}[/red]"
+            )
+        geoloc_data = geoloc_res.data
+
+    return weather_res.data, geoloc_data
+
+
+def for_each_location(
+    coords_list: list[str],
+    exclude: str | None,
+    no_cache: bool,
+    max_age: int | None,
+    concurrency: int,
+    rate_limit: float | None,
+    render: Callable[[dict, list], None],
+):
+    """
+    Fetches every location in coords_list and calls render with its weather
+    and geolocation data as soon as that location is ready.
+
+    Up to concurrency locations are fetched at the same time. A location
+    that fails is reported and skipped, and the command exits with 1 once
+    the rest are done.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from lib.fetch import FetchError
+    from lib.client import set_rate_limit
+    from lib.cache import get_cache
+
+    set_rate_limit(rate_limit)
+    cache = None if no_cache else get_cache()
+    failed = False
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(get_weather_and_location, coords, exclude, cache, max_age): coords
+            for coords in coords_list
+        }
+        for future in as_completed(futures):
+            # Done futures hold their payload, drop them so memory doesn't
+            # grow with the number of locations
+            coords = futures.pop(future)
+            try:
+                weather_data, geoloc_data = future.result()
+            except FetchError as err:
+                print_message(err.message)
+                if err.detail is not None:
+                    print_message(err.detail)
+                if len(coords_list) > 1:
+                    print_message(f"[red]Skipped {coords}[/red]")
+                failed = True
+                continue
+            render(weather_data, geoloc_data)
+    if failed:
+        raise typer.Exit(1)
 
 
 @app.command()
@@ -38,39 +516,68 @@ def SearchCity(
             help="<city name>,<state code>,<country code> ie: 'San Antonio,TX,US'"
         ),
     ],
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    output_format: FormatOption = "table",
 ):
     """
     Gets the latitude and longitude needed for the other commands.
 
     Copy the values in blue and paste into other commands.
     """
-    print(f"You are searching for [bold green]{name}[/bold green]")
+    writer = get_output_writer(output_format, "search")
+    if writer is None:
+        print(f"You are searching for [bold green]{name}[/bold green]")
+
+    from lib.gazetteer import get_gazetteer
+
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        print_search_results(gazetteer.search(name, limit=5), writer)
+        return
 
     check_env_vars()
 
+    from lib.fetch import fetch
+    from lib.cache import get_cache
+    from lib.decode import loads
+
     param_payload = {"q": name, "limit": "5", "appid": OW_API_KEY}
     full_url = f"{OW_API_URL}/geo/1.0/direct"
 
     try:
-        res = requests.get(full_url, params=param_payload)
+        res = fetch(
+            full_url,
+            param_payload,
+            cache=None if no_cache else get_cache(),
+            max_age=max_age,
+        )
     except ConnectionError as err:
-        print("[bold red]Error: [/bold red] Connection error")
-        print(err)
+        print_message("[bold red]Error: [/bold red] Connection error")
+        print_message(err)
         raise typer.Exit(1)
     except TimeoutError as err:
-        print("[bold red]Error: [/bold red] Timeout error")
-        print(err)
+        print_message("[bold red]Error: [/bold red] Timeout error")
+        print_message(err)
         raise typer.Exit(1)
     except Exception as err:
-        print("[bold red]Error: [/bold red]")
-        print(err)
+        print_message("[bold red]Error: [/bold red]")
+        print_message(err)
         raise typer.Exit(1)
 
     if res.status_code != 200:
-        print(f"[red]request errored with code {res.status_code}[/red]")
+        print_message(f"[red]request errored with code {res.status_code}[/red]")
         raise typer.Exit(1)
-    data = res.json()
+    print_search_results(loads(res.content), writer)
+
+
+def print_search_results(data: list, writer: "OutputWriter | None" = None):
+    if writer is not None:
+        from lib.stream import search_rows
 
+        writer.write_rows(search_rows(data))
+        writer.close()
+        return
     for item in data:
         print(
             f"[bold yellow]{item["name"]}, {item["state"]}, {item["country"]}[/bold yellow]"
@@ -79,709 +586,705 @@ def SearchCity(
 
 
 @app.command()
-def current(
-    coords: Annotated[
-        str,
-        typer.Argument(help="<lat>,<lon>"),
-    ],
-    t_metric: Annotated[
+def BuildGazetteer(
+    dump: Annotated[
         str,
-        typer.Option(
-            "--t-metric",
-            "-t",
-            help="'c' for Celcius 'f' for Fahrenheit.",
-            show_default="Fahrenheit",
+        typer.Argument(
+            help="GeoNames dump, ie: cities1000.txt from download.geonames.org/export/dump"
         ),
-    ] = "f",
-    w_metric: Annotated[
-        str,
+    ],
+    admin1: Annotated[
+        str | None,
         typer.Option(
-            "--w-metric",
-            "-w",
-            help="'m' for mph. 'k' for kmph.",
-            show_default="mph",
+            "--admin1",
+            help="GeoNames admin1CodesASCII.txt, used to show full state names.",
+            show_default=False,
         ),
-    ] = "m",
-    to_image: Annotated[
-        bool,
+    ] = None,
+    min_population: Annotated[
+        int,
         typer.Option(
-            "--to-image",
-            "-i",
-            help="if flag present, will export an image of weather to downloads folder",
-            show_default="False",
+            "--min-population",
+            help="Skip places with fewer people than this.",
         ),
-    ] = False,
+    ] = 0,
 ):
     """
-    Gets current weather data for COORDS.
+    Builds the offline gazetteer used by searchcity and the forecast commands.
 
-    COORDS should be formatted as '<lat>,<lon>'.
-    Latitude and Longitude can be fetched from searchcity command.
+    Once built, city searches and the location shown above each forecast
+    are looked up locally instead of calling the geocoding API.
     """
-    # Interpret CLI options for query params
-    if t_metric != "c" and t_metric != "f":
-        print(
-            "[bold red]Error:[/bold red] --t-metric should be either 'f' or 'c'. Exiting..."
-        )
-        raise typer.Exit(1)
-
-    if w_metric != "m" and w_metric != "k":
-        print(
-            "[bold red]Error:[/bold red] --w-metric should be either 'm' or 'k'. Exiting..."
-        )
-        raise typer.Exit(1)
-
-    check_env_vars()
-
-    parsed_coords = coords.split(",")
-    weather_call_params = {
-        "appid": OW_API_KEY,
-        "exclude": "minutely,hourly,daily",
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    geo_call_params = {
-        "appid": OW_API_KEY,
-        "limit": 3,
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    full_weather_url = f"{OW_API_URL}/data/3.0/onecall"
-    full_geoloc_url = f"{OW_API_URL}/geo/1.0/reverse"
+    import sqlite3
+    from lib.gazetteer import Gazetteer, gazetteer_path, read_geonames
 
-    # Call weather API for current weather & Geolocation API
     try:
-        weather_res = requests.get(full_weather_url, params=weather_call_params)
-        geoloc_res = requests.get(full_geoloc_url, params=geo_call_params)
-    except ConnectionError as err:
-        print("[bold red]Error: [/bold red] Connection error")
+        places = read_geonames(dump, admin1, min_population)
+    except (OSError, ValueError) as err:
+        print("[bold red]Error: [/bold red] could not read the GeoNames dump")
         print(err)
         raise typer.Exit(1)
-    except TimeoutError as err:
-        print("[bold red]Error: [/bold red] Timeout error")
-        print(err)
-        raise typer.Exit(1)
-    except Exception as err:
-        print("[bold red]Error: [/bold red]")
-        print(err)
-        raise typer.Exit(1)
-
-    if weather_res.status_code != 200:
-        print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {weather_res.status_code}[/red]"
-        )
-        raise typer.Exit(1)
 
-    if geoloc_res.status_code != 200:
-        print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {geoloc_res.status_code}[/red]"
-        )
+    path = gazetteer_path()
+    try:
+        gazetteer = Gazetteer.build(places, path)
+    except (OSError, sqlite3.Error) as err:
+        print(f"[bold red]Error: [/bold red] could not write the gazetteer to {path}")
+        print(err)
         raise typer.Exit(1)
-
-    # Prepare Data for Console output
-    weather_data = weather_res.json()
-    geoloc_data = geoloc_res.json()
-
-    wind_gust = None
-    rain = None
-    snow = None
-    pop = None
-
-    if "rain" in weather_data["current"]:
-        rain = weather_data["current"]["rain"]["1h"]
-
-    if "snow" in weather_data["current"]:
-        snow = weather_data["current"]["snow"]["1h"]
-
-    if "wind_gust" in weather_data["current"]:
-        wind_gust = weather_data["current"]["wind_gust"]
-
-    alerts = []
-    if "alerts" in weather_data:
-        for alert_data in weather_data["alerts"]:
-            alert_record = WeatherAlert(
-                alert_data["sender_name"],
-                alert_data["event"],
-                alert_data["start"],
-                alert_data["end"],
-                alert_data["description"],
-            )
-            alerts.append(alert_record)
-
-    w_record = WeatherRecord(
-        weather_data["current"]["dt"],
-        weather_data["current"]["temp"],
-        weather_data["current"]["feels_like"],
-        weather_data["current"]["humidity"],
-        weather_data["current"]["wind_speed"],
-        weather_data["current"]["weather"][0],
-        wind_gust=wind_gust,
-        rain=rain,
-        snow=snow,
-        pop=pop,
-        temp_units=t_metric,
-        wind_units=w_metric,
-    )
-
-    # Output of data
-    city, state, country = (
-        geoloc_data[0]["name"],
-        geoloc_data[0]["state"],
-        geoloc_data[0]["country"],
+    print(
+        f"Indexed [bold green]{len(gazetteer)}[/bold green] places to [bold green]{path}[/bold green]"
     )
-    print(f"Current weather in [green]{city}, {state}, {country}[/green]")
-    print(f"\n{w_record.get_datetime("current")}")
-    print(w_record.get_weather_condition())
-    table = Table("Measurement", "Value")
-    table.add_row("Temp", w_record.get_temp())
-    table.add_row("Feels like", w_record.get_feels_like())
-    table.add_row("Humidity", w_record.get_humidity())
-    table.add_row("Wind Speed", w_record.get_wind_speed())
-    if w_record.has_wind_gust():
-        table.add_row("Wind Gust", w_record.get_wind_gust())
-    if w_record.has_rain():
-        table.add_row("Rain", w_record.get_rain())
-    if w_record.has_snow():
-        table.add_row("Snow", w_record.get_snow())
-    console.print(table)
-    if to_image:
-        current_to_image(w_record, city, state, country)
-
-    for alert in alerts:
-        print(f"\n\n[bold red]Alert from {alert.get_sender()}[/bold red]")
-        print(f"[yellow]{alert.get_event()}[/yellow]")
-        print(
-            f"From [green]{alert.get_start()}[/green] until [green]{alert.get_end()}[/green]"
-        )
-        print(alert.get_description())
 
 
-@app.command("12hours")
-def _12hours(
+@app.command()
+def serve(
     coords: Annotated[
-        str,
-        typer.Argument(help="<lat>,<lon>"),
-    ],
-    t_metric: Annotated[
-        str,
+        list[str] | None,
+        typer.Argument(
+            help="Locations to keep refreshed, <lat>,<lon>", show_default=False
+        ),
+    ] = None,
+    coords_file: CoordsFileOption = None,
+    refresh: Annotated[
+        int,
         typer.Option(
-            "--t-metric",
-            "-t",
-            help="'c' for Celcius 'f' for Fahrenheit.",
-            show_default="Fahrenheit",
+            "--refresh",
+            help="Seconds between two refreshes of a location.",
+            min=60,
         ),
-    ] = "f",
-    w_metric: Annotated[
-        str,
+    ] = 600,
+    daily_budget: Annotated[
+        int,
+        typer.Option(
+            "--daily-budget",
+            help="Max weather calls per day spent on refreshes, slows --refresh down if needed.",
+            min=1,
+        ),
+    ] = 1000,
+    socket: Annotated[
+        str | None,
         typer.Option(
-            "--w-metric",
-            "-w",
-            help="'m' for mph. 'k' for kmph.",
-            show_default="mph",
+            "--socket",
+            help="Unix socket the other commands connect to.",
+            show_default="$WEATHER_DAEMON_SOCKET or the cache folder",
         ),
-    ] = "m",
+    ] = None,
 ):
     """
-    Gets the next 12 hour forecase for the location at COORDS.
+    Runs in the foreground keeping responses warm for the other commands.
 
-    COORDS should be formatted as '<lat>,<lon>'.
-    Latitude and Longitude can be fetched from searchcity command.
+    COORDS are refreshed in the background, and every command run while
+    the daemon is up asks it first, so repeated runs skip the API and the
+    connection setup.
     """
-    # Interpret CLI options for query params
-    if t_metric != "c" and t_metric != "f":
-        print(
-            "[bold red]Error:[/bold red] --t-metric should be either 'f' or 'c'. Exiting..."
-        )
-        raise typer.Exit(1)
-
-    if w_metric != "m" and w_metric != "k":
-        print(
-            "[bold red]Error:[/bold red] --w-metric should be either 'm' or 'k'. Exiting..."
-        )
-        raise typer.Exit(1)
+    from pathlib import Path
+    from lib.daemon import WeatherDaemon, socket_path
 
+    coords_list = []
+    if coords or coords_file is not None:
+        coords_list = get_coords_list(coords, coords_file)
     check_env_vars()
 
-    parsed_coords = coords.split(",")
-    weather_call_params = {
-        "appid": OW_API_KEY,
-        "exclude": "current,minutely,daily",
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    geo_call_params = {
-        "appid": OW_API_KEY,
-        "limit": 3,
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    full_weather_url = f"{OW_API_URL}/data/3.0/onecall"
-    full_geoloc_url = f"{OW_API_URL}/geo/1.0/reverse"
-
-    # Call weather API for current weather & Geolocation API
+    path = Path(socket).expanduser() if socket is not None else socket_path()
+    daemon = WeatherDaemon(
+        OW_API_URL,
+        OW_API_KEY,
+        [normalize_coords(c, COORDS_GRID) for c in coords_list],
+        refresh,
+        daily_budget,
+        path,
+    )
+    print(
+        f"Serving on [bold green]{path}[/bold green], refreshing [bold green]{len(coords_list)}[/bold green] locations every [bold green]{daemon.refresh_interval():.0f}s[/bold green]"
+    )
     try:
-        weather_res = requests.get(full_weather_url, params=weather_call_params)
-        geoloc_res = requests.get(full_geoloc_url, params=geo_call_params)
-    except ConnectionError as err:
-        print("[bold red]Error: [/bold red] Connection error")
-        print(err)
-        raise typer.Exit(1)
-    except TimeoutError as err:
-        print("[bold red]Error: [/bold red] Timeout error")
+        daemon.serve_forever()
+    except OSError as err:
+        print("[bold red]Error:[/bold red] could not start the daemon")
         print(err)
         raise typer.Exit(1)
-    except Exception as err:
-        print("[bold red]Error: [/bold red]")
-        print(err)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def quota():
+    """
+    Shows the API calls spent today and what's left of the budgets.
+
+    Budgets are shared by every command and the daemon, and set with the
+    WEATHER_DAILY_BUDGET and WEATHER_MINUTE_BUDGET env variables.
+    """
+    from lib.quota import get_ledger
+
+    ledger = get_ledger()
+    if ledger is None:
+        print("[bold red]Error:[/bold red] could not open the call ledger. Exiting...")
         raise typer.Exit(1)
+    usage = ledger.usage()
 
-    if weather_res.status_code != 200:
+    if usage["daily_budget"]:
+        left = max(0, usage["daily_budget"] - usage["daily_used"])
         print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {weather_res.status_code}[/red]"
+            f"One Call requests today: [bold green]{usage['daily_used']}[/bold green] of {usage['daily_budget']}, [bold green]{left}[/bold green] left"
         )
-        raise typer.Exit(1)
-
-    if geoloc_res.status_code != 200:
+    else:
+        print(
+            f"One Call requests today: [bold green]{usage['daily_used']}[/bold green], no daily budget"
+        )
+    print(f"\tResets at {usage['resets']}")
+    if usage["minute_budget"]:
+        print(
+            f"Requests in the last minute: [bold green]{usage['minute_used']}[/bold green] of {usage['minute_budget']}, [bold green]{int(usage['minute_tokens'])}[/bold green] can go out now"
+        )
+    else:
         print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {geoloc_res.status_code}[/red]"
+            f"Requests in the last minute: [bold green]{usage['minute_used']}[/bold green], no per minute budget"
+        )
+    for endpoint, calls in usage["by_endpoint"].items():
+        print(f"\t{endpoint}: {calls} today")
+
+
+def run_forecast(
+    views: list[View],
+    coords: list[str] | None,
+    coords_file: str | None,
+    t_metric: str,
+    w_metric: str,
+    output_format: str,
+    no_cache: bool,
+    max_age: int | None,
+    concurrency: int,
+    rate_limit: float | None,
+    make_hook: Callable[[list[str]], "Hook"] | None = None,
+    spacing: bool = False,
+    full_payload: bool = False,
+    changes: bool = False,
+    alerts_file: str | None = None,
+):
+    """
+    Shared body of the forecast commands.
+
+    Checks the options, then fetches every location and hands it to a
+    ForecastEngine showing views. make_hook builds the image export hook
+    from the list of coords when --to-image is set, and full_payload
+    fetches every section even if views only need one. changes keeps the
+    forecast of each location in the store of lib.forecaststore and only
+    shows what changed since the last run.
+    """
+    writer = get_output_writer(output_format, views[0].kind, alerts_file, changes)
+    validate_units(t_metric, w_metric)
+    coords_list = get_coords_list(coords, coords_file)
+    hooks = []
+    if make_hook is not None:
+        if writer is not None:
+            print_message(
+                "[bold red]Error:[/bold red] --to-image only works with --format table. Exiting..."
+            )
+            raise typer.Exit(1)
+        hooks.append(make_hook(coords_list))
+    if changes and len(hooks) > 0:
+        print_message(
+            "[bold red]Error:[/bold red] --changes doesn't work with --to-image. Exiting..."
         )
         raise typer.Exit(1)
-
-    # Prepare Data for Console output
-    weather_data = weather_res.json()
-    geoloc_data = geoloc_res.json()
-
-    hourly_records = []
-
-    for i in range(12):
-        data = weather_data["hourly"][i]
-        wind_gust = None
-        rain = None
-        snow = None
-        pop = None
-        if "wind_gust" in data:
-            wind_gust = data["wind_gust"]
-        if "rain" in data:
-            rain = data["rain"]["1h"]
-        if "snow" in data:
-            snow = data["snow"]["1h"]
-        if "pop" in data:
-            pop = data["pop"]
-        record = WeatherRecord(
-            data["dt"],
-            data["temp"],
-            data["feels_like"],
-            data["humidity"],
-            data["wind_speed"],
-            data["weather"][0],
-            wind_gust=wind_gust,
-            rain=rain,
-            snow=snow,
-            pop=pop,
-            temp_units=t_metric,
-            wind_units=w_metric,
+    if changes and not all_forecasts(views):
+        print_message(
+            "[bold red]Error:[/bold red] --changes only works with hourly and daily forecasts. Exiting..."
         )
-        hourly_records.append(record)
-
-    alerts = []
-    if "alerts" in weather_data:
-        for alert_data in weather_data["alerts"]:
-            alert_record = WeatherAlert(
-                alert_data["sender_name"],
-                alert_data["event"],
-                alert_data["start"],
-                alert_data["end"],
-                alert_data["description"],
+        raise typer.Exit(1)
+    check_env_vars()
+    store = None
+    if changes:
+        from lib.forecaststore import get_store
+
+        # Opened once the env is checked, so it goes in WEATHER_CACHE_DIR
+        store = get_store()
+        if store is None:
+            print_message(
+                "[bold red]Error:[/bold red] could not open the forecast store. Exiting..."
             )
-            alerts.append(alert_record)
-
-    print(
-        f"12 hour weather for [green]{geoloc_data[0]["name"]}, {geoloc_data[0]["state"]}, {geoloc_data[0]["country"]}[/green]"
+            raise typer.Exit(1)
+
+    engine = ForecastEngine(
+        views,
+        Units.get(t_metric, w_metric),
+        writer,
+        hooks,
+        spacing=spacing,
+        store=store,
     )
-
-    table = Table(
-        "Datetime",
-        "Temp",
-        "Feels Like",
-        "Humidity",
-        "Wind Speed",
-        "Wind Gust",
-        "Condition",
-        "rain",
-        "snow",
-        "pop",
-    )
-    for record in hourly_records:
-        table.add_row(
-            record.get_datetime("hourly"),
-            record.get_temp(),
-            record.get_feels_like(),
-            record.get_humidity(),
-            record.get_wind_speed(),
-            record.get_wind_gust(),
-            record.get_weather_condition(),
-            record.get_rain(),
-            record.get_snow(),
-            record.get_pop(),
-        )
-    console.print(table)
-
-    for alert in alerts:
-        print(f"\n\n[bold red]Alert from {alert.get_sender()}[/bold red]")
-        print(f"[yellow]{alert.get_event()}[/yellow]")
-        print(
-            f"From [green]{alert.get_start()}[/green] until [green]{alert.get_end()}[/green]"
+    ok = True
+    try:
+        for_each_location(
+            coords_list,
+            None if full_payload else engine.exclude,
+            no_cache,
+            max_age,
+            concurrency,
+            rate_limit,
+            engine.process,
         )
-        print(alert.get_description())
+    finally:
+        ok = engine.finish()
+    if not ok:
+        raise typer.Exit(1)
 
 
-@app.command("24hours")
-def _24hours(
-    coords: Annotated[
-        str,
-        typer.Argument(help="<lat>,<lon>"),
-    ],
-    t_metric: Annotated[
-        str,
+@app.command()
+def current(
+    coords: CoordsArgument = None,
+    t_metric: TMetricOption = "f",
+    w_metric: WMetricOption = "m",
+    output_format: FormatOption = "table",
+    alerts_file: AlertsFileOption = None,
+    to_image: Annotated[
+        bool,
+        typer.Option(
+            "--to-image",
+            "-i",
+            help="if flag present, will export an image of weather to downloads folder",
+            show_default="False",
+        ),
+    ] = False,
+    image_dir: Annotated[
+        str | None,
         typer.Option(
-            "--t-metric",
-            "-t",
-            help="'c' for Celcius 'f' for Fahrenheit.",
-            show_default="Fahrenheit",
+            "--image-dir",
+            help="Folder the image is saved to. '-' writes the image to stdout instead.",
+            show_default="~/Downloads",
         ),
-    ] = "f",
-    w_metric: Annotated[
+    ] = None,
+    image_format: Annotated[
         str,
         typer.Option(
-            "--w-metric",
-            "-w",
-            help="'m' for mph. 'k' for kmph.",
-            show_default="mph",
+            "--image-format",
+            help="'jpeg', 'webp', 'png' or 'avif' if Pillow supports it.",
+        ),
+    ] = "jpeg",
+    quality: Annotated[
+        int | None,
+        typer.Option(
+            "--quality",
+            help="Encoder quality from 1 to 100 for jpeg, webp and avif.",
+            show_default="Pillow's default",
+            min=1,
+            max=100,
+        ),
+    ] = None,
+    subsampling: Annotated[
+        str | None,
+        typer.Option(
+            "--subsampling",
+            help="Chroma subsampling for jpeg and avif, '4:4:4', '4:2:2' or '4:2:0'.",
+            show_default="Pillow's default",
+        ),
+    ] = None,
+    optimize: Annotated[
+        bool,
+        typer.Option(
+            "--optimize",
+            help="if flag present, spends more time encoding jpeg and png for smaller files",
+            show_default="False",
+        ),
+    ] = False,
+    progressive: Annotated[
+        bool,
+        typer.Option(
+            "--progressive",
+            help="if flag present, saves a progressive jpeg",
+            show_default="False",
+        ),
+    ] = False,
+    grid: Annotated[
+        bool,
+        typer.Option(
+            "--grid",
+            help="if flag present, puts every location on one image instead of one image each",
+            show_default="False",
         ),
-    ] = "m",
+    ] = False,
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    coords_file: CoordsFileOption = None,
+    concurrency: ConcurrencyOption = 8,
+    rate_limit: RateLimitOption = None,
 ):
     """
-    Gets the next 24 hour forecase for the location at COORDS.
+    Gets current weather data for COORDS.
 
     COORDS should be formatted as '<lat>,<lon>'.
+    Several COORDS can be given at once, or read from --coords-file.
     Latitude and Longitude can be fetched from searchcity command.
     """
-    # Interpret CLI options for query params
-    if t_metric != "c" and t_metric != "f":
-        print(
-            "[bold red]Error:[/bold red] --t-metric should be either 'f' or 'c'. Exiting..."
-        )
-        raise typer.Exit(1)
+    make_hook = None
+    if to_image:
 
-    if w_metric != "m" and w_metric != "k":
-        print(
-            "[bold red]Error:[/bold red] --w-metric should be either 'm' or 'k'. Exiting..."
-        )
-        raise typer.Exit(1)
+        def make_hook(coords_list: list[str]) -> "Hook":
+            from lib.images import CurrentImageHook
+
+            image_options = get_image_options(
+                image_dir,
+                image_format,
+                quality,
+                subsampling,
+                optimize,
+                progressive,
+                output_count=1 if grid else len(coords_list),
+            )
+            coords_values = [tuple(map(float, parse_coords(c))) for c in coords_list]
+            return CurrentImageHook(image_options, coords_values, grid)
+
+    run_forecast(
+        [CurrentView()],
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        output_format,
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        make_hook,
+        alerts_file=alerts_file,
+    )
 
-    check_env_vars()
 
-    parsed_coords = coords.split(",")
-    weather_call_params = {
-        "appid": OW_API_KEY,
-        "exclude": "current,minutely,daily",
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    geo_call_params = {
-        "appid": OW_API_KEY,
-        "limit": 3,
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    full_weather_url = f"{OW_API_URL}/data/3.0/onecall"
-    full_geoloc_url = f"{OW_API_URL}/geo/1.0/reverse"
+def run_hourly(
+    hours: int,
+    coords: list[str] | None,
+    coords_file: str | None,
+    t_metric: str,
+    w_metric: str,
+    output_format: str,
+    to_image: bool,
+    image_dir: str | None,
+    image_format: str,
+    frame_ms: int,
+    no_cache: bool,
+    max_age: int | None,
+    concurrency: int,
+    rate_limit: float | None,
+    changes: bool = False,
+    alerts_file: str | None = None,
+):
+    """
+    Shared body of the hourly commands, showing the next hours.
+    """
+    make_hook = None
+    if to_image:
 
-    # Call weather API for current weather & Geolocation API
-    try:
-        weather_res = requests.get(full_weather_url, params=weather_call_params)
-        geoloc_res = requests.get(full_geoloc_url, params=geo_call_params)
-    except ConnectionError as err:
-        print("[bold red]Error: [/bold red] Connection error")
-        print(err)
-        raise typer.Exit(1)
-    except TimeoutError as err:
-        print("[bold red]Error: [/bold red] Timeout error")
-        print(err)
-        raise typer.Exit(1)
-    except Exception as err:
-        print("[bold red]Error: [/bold red]")
-        print(err)
-        raise typer.Exit(1)
+        def make_hook(coords_list: list[str]) -> "Hook":
+            from lib.images import AnimationHook
 
-    if weather_res.status_code != 200:
-        print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {weather_res.status_code}[/red]"
-        )
-        raise typer.Exit(1)
+            image_options = get_image_options(
+                image_dir, image_format, output_count=len(coords_list), animated=True
+            )
+            return AnimationHook(image_options, frame_ms, len(coords_list) > 1)
+
+    run_forecast(
+        [HourlyView(hours)],
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        output_format,
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        make_hook,
+        changes=changes,
+        alerts_file=alerts_file,
+    )
 
-    if geoloc_res.status_code != 200:
-        print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {geoloc_res.status_code}[/red]"
-        )
-        raise typer.Exit(1)
 
-    # Prepare Data for Console output
-    weather_data = weather_res.json()
-    geoloc_data = geoloc_res.json()
-
-    hourly_records = []
-
-    for i in range(24):
-        data = weather_data["hourly"][i]
-        wind_gust = None
-        rain = None
-        snow = None
-        pop = None
-        if "wind_gust" in data:
-            wind_gust = data["wind_gust"]
-        if "rain" in data:
-            rain = data["rain"]["1h"]
-        if "snow" in data:
-            snow = data["snow"]["1h"]
-        if "pop" in data:
-            pop = data["pop"]
-        record = WeatherRecord(
-            data["dt"],
-            data["temp"],
-            data["feels_like"],
-            data["humidity"],
-            data["wind_speed"],
-            data["weather"][0],
-            wind_gust=wind_gust,
-            rain=rain,
-            snow=snow,
-            pop=pop,
-            temp_units=t_metric,
-            wind_units=w_metric,
-        )
-        hourly_records.append(record)
-
-    alerts = []
-    if "alerts" in weather_data:
-        for alert_data in weather_data["alerts"]:
-            alert_record = WeatherAlert(
-                alert_data["sender_name"],
-                alert_data["event"],
-                alert_data["start"],
-                alert_data["end"],
-                alert_data["description"],
-            )
-            alerts.append(alert_record)
+@app.command()
+def hourly(
+    coords: CoordsArgument = None,
+    hours: Annotated[
+        int,
+        typer.Option(
+            "--hours",
+            "-n",
+            help=f"How many hours to show, up to {MAX_HOURS}.",
+            min=1,
+            max=MAX_HOURS,
+        ),
+    ] = 12,
+    t_metric: TMetricOption = "f",
+    w_metric: WMetricOption = "m",
+    output_format: FormatOption = "table",
+    alerts_file: AlertsFileOption = None,
+    to_image: AnimationOption = False,
+    image_dir: AnimationDirOption = None,
+    image_format: AnimationFormatOption = "webp",
+    frame_ms: FrameMsOption = 500,
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    coords_file: CoordsFileOption = None,
+    concurrency: ConcurrencyOption = 8,
+    rate_limit: RateLimitOption = None,
+    changes: ChangesOption = False,
+):
+    """
+    Gets the hourly forecast for the next --hours at COORDS.
 
-    print(
-        f"24 hour weather for [green]{geoloc_data[0]["name"]}, {geoloc_data[0]["state"]}, {geoloc_data[0]["country"]}[/green]"
+    COORDS should be formatted as '<lat>,<lon>'.
+    Several COORDS can be given at once, or read from --coords-file.
+    Latitude and Longitude can be fetched from searchcity command.
+    """
+    run_hourly(
+        hours,
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        output_format,
+        to_image,
+        image_dir,
+        image_format,
+        frame_ms,
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        changes=changes,
+        alerts_file=alerts_file,
     )
 
-    table = Table(
-        "Datetime",
-        "Temp",
-        "Feels Like",
-        "Humidity",
-        "Wind Speed",
-        "Wind Gust",
-        "Condition",
-        "rain",
-        "snow",
-        "pop",
+
+@app.command("12hours")
+def _12hours(
+    coords: CoordsArgument = None,
+    t_metric: TMetricOption = "f",
+    w_metric: WMetricOption = "m",
+    output_format: FormatOption = "table",
+    alerts_file: AlertsFileOption = None,
+    to_image: AnimationOption = False,
+    image_dir: AnimationDirOption = None,
+    image_format: AnimationFormatOption = "webp",
+    frame_ms: FrameMsOption = 500,
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    coords_file: CoordsFileOption = None,
+    concurrency: ConcurrencyOption = 8,
+    rate_limit: RateLimitOption = None,
+    changes: ChangesOption = False,
+):
+    """
+    Gets the next 12 hour forecase for the location at COORDS.
+
+    COORDS should be formatted as '<lat>,<lon>'.
+    Several COORDS can be given at once, or read from --coords-file.
+    Latitude and Longitude can be fetched from searchcity command.
+    """
+    run_hourly(
+        12,
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        output_format,
+        to_image,
+        image_dir,
+        image_format,
+        frame_ms,
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        changes=changes,
+        alerts_file=alerts_file,
     )
-    for record in hourly_records:
-        table.add_row(
-            record.get_datetime("hourly"),
-            record.get_temp(),
-            record.get_feels_like(),
-            record.get_humidity(),
-            record.get_wind_speed(),
-            record.get_wind_gust(),
-            record.get_weather_condition(),
-            record.get_rain(),
-            record.get_snow(),
-            record.get_pop(),
-        )
-    console.print(table)
 
-    for alert in alerts:
-        print(f"\n\n[bold red]Alert from {alert.get_sender()}[/bold red]")
-        print(f"[yellow]{alert.get_event()}[/yellow]")
-        print(
-            f"From [green]{alert.get_start()}[/green] until [green]{alert.get_end()}[/green]"
-        )
-        print(alert.get_description())
 
+@app.command("24hours")
+def _24hours(
+    coords: CoordsArgument = None,
+    t_metric: TMetricOption = "f",
+    w_metric: WMetricOption = "m",
+    output_format: FormatOption = "table",
+    alerts_file: AlertsFileOption = None,
+    to_image: AnimationOption = False,
+    image_dir: AnimationDirOption = None,
+    image_format: AnimationFormatOption = "webp",
+    frame_ms: FrameMsOption = 500,
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    coords_file: CoordsFileOption = None,
+    concurrency: ConcurrencyOption = 8,
+    rate_limit: RateLimitOption = None,
+    changes: ChangesOption = False,
+):
+    """
+    Gets the next 24 hour forecase for the location at COORDS.
 
-@app.command("8days")
-def _8days(
-    coords: Annotated[
-        str,
-        typer.Argument(help="<lat>,<lon>"),
-    ],
-    t_metric: Annotated[
-        str,
-        typer.Option(
-            "--t-metric",
-            "-t",
-            help="'c' for Celcius 'f' for Fahrenheit.",
-            show_default="Fahrenheit",
-        ),
-    ] = "f",
-    w_metric: Annotated[
-        str,
+    COORDS should be formatted as '<lat>,<lon>'.
+    Several COORDS can be given at once, or read from --coords-file.
+    Latitude and Longitude can be fetched from searchcity command.
+    """
+    run_hourly(
+        24,
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        output_format,
+        to_image,
+        image_dir,
+        image_format,
+        frame_ms,
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        changes=changes,
+        alerts_file=alerts_file,
+    )
+
+
+@app.command()
+def daily(
+    coords: CoordsArgument = None,
+    days: Annotated[
+        int,
         typer.Option(
-            "--w-metric",
-            "-w",
-            help="'m' for mph. 'k' for kmph.",
-            show_default="mph",
+            "--days",
+            "-n",
+            help=f"How many days to show, up to {MAX_DAYS}.",
+            min=1,
+            max=MAX_DAYS,
         ),
-    ] = "m",
+    ] = 8,
+    t_metric: TMetricOption = "f",
+    w_metric: WMetricOption = "m",
+    output_format: FormatOption = "table",
+    alerts_file: AlertsFileOption = None,
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    coords_file: CoordsFileOption = None,
+    concurrency: ConcurrencyOption = 8,
+    rate_limit: RateLimitOption = None,
+    changes: ChangesOption = False,
 ):
     """
-    Gets the next 8 days forecast for the location at COORDS.
+    Gets the daily forecast for the next --days at COORDS.
 
     COORDS should be formatted as '<lat>,<lon>'.
+    Several COORDS can be given at once, or read from --coords-file.
     Latitude and Longitude can be fetched from searchcity command.
     """
-    # Interpret CLI options for query params
-    if t_metric != "c" and t_metric != "f":
-        print(
-            "[bold red]Error:[/bold red] --t-metric should be either 'f' or 'c'. Exiting..."
-        )
-        raise typer.Exit(1)
+    run_forecast(
+        [DailyView(days)],
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        output_format,
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        changes=changes,
+        alerts_file=alerts_file,
+    )
 
-    if w_metric != "m" and w_metric != "k":
-        print(
-            "[bold red]Error:[/bold red] --w-metric should be either 'm' or 'k'. Exiting..."
-        )
-        raise typer.Exit(1)
 
-    check_env_vars()
+@app.command("8days")
+def _8days(
+    coords: CoordsArgument = None,
+    t_metric: TMetricOption = "f",
+    w_metric: WMetricOption = "m",
+    output_format: FormatOption = "table",
+    alerts_file: AlertsFileOption = None,
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    coords_file: CoordsFileOption = None,
+    concurrency: ConcurrencyOption = 8,
+    rate_limit: RateLimitOption = None,
+    changes: ChangesOption = False,
+):
+    """
+    Gets the next 8 days forecast for the location at COORDS.
 
-    parsed_coords = coords.split(",")
-    weather_call_params = {
-        "appid": OW_API_KEY,
-        "exclude": "current,minutely,hourly",
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    geo_call_params = {
-        "appid": OW_API_KEY,
-        "limit": 3,
-        "lat": parsed_coords[0],
-        "lon": parsed_coords[1],
-    }
-    full_weather_url = f"{OW_API_URL}/data/3.0/onecall"
-    full_geoloc_url = f"{OW_API_URL}/geo/1.0/reverse"
+    COORDS should be formatted as '<lat>,<lon>'.
+    Several COORDS can be given at once, or read from --coords-file.
+    Latitude and Longitude can be fetched from searchcity command.
+    """
+    run_forecast(
+        [DailyView(8)],
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        output_format,
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        changes=changes,
+        alerts_file=alerts_file,
+    )
 
-    # Call weather API for current weather & Geolocation API
-    try:
-        weather_res = requests.get(full_weather_url, params=weather_call_params)
-        geoloc_res = requests.get(full_geoloc_url, params=geo_call_params)
-    except ConnectionError as err:
-        print("[bold red]Error: [/bold red] Connection error")
-        print(err)
-        raise typer.Exit(1)
-    except TimeoutError as err:
-        print("[bold red]Error: [/bold red] Timeout error")
-        print(err)
-        raise typer.Exit(1)
-    except Exception as err:
-        print("[bold red]Error: [/bold red]")
-        print(err)
-        raise typer.Exit(1)
 
-    if weather_res.status_code != 200:
-        print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {weather_res.status_code}[/red]"
-        )
-        raise typer.Exit(1)
+@app.command()
+def report(
+    coords: CoordsArgument = None,
+    views: Annotated[
+        str,
+        typer.Option(
+            "--views",
+            "-v",
+            help=f"Comma separated views to show: current, <1-{MAX_HOURS}>hours, <1-{MAX_DAYS}>days.",
+        ),
+    ] = "current,12hours,8days",
+    t_metric: TMetricOption = "f",
+    w_metric: WMetricOption = "m",
+    no_cache: NoCacheOption = False,
+    max_age: MaxAgeOption = None,
+    coords_file: CoordsFileOption = None,
+    concurrency: ConcurrencyOption = 8,
+    rate_limit: RateLimitOption = None,
+):
+    """
+    Gets several views of the weather for COORDS from a single API call.
 
-    if geoloc_res.status_code != 200:
-        print(
-            f"[bold red]Error:[/bold red] [red]request errored with code {geoloc_res.status_code}[/red]"
-        )
+    COORDS should be formatted as '<lat>,<lon>'.
+    Several COORDS can be given at once, or read from --coords-file.
+    The full One Call payload is fetched once and every view in --views is
+    rendered from it, so a whole dashboard costs one call instead of four.
+    """
+    selected_views = []
+    for name in views.split(","):
+        if name.strip() == "":
+            continue
+        try:
+            selected_views.append(parse_view(name.strip()))
+        except ValueError as err:
+            print(f"[bold red]Error:[/bold red] --views {err}. Exiting...")
+            raise typer.Exit(1)
+    if len(selected_views) == 0:
+        print("[bold red]Error:[/bold red] --views is empty. Exiting...")
         raise typer.Exit(1)
 
-    # Prepare Data for Console output
-    weather_data = weather_res.json()
-    geoloc_data = geoloc_res.json()
-
-    daily_records = []
-
-    for data in weather_data["daily"]:
-        wind_gust = None
-        rain = None
-        snow = None
-        if "wind_gust" in data:
-            wind_gust = data["wind_gust"]
-        if "rain" in data:
-            rain = data["rain"]
-        if "snow" in data:
-            snow = data["snow"]
-        record = DailyWeatherRecord(
-            data["dt"],
-            data["summary"],
-            data["temp"]["min"],
-            data["temp"]["max"],
-            data["feels_like"],
-            data["humidity"],
-            data["wind_speed"],
-            data["pop"],
-            data["weather"][0],
-            wind_gust=wind_gust,
-            rain=rain,
-            snow=snow,
-            temp_units=t_metric,
-            wind_units=w_metric,
-        )
-        daily_records.append(record)
-
-    alerts = []
-    if "alerts" in weather_data:
-        for alert_data in weather_data["alerts"]:
-            alert_record = WeatherAlert(
-                alert_data["sender_name"],
-                alert_data["event"],
-                alert_data["start"],
-                alert_data["end"],
-                alert_data["description"],
-            )
-            alerts.append(alert_record)
-
-    print(
-        f"8 day weather for [green]{geoloc_data[0]["name"]}, {geoloc_data[0]["state"]}, {geoloc_data[0]["country"]}[/green]"
+    run_forecast(
+        selected_views,
+        coords,
+        coords_file,
+        t_metric,
+        w_metric,
+        "table",
+        no_cache,
+        max_age,
+        concurrency,
+        rate_limit,
+        spacing=True,
+        full_payload=True,
     )
 
-    for record in daily_records:
-        table = Table("Measurement", "Value")
-        table.add_row("Summary", record.get_summary())
-        table.add_row("Min Temp", record.get_min_temp())
-        table.add_row("Max Temp", record.get_max_temp())
-        table.add_row("Avg Temp", record.get_temp())
-        table.add_row("Avg Feels Like", record.get_feels_like())
-        table.add_row("Humidity", record.get_humidity())
-        table.add_row("Wind Speed", record.get_wind_speed())
-        if record.has_wind_gust():
-            table.add_row("Wind Gusts", record.get_wind_gust())
-        if record.has_rain():
-            table.add_row("Rain", record.get_rain())
-        if record.has_snow():
-            table.add_row("Snow", record.get_snow())
-
-        print(f"\nReport for [bold green]{record.get_datetime("daily")}[/bold green]")
-        console.print(table)
-
-    for alert in alerts:
-        print(f"\n\n[bold red]Alert from {alert.get_sender()}[/bold red]")
-        print(f"[yellow]{alert.get_event()}[/yellow]")
-        print(
-            f"From [green]{alert.get_start()}[/green] until [green]{alert.get_end()}[/green]"
-        )
-        print(alert.get_description())
-
 
 if __name__ == "__main__":
     app()
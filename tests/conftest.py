@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from mock_server import MockOpenWeather
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(autouse=True, scope="session")
+def cache_dir(tmp_path_factory):
+    """
+    Keeps the response cache, call ledger and forecast store opened by the
+    tests out of the user's cache folder, and failed calls from retrying.
+    """
+    path = tmp_path_factory.mktemp("cache")
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv("WEATHER_CACHE_DIR", str(path))
+        env.setenv("WEATHER_MAX_RETRIES", "0")
+        yield path
+
+
+@pytest.fixture
+def mock_api():
+    with MockOpenWeather() as mock:
+        yield mock
+
+
+@pytest.fixture
+def cli_env(mock_api, tmp_path) -> dict:
+    """
+    Environment for running main.py against mock_api, with an empty cache
+    folder for each test.
+    """
+    return dict(
+        os.environ,
+        OPEN_WEATHER_MAP_API_KEY="test",
+        WEATHER_API_URL=mock_api.url,
+        WEATHER_CACHE_DIR=str(tmp_path / "cache"),
+        COLUMNS="150",
+    )
+
+
+@pytest.fixture
+def run_cli(cli_env, tmp_path):
+    """
+    Runs main.py as a subprocess with cli_env. Returns the CompletedProcess,
+    its output as text unless text is False.
+    """
+
+    def run(*args: str, text: bool = True) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(ROOT / "main.py"), *args],
+            env=cli_env,
+            cwd=tmp_path,
+            capture_output=True,
+            text=text,
+            timeout=60,
+        )
+
+    return run
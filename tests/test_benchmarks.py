@@ -0,0 +1,69 @@
+import json
+import os
+
+import requests
+
+import commands
+from mock_server import ERROR_STATUSES, MockOpenWeather
+
+
+def test_mock_answers_like_the_api(mock_api):
+    res = requests.get(
+        f"{mock_api.url}/data/3.0/onecall",
+        params={"lat": "30.27111", "lon": "-97.74", "exclude": "minutely,daily"},
+    )
+
+    data = res.json()
+    assert (data["lat"], data["lon"]) == (30.2711, -97.74)
+    assert "current" in data and "hourly" in data
+    assert "minutely" not in data and "daily" not in data
+    assert requests.get(f"{mock_api.url}/geo/1.0/direct").status_code == 200
+    assert requests.get(f"{mock_api.url}/data/2.5/weather").status_code == 404
+    assert mock_api.counts == {
+        "/data/3.0/onecall": 1,
+        "/geo/1.0/direct": 1,
+        "/data/2.5/weather": 1,
+    }
+
+
+def test_injected_errors_are_repeatable():
+    def statuses(seed: int) -> list[int]:
+        with MockOpenWeather(error_rate=0.5, seed=seed) as mock:
+            return [mock.respond("/geo/1.0/reverse")[0] for _ in range(20)]
+
+    first = statuses(1)
+
+    assert first == statuses(1)
+    assert set(first) - {200} <= set(ERROR_STATUSES)
+    assert 0 < first.count(200) < 20
+
+
+def test_compare_flags_slower_scenarios():
+    baseline = {"scenarios": {"a": {"median_s": 0.1}, "b": {"median_s": 0.1}}}
+    results = {
+        "scenarios": {
+            "a": {"median_s": 0.13},
+            "b": {"median_s": 0.11},
+            "new": {"median_s": 1.0},
+        }
+    }
+
+    assert commands.compare(results, baseline, 0.2) == ["a: 100 ms -> 130 ms (+30%)"]
+
+
+def test_run_scenario_counts_requests(mock_api, tmp_path):
+    env = dict(
+        os.environ,
+        OPEN_WEATHER_MAP_API_KEY="test",
+        WEATHER_API_URL=mock_api.url,
+        WEATHER_CACHE_DIR=str(tmp_path / "cache"),
+    )
+
+    result = commands.run_scenario(
+        mock_api, ["current"], commands.make_locations(3), tmp_path, env, runs=1
+    )
+
+    assert result["failed_runs"] == 0
+    assert result["locations"] == 3
+    assert result["requests_per_run"] == 6
+    json.dumps(result)
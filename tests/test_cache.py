@@ -0,0 +1,108 @@
+import pytest
+
+import lib.cache
+from lib.cache import MemoryCache, ResponseCache, make_key
+
+ONECALL = "https://api.openweathermap.org/data/3.0/onecall"
+REVERSE = "https://api.openweathermap.org/geo/1.0/reverse"
+DIRECT = "https://api.openweathermap.org/geo/1.0/direct"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(lib.cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["disk", "memory"])
+def cache(request, tmp_path):
+    if request.param == "disk":
+        return ResponseCache(tmp_path / "responses.sqlite3", max_entries=2)
+    return MemoryCache(max_entries=2)
+
+
+def test_make_key_is_the_same_for_the_same_request():
+    key = make_key(
+        ONECALL,
+        {"appid": "a", "lat": "30.27", "lon": -97.74, "exclude": "minutely,daily"},
+    )
+
+    assert key == (
+        "api.openweathermap.org|/data/3.0/onecall"
+        "|exclude=daily,minutely|lat=30.2700|lon=-97.7400"
+    )
+    assert key == make_key(
+        ONECALL,
+        {"exclude": "daily,minutely,", "lon": "-97.740", "lat": 30.27, "appid": "b"},
+    )
+    assert make_key(ONECALL, {"lat": "30.28", "lon": "-97.74"}) != key
+
+
+def test_make_key_normalizes_other_params():
+    key = make_key(DIRECT, {"q": " Austin,TX ", "limit": "5"})
+
+    assert key == make_key(DIRECT, {"limit": 5, "q": "austin,tx"})
+
+
+def test_get_returns_what_was_set(cache, clock):
+    params = {"appid": "a", "lat": "1", "lon": "2"}
+    assert cache.get(ONECALL, params) is None
+
+    cache.set(ONECALL, params, '{"lat": 1}')
+
+    assert cache.get(ONECALL, {**params, "appid": "b"}) == '{"lat": 1}'
+
+
+def test_entries_expire_with_the_endpoint_ttl(cache, clock):
+    params = {"lat": "1", "lon": "2"}
+    cache.set(ONECALL, params, "weather")
+    cache.set(REVERSE, params, "place")
+
+    clock.now += 10 * 60 + 1
+    assert cache.get(ONECALL, params) is None
+    assert cache.get(ONECALL, params, max_age=3600) == "weather"
+    # Geocoding results never expire unless max_age asks for fresher
+    clock.now += 365 * 24 * 60 * 60
+    assert cache.get(REVERSE, params) == "place"
+    assert cache.get(REVERSE, params, max_age=60) is None
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for lat in ("1", "2"):
+        cache.set(ONECALL, {"lat": lat, "lon": "0"}, lat)
+        clock.now += 1
+    cache.get(ONECALL, {"lat": "1", "lon": "0"})
+    clock.now += 1
+
+    cache.set(ONECALL, {"lat": "3", "lon": "0"}, "3")
+
+    assert cache.get(ONECALL, {"lat": "1", "lon": "0"}) == "1"
+    assert cache.get(ONECALL, {"lat": "2", "lon": "0"}) is None
+    assert cache.get(ONECALL, {"lat": "3", "lon": "0"}) == "3"
+
+
+def test_response_cache_persists_across_runs(tmp_path):
+    path = tmp_path / "responses.sqlite3"
+    ResponseCache(path).set(ONECALL, {"lat": "1"}, "body")
+
+    assert ResponseCache(path).get(ONECALL, {"lat": "1"}) == "body"
+
+
+def test_commands_answer_from_the_cache(mock_api, run_cli):
+    first = run_cli("current", "30.27,-97.74")
+    second = run_cli("current", "30.27,-97.74")
+
+    assert first.stdout == second.stdout
+    assert mock_api.counts == {"/data/3.0/onecall": 1, "/geo/1.0/reverse": 1}
+
+    run_cli("current", "30.27,-97.74", "--no-cache")
+    assert mock_api.counts["/data/3.0/onecall"] == 2
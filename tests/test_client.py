@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from lib import client
+from lib.client import ClientSettings, backoff_delay, retry_after_seconds
+
+
+@pytest.fixture
+def settings(monkeypatch) -> ClientSettings:
+    settings = ClientSettings(max_retries=2, backoff=0)
+    monkeypatch.setattr(client, "_settings", settings)
+    return settings
+
+
+def answer_with(mock, statuses: list[int]) -> list[str]:
+    """
+    Makes mock answer its next requests with statuses, then as usual.
+    Returns the list the path of every request is added to.
+    """
+    respond = mock.respond
+    paths = []
+
+    def scripted(path: str) -> tuple[int, bytes]:
+        paths.append(path)
+        if len(statuses) > 0:
+            return statuses.pop(0), b'{"cod":0,"message":"scripted"}'
+        return respond(path)
+
+    mock.respond = scripted
+    return paths
+
+
+def response_with(headers: dict) -> requests.Response:
+    res = requests.Response()
+    res.headers.update(headers)
+    return res
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(response_with({})) is None
+    assert retry_after_seconds(response_with({"Retry-After": "3"})) == 3.0
+    assert retry_after_seconds(response_with({"Retry-After": "soon"})) is None
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = retry_after_seconds(
+        response_with({"Retry-After": format_datetime(retry_at, usegmt=True)})
+    )
+    assert 28 <= delay <= 30
+
+
+def test_backoff_delay_grows_and_is_capped():
+    assert all(0 <= backoff_delay(2, 0.5) <= 2.0 for _ in range(100))
+    assert all(backoff_delay(20, 0.5) <= client.MAX_BACKOFF for _ in range(100))
+
+
+def test_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("WEATHER_CONNECT_TIMEOUT", "2")
+    monkeypatch.setenv("WEATHER_MAX_RETRIES", "5")
+
+    settings = ClientSettings(read_timeout=7)
+
+    assert (settings.connect_timeout, settings.read_timeout) == (2.0, 7)
+    assert (settings.max_retries, settings.backoff) == (5, 0.5)
+
+
+def test_get_retries_errors_until_a_response(mock_api, settings):
+    paths = answer_with(mock_api, [503, 429])
+
+    res = client.get(f"{mock_api.url}/geo/1.0/reverse", {"lat": "1", "lon": "2"})
+
+    assert res.status_code == 200
+    assert paths == ["/geo/1.0/reverse?lat=1&lon=2"] * 3
+
+
+def test_get_returns_the_last_error_once_retries_run_out(mock_api, settings):
+    paths = answer_with(mock_api, [500, 502, 503, 500])
+
+    res = client.get(f"{mock_api.url}/geo/1.0/reverse")
+
+    assert res.status_code == 503
+    assert len(paths) == 3
+
+
+def test_get_does_not_retry_client_errors(mock_api, settings):
+    paths = answer_with(mock_api, [401])
+
+    assert client.get(f"{mock_api.url}/geo/1.0/reverse").status_code == 401
+    assert len(paths) == 1
+
+
+def test_session_is_shared():
+    assert client.get_session() is client.get_session()
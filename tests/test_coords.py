@@ -0,0 +1,123 @@
+import io
+from decimal import Decimal
+
+import pytest
+
+from lib.coords import (
+    CoordsError,
+    coords_grid,
+    normalize_coords,
+    parse_coords,
+    read_coords_file,
+)
+
+
+def test_parse_coords_keeps_the_parts_as_typed():
+    assert parse_coords("30.2711, -97.7437") == ("30.2711", "-97.7437")
+    assert parse_coords("-90,180") == ("-90", "180")
+
+
+@pytest.mark.parametrize(
+    "coords, message",
+    [
+        ("30.27", "should be formatted as"),
+        ("30.27,-97.74,1", "should be formatted as"),
+        ("north,-97.74", "should only contain numbers"),
+        ("91,0", "outside of the valid lat/lon range"),
+        ("0,-180.5", "outside of the valid lat/lon range"),
+    ],
+)
+def test_parse_coords_rejects_bad_values(coords, message):
+    with pytest.raises(CoordsError, match=message):
+        parse_coords(coords)
+
+
+def test_read_coords_file_skips_blank_and_comment_lines(tmp_path):
+    path = tmp_path / "sites.txt"
+    path.write_text("# Texas\n30.27,-97.74\n\n  # indented comment\n  29.42,-98.49  \n")
+
+    assert read_coords_file(str(path)) == ["30.27,-97.74", "29.42,-98.49"]
+
+
+def test_read_coords_file_reads_stdin(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("1,2\n3,4\n"))
+
+    assert read_coords_file("-") == ["1,2", "3,4"]
+
+
+def test_commands_fetch_every_location(mock_api, run_cli, tmp_path):
+    (tmp_path / "sites.txt").write_text("20,20\n# skipped\n30,30\n")
+
+    result = run_cli(
+        "current", "10,10", "--coords-file", "sites.txt", "--format", "csv"
+    )
+
+    assert result.returncode == 0
+    lines = result.stdout.splitlines()
+    # Locations are written as soon as they're fetched, in any order
+    assert sorted(line.split(",")[3:5] for line in lines[1:]) == [
+        ["10.0", "10.0"],
+        ["20.0", "20.0"],
+        ["30.0", "30.0"],
+    ]
+    assert mock_api.counts["/data/3.0/onecall"] == 3
+
+
+def test_commands_check_every_location_first(mock_api, run_cli):
+    result = run_cli("current", "10,10", "10,north")
+
+    assert result.returncode == 1
+    assert "'10,north' should only contain numbers" in result.stdout
+    assert mock_api.counts == {}
+
+
+@pytest.mark.parametrize(
+    "coords, grid, expected",
+    [
+        ("30.2711,-97.7437", "0.01", ("30.27", "-97.74")),
+        ("30.2751,-97.7449", "0.01", ("30.28", "-97.74")),
+        ("30.2711,-97.7437", "0.05", ("30.25", "-97.75")),
+        ("30.2711,-97.7437", "1", ("30", "-98")),
+        ("-0.001,0.004", "0.01", ("0.00", "0.00")),
+        # 180 and -180 are the same meridian, poles are clamped
+        ("10,179.999", "0.01", ("10.00", "-180.00")),
+        ("10,-180", "0.01", ("10.00", "-180.00")),
+        ("89.9,0", "0.25", ("90.00", "0.00")),
+        ("30.2711, -97.7437", "0", ("30.2711", "-97.7437")),
+    ],
+)
+def test_normalize_coords_snaps_to_the_grid(coords, grid, expected):
+    assert normalize_coords(coords, Decimal(grid)) == expected
+
+
+def test_coords_grid_comes_from_the_environment(monkeypatch):
+    monkeypatch.delenv("WEATHER_COORDS_GRID", raising=False)
+    assert coords_grid() == Decimal("0.01")
+
+    monkeypatch.setenv("WEATHER_COORDS_GRID", "0.1")
+    assert coords_grid() == Decimal("0.1")
+    assert normalize_coords("30.27,-97.74") == ("30.3", "-97.7")
+
+
+@pytest.mark.parametrize("grid", ["fine", "-0.1", "2", "nan"])
+def test_coords_grid_rejects_bad_values(monkeypatch, grid):
+    monkeypatch.setenv("WEATHER_COORDS_GRID", grid)
+
+    with pytest.raises(CoordsError, match="should be a number of degrees"):
+        coords_grid()
+
+
+def test_nearby_locations_share_one_call(mock_api, run_cli):
+    result = run_cli("current", "30.2711,-97.7437", "30.2689,-97.7412")
+
+    assert result.returncode == 0
+    assert mock_api.counts["/data/3.0/onecall"] == 1
+
+
+def test_commands_check_the_grid(run_cli, cli_env):
+    cli_env["WEATHER_COORDS_GRID"] = "fine"
+
+    result = run_cli("current", "10,10")
+
+    assert result.returncode == 1
+    assert "WEATHER_COORDS_GRID 'fine'" in result.stdout
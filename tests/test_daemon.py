@@ -0,0 +1,100 @@
+import json
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from lib import daemon
+from mock_server import FIXTURES
+
+ROOT = Path(__file__).resolve().parent.parent
+PARAMS = {"appid": "test", "lat": "30.2700", "lon": "-97.7400", "limit": 3}
+
+
+@pytest.fixture
+def fake_daemon(tmp_path, monkeypatch):
+    """
+    Listens on the daemon socket and answers each request with the next
+    reply appended to the returned list.
+    """
+    path = tmp_path / "daemon.sock"
+    monkeypatch.setenv("WEATHER_DAEMON_SOCKET", str(path))
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen()
+    replies = []
+
+    def answer():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                conn.makefile("rb").readline()
+                conn.sendall(replies.pop(0))
+
+    threading.Thread(target=answer, daemon=True).start()
+    yield replies
+    server.shutdown(socket.SHUT_RDWR)
+    server.close()
+
+
+def test_request_reads_the_daemon_reply(fake_daemon):
+    fake_daemon.append(json.dumps({"status": 200, "body": "[]"}).encode() + b"\n")
+
+    res = daemon.request("http://api/geo/1.0/reverse", PARAMS)
+
+    assert res.status_code == 200
+    assert res.json() == []
+
+
+@pytest.mark.parametrize(
+    "reply",
+    [
+        b"",
+        b'{"status": 200, "bo',
+        b"not json\n",
+        b"[]\n",
+        b'{"status": 200}\n',
+        b'{"error": "unknown endpoint"}\n',
+    ],
+)
+def test_request_falls_back_on_a_bad_reply(fake_daemon, reply):
+    fake_daemon.append(reply)
+
+    assert daemon.request("http://api/geo/1.0/reverse", PARAMS) is None
+
+
+def test_request_without_a_daemon(tmp_path, monkeypatch):
+    monkeypatch.setenv("WEATHER_DAEMON_SOCKET", str(tmp_path / "daemon.sock"))
+
+    assert daemon.request("http://api/geo/1.0/reverse", PARAMS) is None
+
+
+def test_serve_answers_on_a_private_socket(mock_api, cli_env, tmp_path, monkeypatch):
+    path = tmp_path / "daemon.sock"
+    monkeypatch.setenv("WEATHER_DAEMON_SOCKET", str(path))
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "main.py"), "serve", "--socket", str(path)],
+        env=cli_env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        res = None
+        deadline = time.monotonic() + 20
+        while res is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            res = daemon.request(f"{mock_api.url}/geo/1.0/reverse", PARAMS)
+
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+        assert res.json() == json.loads((FIXTURES / "reverse.json").read_text())
+    finally:
+        process.terminate()
+        process.wait(10)
+    assert not path.exists()
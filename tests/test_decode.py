@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from lib import decode
+from mock_server import FIXTURES
+
+BODY = (FIXTURES / "onecall.json").read_bytes()
+
+
+@pytest.fixture(params=decode.BACKENDS)
+def backend(request, monkeypatch) -> str:
+    if request.param != "json":
+        pytest.importorskip(request.param)
+    monkeypatch.setenv("WEATHER_JSON_BACKEND", request.param)
+    decode.backend.cache_clear()
+    yield request.param
+    decode.backend.cache_clear()
+
+
+def test_backend_is_picked_from_the_environment(backend):
+    assert decode.backend() == backend
+
+
+def test_unknown_backend_falls_back_to_json(monkeypatch):
+    monkeypatch.setenv("WEATHER_JSON_BACKEND", "simdjson-but-not-installed")
+    decode.backend.cache_clear()
+
+    assert decode.backend() == "json"
+    decode.backend.cache_clear()
+
+
+def test_loads_gives_what_json_gives(backend):
+    assert decode.loads(BODY) == json.loads(BODY)
+    assert decode.loads(BODY.decode()) == json.loads(BODY)
+
+
+def test_decode_onecall_keeps_what_views_read(backend):
+    expected = json.loads(BODY)
+
+    data = decode.decode_onecall(BODY)
+
+    for section in ("lat", "lon", "current", "hourly", "daily", "alerts"):
+        assert data[section] == _read_fields(expected[section], data[section])
+    # Ints stay ints, so values print like they did with json
+    assert type(data["current"]["humidity"]) is int
+
+
+def test_decode_onecall_skips_excluded_sections(backend):
+    data = decode.decode_onecall(BODY, exclude="current,minutely,daily")
+
+    assert "hourly" in data
+    if backend == "msgspec":
+        assert "current" not in data and "daily" not in data
+
+
+def test_decode_onecall_falls_back_on_other_payloads(backend):
+    body = json.dumps({"lat": 1, "lon": 2, "current": {"dt": 5}})
+
+    assert decode.decode_onecall(body) == json.loads(body)
+
+
+def _read_fields(expected, decoded):
+    # msgspec drops the fields the schema doesn't name, compare only the rest
+    if isinstance(expected, dict):
+        return {k: _read_fields(expected[k], v) for k, v in decoded.items()}
+    if isinstance(expected, list):
+        return [_read_fields(e, d) for e, d in zip(expected, decoded, strict=True)]
+    return expected
@@ -0,0 +1,117 @@
+import io
+import json
+
+import pytest
+
+from lib.engine import (
+    CurrentView,
+    DailyView,
+    ForecastEngine,
+    ForecastView,
+    HourlyView,
+    View,
+    all_forecasts,
+    exclude_for,
+    parse_view,
+)
+from lib.forecaststore import ForecastStore
+from lib.stream import StreamWriter, FIELDS
+from lib.weatherrecord import Units
+from mock_server import FIXTURES
+
+
+@pytest.fixture
+def weather_data() -> dict:
+    return json.loads((FIXTURES / "onecall.json").read_text())
+
+
+@pytest.fixture
+def geoloc_data() -> list:
+    return json.loads((FIXTURES / "reverse.json").read_text())
+
+
+@pytest.mark.parametrize(
+    "name, view_type, section",
+    [
+        ("current", CurrentView, "current"),
+        ("1hours", HourlyView, "hourly"),
+        ("48hours", HourlyView, "hourly"),
+        ("8days", DailyView, "daily"),
+    ],
+)
+def test_parse_view(name, view_type, section):
+    view = parse_view(name)
+
+    assert type(view) is view_type
+    assert view.section == section
+
+
+@pytest.mark.parametrize("name", ["", "0hours", "49hours", "9days", "12 hours"])
+def test_parse_view_rejects_other_names(name):
+    with pytest.raises(ValueError, match="is not a view"):
+        parse_view(name)
+
+
+def test_exclude_for_asks_only_for_one_section():
+    assert exclude_for([HourlyView(12)]) == "current,minutely,daily"
+    # Several sections fetch the full payload the cache can share
+    assert exclude_for([CurrentView(), DailyView()]) is None
+
+
+def test_views_are_protocols():
+    with pytest.raises(TypeError):
+        View()
+    assert isinstance(HourlyView(), ForecastView)
+    assert not isinstance(CurrentView(), ForecastView)
+    assert all_forecasts([HourlyView(), DailyView()])
+    assert not all_forecasts([CurrentView(), DailyView()])
+
+
+def test_views_cut_the_forecast_window(weather_data):
+    assert len(HourlyView(5).window(weather_data)) == 5
+    assert len(DailyView(3).build(weather_data, Units.get("c", "k"))) == 3
+
+
+def test_engine_writes_rows_of_the_first_view(weather_data, geoloc_data):
+    out = io.StringIO()
+    writer = StreamWriter("ndjson", FIELDS["hourly"], out)
+    engine = ForecastEngine([HourlyView(3)], Units.get("c", "k"), writer)
+
+    engine.process(weather_data, geoloc_data)
+    assert engine.finish()
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row.get("type") for row in rows] == [None, None, None, "alert"]
+    assert rows[0]["city"] == geoloc_data[0]["name"]
+    assert rows[0]["temp_unit"] == "C"
+    assert rows[0]["dt"] == weather_data["hourly"][0]["dt"]
+
+
+def test_engine_runs_hooks_after_each_view(weather_data, geoloc_data, capsys):
+    calls = []
+
+    class Hook:
+        takes_stdout = False
+
+        def __call__(self, view, data, location):
+            calls.append((view.section, location["city"]))
+
+        def finish(self) -> bool:
+            return False
+
+    views = [CurrentView(), DailyView(2)]
+    engine = ForecastEngine(views, Units.get("f", "m"), hooks=[Hook()])
+    engine.process(weather_data, geoloc_data)
+
+    city = geoloc_data[0]["name"]
+    assert calls == [("current", city), ("daily", city)]
+    assert f"Current weather in {city}" in capsys.readouterr().out
+    assert not engine.finish()
+
+
+def test_engine_only_stores_forecast_views(tmp_path):
+    store = ForecastStore(tmp_path / "store.sqlite3")
+
+    with pytest.raises(ValueError):
+        ForecastEngine([CurrentView()], Units.get("f", "m"), store=store)
+    ForecastEngine([HourlyView(), DailyView()], Units.get("f", "m"), store=store)
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from lib.fetch import SingleFlight, fetch_concurrently
+from mock_server import FIXTURES
+
+
+def test_fetch_concurrently_sends_calls_at_the_same_time(mock_api):
+    mock_api.latency = 0.3
+    params = {"appid": "test", "lat": "30.27", "lon": "-97.74"}
+
+    start = time.perf_counter()
+    weather_res, geoloc_res = fetch_concurrently(
+        (f"{mock_api.url}/data/3.0/onecall", params, None),
+        (f"{mock_api.url}/geo/1.0/reverse", params, None),
+    )
+    elapsed = time.perf_counter() - start
+
+    # Responses come back in the order of the calls
+    assert weather_res.json()["lat"] == 30.27
+    assert geoloc_res.json() == json.loads((FIXTURES / "reverse.json").read_text())
+    assert elapsed < 0.55
+
+
+def test_fetch_concurrently_decodes_each_response(mock_api):
+    params = {"appid": "test", "lat": "1", "lon": "2"}
+
+    weather_res, geoloc_res = fetch_concurrently(
+        (f"{mock_api.url}/data/3.0/onecall", params, json.loads),
+        (f"{mock_api.url}/geo/1.0/reverse", params, None),
+    )
+
+    assert weather_res.data["lon"] == 2
+    assert not hasattr(geoloc_res, "data")
+
+
+def test_fetch_concurrently_reraises_errors(mock_api):
+    params = {"appid": "test", "lat": "1", "lon": "2"}
+    mock_api.stop()
+
+    with pytest.raises(requests.ConnectionError):
+        fetch_concurrently(
+            (f"{mock_api.url}/data/3.0/onecall", params, None),
+            (f"{mock_api.url}/geo/1.0/reverse", params, None),
+        )
+
+
+def test_identical_calls_in_flight_share_one_api_call(mock_api):
+    mock_api.latency = 0.2
+    params = {"appid": "test", "lat": "1", "lon": "2"}
+    call = (f"{mock_api.url}/data/3.0/onecall", params, json.loads)
+
+    responses = fetch_concurrently(*[call] * 8)
+
+    assert mock_api.counts == {"/data/3.0/onecall": 1}
+    assert all(res.data is responses[0].data for res in responses)
+    # Once the call is done the next one goes out again
+    fetch_concurrently(call)
+    assert mock_api.counts == {"/data/3.0/onecall": 2}
+
+
+def test_single_flight_shares_errors_and_only_blocks_its_key():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("down")
+
+    def run(call):
+        try:
+            flights.do("a", call)
+        except ValueError as err:
+            errors.append(err)
+
+    leader = threading.Thread(target=run, args=(failing,))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=run, args=(lambda: "not called",))
+    follower.start()
+    # Other keys don't wait for "a"
+    assert flights.do("b", lambda: "b") == "b"
+    time.sleep(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert flights.do("a", lambda: "again") == "again"
@@ -0,0 +1,46 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from lib import fonts
+
+
+@pytest.fixture(autouse=True)
+def default_font(monkeypatch):
+    monkeypatch.delenv("WEATHER_FONT_PATH", raising=False)
+
+
+def test_fonts_are_loaded_once_per_size():
+    assert fonts.get_font(24) is fonts.get_font(24)
+    assert fonts.get_font(24) is not fonts.get_font(43)
+
+
+def test_font_path_comes_from_the_environment(monkeypatch):
+    assert fonts.font_path() is None
+
+    monkeypatch.setenv("WEATHER_FONT_PATH", "~/fonts/Inter.ttf")
+
+    assert fonts.font_path().endswith("/fonts/Inter.ttf")
+    assert not fonts.font_path().startswith("~")
+
+
+@pytest.mark.parametrize("anchor", ["ms", "la", "rb"])
+def test_draw_label_draws_like_text(anchor):
+    with_text = Image.new("RGB", (300, 100), (20, 40, 60))
+    with_label = with_text.copy()
+
+    ImageDraw.Draw(with_text).text(
+        (150, 50), "Wind Speed", anchor=anchor, font=fonts.get_font(24)
+    )
+    fonts.draw_label(ImageDraw.Draw(with_label), (150, 50), "Wind Speed", 24, anchor)
+
+    assert with_label.tobytes() == with_text.tobytes()
+
+
+def test_labels_are_rasterized_once():
+    draw = ImageDraw.Draw(Image.new("RGB", (100, 100)))
+    fonts._label_mask.cache_clear()
+
+    for _ in range(3):
+        fonts.draw_label(draw, (50, 50), "Humidity", 24)
+
+    assert fonts._label_mask.cache_info().misses == 1
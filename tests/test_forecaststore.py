@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from lib.forecaststore import ForecastStore
+
+
+def hour(dt: int, temp: float) -> dict:
+    return {"dt": dt, "temp": temp}
+
+
+def alert(event: str, description: str = "Stay inside") -> dict:
+    return {
+        "sender_name": "NWS",
+        "event": event,
+        "start": 100,
+        "end": 200,
+        "description": description,
+    }
+
+
+@pytest.fixture
+def store(tmp_path) -> ForecastStore:
+    return ForecastStore(tmp_path / "forecasts.sqlite3")
+
+
+def test_update_items_returns_what_changed(store):
+    first = [hour(1, 280), hour(2, 281), hour(3, 282)]
+    assert store.update_items("a", "hourly", first) == [
+        (item, "new") for item in first
+    ]
+    assert store.update_items("a", "hourly", first) == []
+
+    changed = store.update_items("a", "hourly", [hour(2, 281), hour(3, 290)])
+
+    assert changed == [(hour(3, 290), "revised")]
+    # Items of other locations and sections are stored apart
+    assert len(store.update_items("b", "hourly", first)) == 3
+    assert len(store.update_items("a", "daily", first)) == 3
+
+
+def test_update_items_drops_the_past_and_keeps_longer_forecasts(store):
+    store.update_items("a", "hourly", [hour(1, 280), hour(2, 281), hour(3, 282)])
+
+    # A shorter run doesn't forget hour 3, the past hour 1 is gone
+    assert store.update_items("a", "hourly", [hour(2, 281)]) == []
+    assert store.update_items("a", "hourly", [hour(2, 281), hour(3, 282)]) == []
+    assert store.update_items("a", "hourly", [hour(1, 280)]) == [
+        (hour(1, 280), "new")
+    ]
+
+
+def test_update_alerts_returns_new_and_expired_alerts(store):
+    flood, wind = alert("Flood"), alert("Wind")
+    assert store.update_alerts("a", [flood, wind]) == ([flood, wind], [])
+    assert store.update_alerts("a", [flood, wind]) == ([], [])
+
+    revised = alert("Flood", "Move to higher ground")
+
+    assert store.update_alerts("a", [revised]) == ([revised], [wind])
+    assert store.update_alerts("a", [revised]) == ([], [])
+
+
+def test_store_persists_across_runs(tmp_path):
+    path = tmp_path / "forecasts.sqlite3"
+    ForecastStore(path).update_items("a", "daily", [hour(1, 280)])
+
+    assert ForecastStore(path).update_items("a", "daily", [hour(1, 280)]) == []
+
+
+def test_changes_only_shows_what_changed(mock_api, run_cli):
+    args = ("12hours", "10,10", "--changes", "--no-cache", "--format", "ndjson")
+
+    first = [json.loads(line) for line in run_cli(*args).stdout.splitlines()]
+    second = run_cli(*args)
+
+    assert len([row for row in first if row.get("type") != "alert"]) == 12
+    assert {row["change"] for row in first} == {"new"}
+    assert second.returncode == 0
+    assert second.stdout == ""
+    table = run_cli(*args[:-2])
+    assert "No changes to the hourly forecast" in table.stdout
+
+    respond = mock_api.respond
+
+    def warmer(path: str) -> tuple[int, bytes]:
+        status, body = respond(path)
+        if path.startswith("/data/3.0/onecall"):
+            data = json.loads(body)
+            data["hourly"][1]["temp"] += 2
+            data.pop("alerts", None)
+            body = json.dumps(data).encode()
+        return status, body
+
+    mock_api.respond = warmer
+    third = [json.loads(line) for line in run_cli(*args).stdout.splitlines()]
+
+    assert [(row.get("type"), row["change"]) for row in third] == [
+        (None, "revised"),
+        ("alert", "expired"),
+    ]
+    assert third[0]["dt"] == first[1]["dt"]
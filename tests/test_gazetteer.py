@@ -0,0 +1,155 @@
+import pickle
+
+import pytest
+
+from lib.gazetteer import (
+    Gazetteer,
+    get_gazetteer,
+    normalize_name,
+    read_geonames,
+)
+import lib.gazetteer
+
+# (name, feature class, country, admin1 code, lat, lon, population)
+PLACES = [
+    ("Austin", "P", "US", "TX", 30.26715, -97.74306, 961855),
+    ("Austin", "P", "US", "MN", 43.66663, -92.97464, 24718),
+    ("Austintown", "P", "US", "OH", 41.10172, -80.76452, 29677),
+    ("San Antonio", "P", "US", "TX", 29.42412, -98.49363, 1434625),
+    ("São Paulo", "P", "BR", "27", -23.5475, -46.63611, 10021295),
+    ("Suva", "P", "FJ", "01", -18.14161, 178.44149, 77366),
+    ("Colorado River", "H", "US", "TX", 28.6, -96.0, 0),
+]
+ADMIN1 = [("US.TX", "Texas"), ("US.MN", "Minnesota"), ("BR.27", "São Paulo")]
+
+
+@pytest.fixture
+def dump(tmp_path):
+    lines = []
+    for i, (name, feature, country, admin1, lat, lon, population) in enumerate(PLACES):
+        columns = [str(i), name, name, "", str(lat), str(lon), feature, "PPL"]
+        columns += [country, "", admin1, "", "", "", str(population), "", "", "", ""]
+        lines.append("\t".join(columns))
+    (tmp_path / "cities.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    (tmp_path / "admin1.txt").write_text(
+        "".join(f"{code}\t{name}\t{name}\t1\n" for code, name in ADMIN1),
+        encoding="utf-8",
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def gazetteer(dump):
+    places = read_geonames(str(dump / "cities.txt"), str(dump / "admin1.txt"))
+    return Gazetteer.build(places, dump / "gazetteer.sqlite3")
+
+
+def test_read_geonames_keeps_populated_places_with_state_names(dump):
+    places = read_geonames(str(dump / "cities.txt"), str(dump / "admin1.txt"), 25000)
+
+    assert [place[0] for place in places] == [
+        "Austin",
+        "Austintown",
+        "San Antonio",
+        "São Paulo",
+        "Suva",
+    ]
+    assert places[0] == ("Austin", "Texas", "TX", "US", 30.26715, -97.74306, 961855)
+    # Without a name in admin1, the code is shown
+    assert places[4][1] == "01"
+
+
+def test_normalize_name():
+    assert normalize_name(" São Paulo ") == "sao paulo"
+
+
+def test_search_by_prefix_puts_exact_names_first(gazetteer):
+    results = gazetteer.search("austin")
+
+    assert [(item["name"], item["state"]) for item in results] == [
+        ("Austin", "Texas"),
+        ("Austin", "Minnesota"),
+        ("Austintown", "OH"),
+    ]
+    assert results[0] == {
+        "name": "Austin",
+        "state": "Texas",
+        "country": "US",
+        "lat": 30.26715,
+        "lon": -97.74306,
+    }
+
+
+def test_search_filters_by_state_and_country(gazetteer):
+    assert [item["state"] for item in gazetteer.search("Austin,MN,US")] == [
+        "Minnesota"
+    ]
+    # "Austin,TX" names a state, not a country
+    assert [item["state"] for item in gazetteer.search("Austin,TX")] == ["Texas"]
+    assert gazetteer.search("Austin,BR") == []
+    assert gazetteer.search("Sao Paulo,BR")[0]["name"] == "São Paulo"
+
+
+def test_search_falls_back_to_trigrams(gazetteer):
+    assert gazetteer.search("santonio")[0]["name"] == "San Antonio"
+    assert gazetteer.search("") == []
+
+
+def test_reverse_finds_the_nearest_place(gazetteer):
+    assert gazetteer.reverse(30.3, -97.7)[0]["name"] == "Austin"
+    assert [item["name"] for item in gazetteer.reverse(29.6, -98.3, limit=2)] == [
+        "San Antonio",
+        "Austin",
+    ]
+    # Across the antimeridian from Suva
+    assert gazetteer.reverse(-18.0, -179.9)[0]["name"] == "Suva"
+    assert gazetteer.reverse(-80.0, 0.0) == []
+
+
+def test_build_replaces_an_existing_index(gazetteer, dump):
+    places = read_geonames(str(dump / "cities.txt"), min_population=1000000)
+    Gazetteer.build(places, dump / "gazetteer.sqlite3")
+
+    assert len(Gazetteer(dump / "gazetteer.sqlite3")) == 2
+    assert not (dump / "gazetteer.sqlite3.building").exists()
+
+
+@pytest.fixture
+def gazetteer_env(monkeypatch, tmp_path):
+    path = tmp_path / "index.sqlite3"
+    monkeypatch.setenv("WEATHER_GAZETTEER", str(path))
+    monkeypatch.setattr(lib.gazetteer, "_gazetteer", None)
+    return path
+
+
+def test_get_gazetteer_opens_the_built_index(gazetteer_env, dump):
+    assert get_gazetteer() is None
+
+    Gazetteer.build(read_geonames(str(dump / "cities.txt")), gazetteer_env)
+
+    assert get_gazetteer().search("Suva")[0]["country"] == "FJ"
+
+
+def test_get_gazetteer_ignores_other_files(gazetteer_env):
+    # An index pickled by an older version is never loaded
+    gazetteer_env.write_bytes(pickle.dumps({"places": []}))
+
+    assert get_gazetteer() is None
+
+
+def test_commands_use_the_built_index(mock_api, run_cli, dump):
+    result = run_cli("buildgazetteer", "cities.txt", "--admin1", "admin1.txt")
+    assert result.returncode == 0
+    assert "Indexed 6 places" in result.stdout
+
+    result = run_cli("current", "30.30,-97.70")
+    assert result.returncode == 0
+    assert "Current weather in Austin, Texas, US" in result.stdout
+    assert "/geo/1.0/reverse" not in mock_api.counts
+
+    result = run_cli("searchcity", "San Antonio,TX,US", "--format", "ndjson")
+    assert result.stdout.splitlines() == [
+        '{"name": "San Antonio", "state": "Texas", "country": "US", '
+        '"lat": 29.42412, "lon": -98.49363}'
+    ]
+    assert "/geo/1.0/direct" not in mock_api.counts
@@ -0,0 +1,225 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from lib import images
+from lib.images import (
+    BACKGROUND_FILES,
+    ImageOptions,
+    MissingBackgroundError,
+    encode_image,
+    get_background,
+    save_image,
+)
+from lib.weatherrecord import WeatherType
+
+
+def write_backgrounds(folder: Path):
+    """
+    Writes a small background of each weather category in folder/images.
+    """
+    for i, path in enumerate(BACKGROUND_FILES.values()):
+        (folder / path).parent.mkdir(exist_ok=True)
+        Image.new("RGB", (400, 300), (i * 30, 60, 90)).save(folder / path)
+
+
+@pytest.fixture
+def backgrounds(tmp_path, monkeypatch) -> Path:
+    write_backgrounds(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("WEATHER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(images, "_backgrounds", {})
+    monkeypatch.setattr(images, "_background_mtimes", None)
+    return tmp_path
+
+
+@pytest.fixture
+def image():
+    with Image.new("RGB", (64, 64), (40, 90, 160)) as im:
+        yield im
+
+
+def test_save_kwargs_only_pass_what_the_format_understands():
+    options = ImageOptions(
+        image_format="jpg",
+        quality=70,
+        subsampling="4:2:0",
+        optimize=True,
+        progressive=True,
+    )
+    assert options.extension == ".jpg"
+    assert options.save_kwargs() == {
+        "format": "JPEG",
+        "quality": 70,
+        "subsampling": "4:2:0",
+        "optimize": True,
+        "progressive": True,
+    }
+
+    options = ImageOptions(image_format="png", quality=70, optimize=True)
+    assert options.save_kwargs() == {"format": "PNG", "optimize": True}
+
+
+@pytest.mark.parametrize(
+    "settings, message",
+    [
+        ({"image_format": "bmp"}, "--image-format must be one of"),
+        ({"quality": 0}, "--quality must be between 1 and 100"),
+        ({"subsampling": "4:1:1"}, "--subsampling must be one of"),
+    ],
+)
+def test_options_are_checked(settings, message):
+    with pytest.raises(ValueError, match=message):
+        ImageOptions(**settings)
+
+
+def test_encode_image_in_memory(image):
+    data = encode_image(image, ImageOptions(image_format="png"))
+
+    with Image.open(io.BytesIO(data)) as decoded:
+        assert decoded.format == "PNG"
+        assert decoded.size == (64, 64)
+
+
+def test_encode_image_with_frames_loops_an_animation(image):
+    frames = [Image.new("RGB", (64, 64), (i * 60, 0, 0)) for i in range(3)]
+
+    data = encode_image(image, ImageOptions(image_format="gif"), frames, 250)
+
+    with Image.open(io.BytesIO(data)) as decoded:
+        assert decoded.n_frames == 4
+        assert decoded.info["duration"] == 250
+        assert decoded.info["loop"] == 0
+
+
+def test_save_image_writes_the_encoded_bytes(image, tmp_path, capsysbinary):
+    options = ImageOptions(str(tmp_path / "out"), "jpeg", quality=50)
+    path = tmp_path / "out" / "card.jpg"
+
+    save_image(image, path, options)
+    assert path.read_bytes() == encode_image(image, options)
+    assert "File saved to" in capsysbinary.readouterr().out.decode()
+
+    save_image(image, path, ImageOptions("-", "jpeg", quality=50))
+    assert capsysbinary.readouterr().out == path.read_bytes()
+
+
+def test_backgrounds_are_fitted_once_and_kept_on_disk(backgrounds, monkeypatch):
+    background = get_background(WeatherType.RAIN)
+
+    assert background.size == images.BACKGROUND_SIZE
+    assert get_background(WeatherType.RAIN) is background
+    [cached] = images.background_cache_dir().glob("rain-*-800x800.bitmap")
+
+    # The next process reads the fitted pixels back instead of the JPEG
+    monkeypatch.setattr(images, "_backgrounds", {})
+    monkeypatch.setattr(images.ImageOps, "fit", None)
+    assert get_background(WeatherType.RAIN).tobytes() == background.tobytes()
+
+
+def test_changed_backgrounds_are_fitted_again(backgrounds, monkeypatch):
+    get_background(WeatherType.SNOW)
+    path = backgrounds / BACKGROUND_FILES[WeatherType.SNOW]
+    Image.new("RGB", (400, 300), (255, 255, 255)).save(path)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    monkeypatch.setattr(images, "_backgrounds", {})
+    monkeypatch.setattr(images, "_background_mtimes", None)
+
+    assert get_background(WeatherType.SNOW).getpixel((0, 0)) == (255, 255, 255)
+    assert len(list(images.background_cache_dir().glob("snow-*.bitmap"))) == 1
+
+
+def test_missing_backgrounds_are_reported(backgrounds):
+    (backgrounds / BACKGROUND_FILES[WeatherType.CLEAR]).unlink()
+
+    with pytest.raises(MissingBackgroundError) as err:
+        images.check_backgrounds()
+    assert err.value.category is WeatherType.CLEAR
+
+
+def test_several_locations_are_exported_in_a_pool(mock_api, run_cli, tmp_path):
+    write_backgrounds(tmp_path)
+
+    result = run_cli(
+        "current", "10,10", "20,20", "30,30", "--to-image", "--image-dir", "out"
+    )
+
+    assert result.returncode == 0
+    assert "Exported 3 images" in result.stdout
+    paths = sorted((tmp_path / "out").iterdir())
+    assert [path.name.split("-")[1] for path in paths] == [
+        "10.0000_10.0000",
+        "20.0000_20.0000",
+        "30.0000_30.0000",
+    ]
+    for path in paths:
+        with Image.open(path) as im:
+            assert (im.format, im.size) == ("JPEG", images.BACKGROUND_SIZE)
+
+
+def test_batch_export_fails_without_backgrounds(mock_api, run_cli):
+    result = run_cli("current", "10,10", "20,20", "--to-image", "--image-dir", "out")
+
+    assert result.returncode == 1
+    assert "does not exist" in result.stdout
+
+
+def test_grid_puts_every_location_on_one_sheet(mock_api, run_cli, tmp_path):
+    write_backgrounds(tmp_path)
+
+    result = run_cli(
+        "current",
+        "10,10",
+        "20,20",
+        "30,30",
+        "--to-image",
+        "--grid",
+        "--image-dir",
+        "out",
+        "--image-format",
+        "png",
+    )
+
+    assert result.returncode == 0
+    [path] = (tmp_path / "out").iterdir()
+    assert path.name.startswith("grid-3-")
+    with Image.open(path) as sheet:
+        # Three cards in a 2 x 2 grid
+        assert sheet.size == (1600, 1600)
+
+
+def test_hourly_exports_an_animation(mock_api, run_cli, tmp_path):
+    write_backgrounds(tmp_path)
+
+    result = run_cli(
+        "hourly",
+        "10,10",
+        "--hours",
+        "4",
+        "--to-image",
+        "--image-dir",
+        "out",
+        "--image-format",
+        "gif",
+        "--frame-ms",
+        "200",
+    )
+
+    assert result.returncode == 0
+    [path] = (tmp_path / "out").iterdir()
+    assert "-4hours-" in path.name
+    with Image.open(path) as animation:
+        assert animation.n_frames == 4
+        assert animation.info["duration"] == 200
+
+
+def test_failed_animation_exits_with_an_error(mock_api, run_cli):
+    result = run_cli("hourly", "10,10", "--to-image", "--image-dir", "out")
+
+    assert result.returncode == 1
+    assert "does not exist" in result.stdout
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+import pytest
+
+
+def fail_location(mock, lat: str):
+    """
+    Makes mock answer every request for lat with a 500 error.
+    """
+    respond = mock.respond
+
+    def failing(path: str) -> tuple[int, bytes]:
+        if f"lat={lat}&" in path:
+            return 500, b'{"cod":500,"message":"Internal error"}'
+        return respond(path)
+
+    mock.respond = failing
+
+
+def test_ndjson_stream_stays_valid_when_a_location_fails(mock_api, run_cli):
+    fail_location(mock_api, "20.00")
+
+    result = run_cli("12hours", "10,10", "20,20", "--format", "ndjson")
+
+    assert result.returncode == 1
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len([row for row in rows if row.get("type") != "alert"]) == 12
+    assert {(row["lat"], row["lon"]) for row in rows} == {(10.0, 10.0)}
+    assert "request errored with code 500" in result.stderr
+    assert "Skipped 20,20" in result.stderr
+
+
+def test_lines_stream_has_only_records(mock_api, run_cli):
+    fail_location(mock_api, "20.00")
+
+    result = run_cli("8days", "20,20", "10,10", "--format", "lines")
+
+    lines = result.stdout.splitlines()
+    assert len(lines) > 0
+    assert all(
+        line.startswith(("city=Austin ", "type=alert city=Austin ")) for line in lines
+    )
+    assert all(" lat=10.0 lon=10.0 " in line for line in lines)
+    assert "Skipped 20,20" in result.stderr
+
+
+def test_csv_and_json_output_skip_a_failing_location(mock_api, run_cli):
+    fail_location(mock_api, "20.00")
+
+    result = run_cli("current", "20,20", "10,10", "--format", "csv")
+    rows = list(csv.DictReader(io.StringIO(result.stdout)))
+    assert [(row["lat"], row["lon"]) for row in rows] == [("10.0", "10.0")]
+    assert "Skipped 20,20" in result.stderr
+
+    result = run_cli("current", "20,20", "10,10", "--format", "json")
+    document = json.loads(result.stdout)
+    assert [(row["lat"], row["lon"]) for row in document["rows"]] == [(10.0, 10.0)]
+    assert len(document["alerts"]) == 1
+    assert "Skipped 20,20" in result.stderr
+
+
+def test_parquet_output_stays_readable_when_a_location_fails(mock_api, run_cli):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    fail_location(mock_api, "20.00")
+
+    result = run_cli("current", "10,10", "20,20", "--format", "parquet", text=False)
+
+    assert result.returncode == 1
+    table = parquet.read_table(io.BytesIO(result.stdout))
+    assert table.column("lat").to_pylist() == [10.0]
+    assert b"Skipped 20,20" in result.stderr
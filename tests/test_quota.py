@@ -0,0 +1,128 @@
+import pytest
+
+import lib.quota
+from lib.quota import QuotaExceeded, QuotaLedger, QuotaSettings, format_reset
+
+ONECALL = "https://api.openweathermap.org/data/3.0/onecall"
+REVERSE = "https://api.openweathermap.org/geo/1.0/reverse"
+# 2023-11-14 22:13:20 UTC
+NOW = 1_700_000_000.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+        self.slept = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(lib.quota.time, "time", clock)
+    monkeypatch.setattr(lib.quota.time, "sleep", clock.sleep)
+    return clock
+
+
+def ledger_with(tmp_path, **settings) -> QuotaLedger:
+    settings = {"daily_budget": 0, "minute_budget": 0, **settings}
+    return QuotaLedger(tmp_path / "quota.sqlite3", QuotaSettings(**settings))
+
+
+def test_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("WEATHER_DAILY_BUDGET", "50")
+    monkeypatch.setenv("WEATHER_LOW_BUDGET", "0.5")
+
+    settings = QuotaSettings(minute_budget=0)
+
+    assert (settings.daily_budget, settings.minute_budget) == (50, 0)
+    assert (settings.low_share, settings.stale_max_age) == (0.5, 3 * 60 * 60)
+
+
+def test_format_reset_counts_to_midnight_utc():
+    assert format_reset(NOW) == "00:00 UTC, in 1h 46m"
+
+
+def test_daily_budget_only_counts_one_call(tmp_path, clock):
+    ledger = ledger_with(tmp_path, daily_budget=2)
+    ledger.acquire(ONECALL)
+    ledger.acquire(REVERSE)
+    ledger.acquire(ONECALL)
+
+    with pytest.raises(QuotaExceeded, match="budget of 2 One Call requests"):
+        ledger.acquire(ONECALL)
+    ledger.acquire(REVERSE)
+
+    # The budget comes back at midnight UTC
+    clock.now += 2 * 60 * 60
+    ledger.acquire(ONECALL)
+
+
+def test_minute_budget_waits_for_a_token(tmp_path, clock):
+    ledger = ledger_with(tmp_path, minute_budget=6)
+    for _ in range(6):
+        ledger.acquire(REVERSE)
+    assert clock.slept == 0
+
+    ledger.acquire(REVERSE)
+
+    assert clock.slept == pytest.approx(10)
+    assert ledger.usage()["minute_used"] == 7
+
+
+def test_ledger_is_shared_by_every_opener(tmp_path, clock):
+    ledger_with(tmp_path, daily_budget=1).acquire(ONECALL)
+
+    with pytest.raises(QuotaExceeded):
+        ledger_with(tmp_path, daily_budget=1).acquire(ONECALL)
+
+
+def test_budget_is_low_near_the_end_of_either_budget(tmp_path, clock):
+    ledger = ledger_with(tmp_path, daily_budget=10, minute_budget=100, low_share=0.2)
+    for _ in range(7):
+        ledger.acquire(ONECALL)
+    assert not ledger.budget_is_low(ONECALL)
+
+    ledger.acquire(ONECALL)
+    assert ledger.budget_is_low(ONECALL)
+    assert not ledger.budget_is_low(REVERSE)
+
+    for _ in range(73):
+        ledger.acquire(REVERSE)
+    assert ledger.budget_is_low(REVERSE)
+
+
+def test_usage(tmp_path, clock):
+    ledger = ledger_with(tmp_path, daily_budget=5, minute_budget=10)
+    ledger.acquire(ONECALL)
+    ledger.acquire(REVERSE)
+    ledger.acquire(REVERSE)
+    clock.now += 61
+
+    usage = ledger.usage()
+
+    assert usage["by_endpoint"] == {"/data/3.0/onecall": 1, "/geo/1.0/reverse": 2}
+    assert (usage["daily_used"], usage["minute_used"]) == (1, 0)
+    assert usage["minute_tokens"] == 10
+
+
+def test_commands_stop_once_the_budget_is_spent(mock_api, run_cli, cli_env):
+    cli_env["WEATHER_DAILY_BUDGET"] = "1"
+
+    assert run_cli("current", "10,10").returncode == 0
+    result = run_cli("current", "20,20")
+
+    assert result.returncode == 1
+    assert "Out of API budget" in result.stdout
+    assert "daily budget of 1 One Call requests is spent" in result.stdout
+    assert mock_api.counts["/data/3.0/onecall"] == 1
+
+    result = run_cli("quota")
+    assert "One Call requests today: 1 of 1, 0 left" in result.stdout
+    assert "/data/3.0/onecall: 1 today" in result.stdout
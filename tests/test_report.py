@@ -0,0 +1,25 @@
+def test_report_renders_every_view_from_one_call(mock_api, run_cli):
+    result = run_cli("report", "30.27,-97.74", "--views", "current,3hours,2days")
+
+    assert result.returncode == 0
+    assert "Current weather in Austin" in result.stdout
+    assert "3 hour weather for Austin" in result.stdout
+    assert "2 day weather for Austin" in result.stdout
+    assert mock_api.counts == {"/data/3.0/onecall": 1, "/geo/1.0/reverse": 1}
+
+
+def test_commands_reuse_the_cached_report(mock_api, run_cli):
+    run_cli("report", "30.27,-97.74")
+
+    # The full payload covers requests that exclude some of its sections
+    for command in ("current", "12hours", "8days"):
+        assert run_cli(command, "30.27,-97.74").returncode == 0
+    assert mock_api.counts["/data/3.0/onecall"] == 1
+
+
+def test_report_checks_the_views(mock_api, run_cli):
+    result = run_cli("report", "30.27,-97.74", "--views", "current,49hours")
+
+    assert result.returncode == 1
+    assert "'49hours' is not a view" in result.stdout
+    assert mock_api.counts == {}
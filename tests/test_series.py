@@ -0,0 +1,82 @@
+import json
+import math
+
+import pytest
+
+from lib import converters
+from lib.series import ForecastSeries
+from lib.weatherrecord import Units, WeatherRecord
+from mock_server import FIXTURES
+
+
+@pytest.fixture(scope="module")
+def hourly() -> list:
+    items = json.loads((FIXTURES / "onecall.json").read_text())["hourly"]
+    # Make sure some hours have values the API can leave out, and some not
+    items[0] = {**items[0], "rain": {"1h": 3}, "snow": {"1h": 0.25}}
+    items[1] = {k: v for k, v in items[1].items() if k not in ("wind_gust", "pop")}
+    return items
+
+
+@pytest.mark.parametrize(
+    "scalar, column",
+    [
+        (converters.kelvin_to_f, converters.kelvin_to_f_column),
+        (converters.kelvin_to_c, converters.kelvin_to_c_column),
+        (converters.wind_speed_to_kmph, converters.wind_speed_to_kmph_column),
+        (converters.wind_speed_to_mph, converters.wind_speed_to_mph_column),
+        (converters.mm_to_in, converters.mm_to_in_column),
+    ],
+)
+def test_column_converters_match_the_scalar_ones(scalar, column):
+    values = [0.0, 1.5, 273.15, 300.0]
+
+    converted = column(values)
+
+    assert [scalar(v).split()[0] for v in values] == [f"{v:.2f}" for v in converted]
+
+
+def test_missing_values_are_nan(hourly):
+    series = ForecastSeries.from_api(hourly, "c", "k")
+
+    assert len(series) == len(hourly)
+    assert math.isnan(series.wind_gust[1])
+    assert math.isnan(series.pop[1])
+    assert math.isnan(series.converted("wind_gust")[1])
+    assert series.converted("rain")[0] == 3
+
+
+def test_columns_are_converted_once(hourly):
+    series = ForecastSeries.from_api(hourly, "f", "m")
+
+    temps = series.converted("temp")
+
+    assert series.converted("temp") is temps
+    assert temps[0] == pytest.approx(hourly[0]["temp"] * 1.8 - 459.67)
+
+
+@pytest.mark.parametrize("temp, wind", [("f", "m"), ("c", "k")])
+def test_series_reads_like_records(hourly, temp, wind):
+    series = ForecastSeries.from_api(hourly, temp, wind)
+    records = [WeatherRecord.from_api(item, temp, wind) for item in hourly]
+
+    expected = [
+        (
+            r.get_datetime("hourly"),
+            r.get_temp(),
+            r.get_feels_like(),
+            r.get_humidity(),
+            r.get_wind_speed(),
+            r.get_wind_gust(),
+            r.get_weather_condition(),
+            r.get_rain(),
+            r.get_snow(),
+            r.get_pop(),
+        )
+        for r in records
+    ]
+    assert list(series.formatted_rows()) == expected
+    assert [r.get_rain() for r in series.records()] == [
+        r.get_rain() for r in records
+    ]
+    assert series.record(0).units is Units.get(temp, wind)
@@ -0,0 +1,19 @@
+import pytest
+
+import startup
+
+
+@pytest.mark.parametrize(
+    "args, forbidden",
+    startup.SCENARIOS,
+    ids=[" ".join(args) for args, _ in startup.SCENARIOS],
+)
+def test_commands_skip_the_modules_they_dont_need(
+    args, forbidden, tmp_path, monkeypatch
+):
+    monkeypatch.setitem(startup.OFFLINE_ENV, "WEATHER_CACHE_DIR", str(tmp_path))
+
+    _, modules = startup.run_scenario(args, runs=1)
+
+    assert "typer" in modules
+    assert [name for name in forbidden if name in modules] == []
@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+
+import pytest
+
+from lib.stream import (
+    ALERT_FIELDS,
+    CHANGE_FIELDS,
+    DAILY_FIELDS,
+    JsonWriter,
+    ParquetWriter,
+    StreamWriter,
+    make_writer,
+)
+
+FIELDS = ("city", "temp", "condition")
+ROWS = [
+    {"city": "Austin", "temp": 71.5, "condition": "Clear: clear sky"},
+    {"city": "Austin", "temp": None, "condition": ""},
+]
+ALERT = {
+    "city": "Austin",
+    "state": "Texas",
+    "country": "US",
+    "lat": 30.27,
+    "lon": -97.74,
+    "sender": "NWS",
+    "event": "Wind Advisory",
+    "start": 1760036400,
+    "end": 1760058000,
+    "description": "Gusty winds",
+}
+
+
+def test_ndjson_writes_one_object_per_line_with_alerts_marked():
+    out = io.StringIO()
+    writer = StreamWriter("ndjson", FIELDS, out)
+
+    writer.write_rows(ROWS, [ALERT])
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert lines == ROWS + [{"type": "alert", **ALERT}]
+
+
+def test_csv_writes_the_header_once(capsys):
+    out = io.StringIO()
+    writer = StreamWriter("csv", FIELDS, out)
+
+    writer.write_rows(ROWS[:1], [ALERT])
+    writer.write_rows(ROWS[1:])
+    writer.close()
+
+    assert list(csv.reader(io.StringIO(out.getvalue()))) == [
+        ["city", "temp", "condition"],
+        ["Austin", "71.5", "Clear: clear sky"],
+        ["Austin", "", ""],
+    ]
+    # A csv stream has no room for alerts without --alerts-file
+    assert not writer.writes_alerts
+    assert capsys.readouterr().err.startswith("1 alerts left out of the csv output")
+
+
+def test_lines_quotes_values_with_spaces_or_empty():
+    out = io.StringIO()
+    writer = StreamWriter("lines", FIELDS, out)
+
+    writer.write_rows(ROWS)
+
+    assert out.getvalue().splitlines() == [
+        'city=Austin temp=71.5 condition="Clear: clear sky"',
+        'city=Austin temp= condition=""',
+    ]
+
+
+def test_alerts_file_takes_the_alerts_out_of_the_stream():
+    out = io.StringIO()
+    alerts = io.StringIO()
+    writer = StreamWriter("csv", FIELDS, out, alerts)
+
+    writer.write_rows(ROWS, [ALERT])
+
+    assert writer.writes_alerts
+    assert len(out.getvalue().splitlines()) == 3
+    alert_rows = list(csv.DictReader(io.StringIO(alerts.getvalue())))
+    assert tuple(alert_rows[0]) == ALERT_FIELDS
+    assert alert_rows[0]["event"] == "Wind Advisory"
+
+
+def test_json_writes_one_document_on_close():
+    out = io.StringIO()
+    writer = JsonWriter(FIELDS, out)
+
+    writer.write_rows(ROWS[:1], [ALERT])
+    writer.write_rows(ROWS[1:])
+    assert out.getvalue() == ""
+    writer.close()
+
+    assert json.loads(out.getvalue()) == {"rows": ROWS, "alerts": [ALERT]}
+
+
+def test_parquet_writes_a_row_group_per_call(capsys):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    out = io.BytesIO()
+    writer = ParquetWriter(("city", "dt", "temp"), out)
+
+    writer.write_rows([{"city": "Austin", "dt": 1, "temp": 71.5}], [ALERT])
+    writer.write_rows([{"city": "Dallas", "dt": 2, "temp": None}])
+    writer.close()
+
+    table = parquet.read_table(io.BytesIO(out.getvalue()))
+    assert table.num_rows == 2
+    assert str(table.schema.field("dt").type) == "int64"
+    assert table.column("temp").to_pylist() == [71.5, None]
+    assert capsys.readouterr().err.startswith("1 alerts left out of the parquet")
+
+
+def test_make_writer_adds_the_change_field():
+    writer = make_writer("ndjson", "daily", changes=True)
+
+    assert writer.fields == DAILY_FIELDS + CHANGE_FIELDS
+    assert writer.alert_fields == ALERT_FIELDS + CHANGE_FIELDS
+    assert isinstance(make_writer("json", "search"), JsonWriter)
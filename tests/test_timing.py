@@ -0,0 +1,50 @@
+import json
+import pstats
+
+import pytest
+
+from lib import timing
+
+
+@pytest.fixture
+def timings(monkeypatch) -> timing.Timings:
+    monkeypatch.setattr(timing, "_timings", None)
+    assert timing.span("off") is timing._NO_SPAN
+    return timing.enable_timings()
+
+
+def test_spans_add_up_per_phase(timings):
+    for _ in range(3):
+        with timing.span("decode"):
+            pass
+    timing.record("worker", 0.5)
+    timing.record("worker", 0.25)
+
+    assert list(timings.phases) == ["imports", "decode", "worker"]
+    assert timings.phases["decode"][0] == 3
+    assert timings.phases["worker"] == [2, 0.75, 0.5]
+
+
+def test_spans_time_code_that_raises(timings):
+    with pytest.raises(ValueError):
+        with timing.span("fails"):
+            raise ValueError
+
+    assert timings.phases["fails"][0] == 1
+
+
+def test_timings_go_to_stderr(mock_api, run_cli):
+    result = run_cli("--timings", "current", "10,10", "--format", "ndjson")
+
+    assert result.returncode == 0
+    assert len([json.loads(line) for line in result.stdout.splitlines()]) > 0
+    for phase in ("imports", "http onecall", "decode", "wall"):
+        assert phase in result.stderr
+
+
+def test_profile_is_saved(mock_api, run_cli, tmp_path):
+    result = run_cli("--profile", "run.prof", "current", "10,10")
+
+    assert result.returncode == 0
+    assert "Profile saved to" in result.stderr
+    assert pstats.Stats(str(tmp_path / "run.prof")).total_calls > 0
@@ -0,0 +1,74 @@
+import pickle
+
+import pytest
+
+from lib.weatherrecord import DailyWeatherRecord, Units, WeatherRecord
+
+HOUR = {
+    "dt": 1700000000,
+    "temp": 293.15,
+    "feels_like": 292.0,
+    "humidity": 60,
+    "wind_speed": 10.0,
+    "wind_gust": 15.0,
+    "rain": {"1h": 2},
+    "pop": 0.35,
+    "weather": [{"id": 501, "main": "Rain", "description": "moderate rain"}],
+}
+
+
+def test_units_are_shared_per_pair():
+    assert Units.get("c", "k") is Units.get("c", "k")
+    assert Units.get("c", "k") is not Units.get("c", "m")
+    assert pickle.loads(pickle.dumps(Units.get("c", "k"))) is Units.get("c", "k")
+
+
+def test_records_share_their_units():
+    first = WeatherRecord.from_api(HOUR, "c", "k")
+    second = WeatherRecord.from_api(HOUR, units=Units.get("c", "k"))
+
+    assert first.units is second.units
+    assert pickle.loads(pickle.dumps(first)).units is first.units
+
+
+def test_records_have_no_instance_dict():
+    record = WeatherRecord.from_api(HOUR)
+    daily = DailyWeatherRecord(
+        HOUR["dt"],
+        "Rain all day",
+        280.0,
+        290.0,
+        {"day": 1, "night": 2, "eve": 3, "morn": 4},
+        50,
+        3.0,
+        0.5,
+        HOUR["weather"][0],
+    )
+
+    for item in (record, daily, Units.get()):
+        with pytest.raises(AttributeError):
+            item.__dict__
+
+
+def test_from_api_reads_the_fields():
+    record = WeatherRecord.from_api(HOUR, "c", "k")
+
+    assert record.get_temp() == "20.00 C"
+    assert record.get_wind_speed() == "36.00 km/h"
+    assert record.get_wind_gust() == "54.00 km/h"
+    assert record.get_rain() == "2 mm"
+    assert record.get_snow() == "N/A"
+    assert record.get_pop() == "35.00%"
+    assert record.get_weather_condition() == "Rain: moderate rain"
+    assert record.weather == HOUR["weather"][0]
+
+
+def test_from_api_leaves_out_what_the_api_did_not_send():
+    data = {k: v for k, v in HOUR.items() if k not in ("wind_gust", "rain", "pop")}
+
+    record = WeatherRecord.from_api(data)
+
+    assert (record.wind_gust, record.rain, record.snow, record.pop) == (None,) * 4
+    assert not record.has_wind_gust()
+    assert record.get_wind_gust() == "N/A"
+    assert record.get_pop() == "N/A"